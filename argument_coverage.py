@@ -0,0 +1,173 @@
+from typing import Dict, List, Set
+from graphql.language.ast import EnumValueNode, ListValueNode, ObjectValueNode, VariableNode
+from extract_fields import OperationVisitor
+
+CATEGORIES = ("arguments", "input_fields", "enum_values")
+
+class ArgumentVisitor(OperationVisitor):
+    """
+    Records the arguments, input object fields and enum values an operation passes, during the shared walk.
+
+    Usages are recorded without the schema as `(field path, argument, input field path, enum value or None)`
+    tuples in a set shared by all operations, so that each distinct usage is resolved against the schema once
+    (see `ArgumentIndex.resolve`). Variables count as the argument being used; their values are only known
+    through a default value in the variable definition.
+    """
+
+    def __init__(self, usages: Set[tuple]):
+        """
+        Args:
+            usages (Set[tuple]): The set the usages of every operation are added to.
+        """
+        self.usages = usages
+        self.defaults = {}
+        self.arguments = 0
+
+    def enter_operation(self, node):
+        self.defaults = {definition.variable.name.value: definition.default_value
+                         for definition in node.variable_definitions or () if definition.default_value is not None}
+
+    def enter_field(self, field, path, depth, has_subfields):
+        for argument in field.arguments or ():
+            self.arguments += 1
+            self._add_value(path, argument.name.value, (), argument.value)
+
+    def _add_value(self, path: str, argument: str, value_path: tuple, value):
+        if isinstance(value, VariableNode):
+            value = self.defaults.get(value.name.value)
+        self.usages.add((path, argument, value_path, value.value if isinstance(value, EnumValueNode) else None))
+        if isinstance(value, ObjectValueNode):
+            for value_field in value.fields:
+                self._add_value(path, argument, value_path + (value_field.name.value,), value_field.value)
+        elif isinstance(value, ListValueNode):
+            for item in value.values:
+                self._add_value(path, argument, value_path, item)
+
+    def result(self) -> dict:
+        return {"arguments": self.arguments}
+
+class ArgumentIndex:
+    """
+    Compact ID tables of every field argument, input object field and enum value of a schema.
+
+    Each category is a sorted list of keys with a key -> ID lookup, and coverage is a bytearray per category
+    indexed by ID. Arguments are keyed by field path, e.g. `launches(find)`, input fields and enum values by
+    type, e.g. `LaunchFind.mission_name` and `order_by.asc`.
+    """
+
+    def __init__(self, snapshot: dict):
+        """
+        Args:
+            snapshot (dict): A snapshot built by `build_schema_snapshot`, including its 'argument_tables'.
+        """
+        tables = snapshot['argument_tables']
+        path_filter = snapshot.get('path_filter')
+        self.field_arguments = tables['field_arguments']
+        self.input_fields = tables['input_fields']
+        self.enum_values = {enum: set(values) for enum, values in tables['enum_values'].items()}
+
+        # Arguments belong to fields with arguments, whether or not the field is a leaf
+        self.path_owners = {}
+        arguments = []
+        for hierarchical_field, owner_type, field_name, _, _ in snapshot['paths']:
+            field_arguments = self.field_arguments.get(owner_type, {}).get(field_name)
+            if field_arguments and (path_filter is None or path_filter.is_included(hierarchical_field)):
+                self.path_owners[hierarchical_field] = (owner_type, field_name)
+                arguments.extend(f"{hierarchical_field}({argument})" for argument in field_arguments)
+
+        self.keys: Dict[str, List[str]] = {
+            "arguments": sorted(arguments),
+            "input_fields": sorted(f"{input_type}.{field}" for input_type, fields in self.input_fields.items() for field in fields),
+            "enum_values": sorted(f"{enum}.{value}" for enum, values in tables['enum_values'].items() for value in values),
+        }
+        self.ids: Dict[str, Dict[str, int]] = {category: {key: i for i, key in enumerate(keys)} for category, keys in self.keys.items()}
+
+    def resolve(self, usages: Set[tuple]) -> Dict[str, bytearray]:
+        """
+        Resolves recorded usages against the schema.
+
+        Args:
+            usages (Set[tuple]): Usages recorded by `ArgumentVisitor`.
+
+        Returns:
+            Dict[str, bytearray]: For each category, 1 at the ID of every covered key and 0 elsewhere.
+        """
+        covered = {category: bytearray(len(keys)) for category, keys in self.keys.items()}
+        argument_ids, input_field_ids, enum_value_ids = self.ids["arguments"], self.ids["input_fields"], self.ids["enum_values"]
+        for path, argument, value_path, enum_value in usages:
+            owner = self.path_owners.get(path)
+            if owner is None:
+                continue
+            named_type = self.field_arguments[owner[0]][owner[1]].get(argument)
+            if named_type is None:
+                continue
+            covered["arguments"][argument_ids[f"{path}({argument})"]] = 1
+            for input_field in value_path:
+                fields = self.input_fields.get(named_type)
+                if fields is None or input_field not in fields:
+                    named_type = None
+                    break
+                covered["input_fields"][input_field_ids[f"{named_type}.{input_field}"]] = 1
+                named_type = fields[input_field]
+            if enum_value is not None and enum_value in self.enum_values.get(named_type, ()):
+                covered["enum_values"][enum_value_ids[f"{named_type}.{enum_value}"]] = 1
+        return covered
+
+    def summary(self, covered: Dict[str, bytearray]) -> list:
+        """
+        Returns one row per category with the keys 'Category', 'Total', 'Covered' and 'Coverage'.
+        """
+        rows = []
+        for category in CATEGORIES:
+            total, count = len(self.keys[category]), sum(covered[category])
+            rows.append({'Category': category, 'Total': total, 'Covered': count,
+                         'Coverage': (count / total) * 100 if total else 0.0})
+        return rows
+
+    def report_rows(self, covered: Dict[str, bytearray]) -> list:
+        """
+        Returns one row per key with the keys 'Category', 'Key' and 'Covered'.
+        """
+        return [{'Category': category, 'Key': key, 'Covered': bool(covered[category][i])}
+                for category in CATEGORIES for i, key in enumerate(self.keys[category])]
+
+
+if __name__ == "__main__":
+  def test_argument_coverage_happy_path():
+      """
+      Tests that arguments, input fields and enum values are covered from literals, nested objects and variable defaults.
+      """
+      from functools import partial
+      from graphql import parse
+      from coverage_cache import build_schema_snapshot
+      from parse_queries_and_extract_fields import parse_queries_with_metrics
+
+      snapshot = build_schema_snapshot(parse("""
+      type Query { books(find: BookFind, order: Order, limit: Int): [Book] }
+      type Book { title: String similar(limit: Int): [Book] }
+      input BookFind { title: String author: AuthorFind }
+      input AuthorFind { name: String born: Int }
+      enum Order { ASC DESC }
+      """))
+      index = ArgumentIndex(snapshot)
+      assert "books.similar(limit)" in index.keys["arguments"] and len(index.keys["enum_values"]) == 2
+
+      usages = set()
+      queries = [
+          ("a.graphql", 'query { books(find: {author: {name: "Le Guin"}}, order: DESC) { title } }'),
+          ("b.graphql", 'query Books($order: Order = ASC, $limit: Int) { books(order: $order) { similar(limit: $limit) { title } } }'),
+      ]
+      _, used_fields, operation_metrics = parse_queries_with_metrics(queries, metrics=(partial(ArgumentVisitor, usages),))
+      assert [m["arguments"] for m in operation_metrics] == [2, 2], f"Unexpected metrics: {operation_metrics}"
+
+      covered = index.resolve(usages)
+      rows = {row['Key']: row['Covered'] for row in index.report_rows(covered)}
+      assert rows["books(find)"] and rows["books(order)"] and not rows["books(limit)"] and rows["books.similar(limit)"]
+      assert rows["BookFind.author"] and rows["AuthorFind.name"] and not rows["BookFind.title"]
+      assert rows["Order.ASC"] and rows["Order.DESC"], f"Unexpected coverage: {rows}"
+      summary = {row['Category']: row['Covered'] for row in index.summary(covered)}
+      assert summary == {"arguments": 3, "input_fields": 2, "enum_values": 2}, f"Unexpected summary: {summary}"
+
+      print("Test passed: Argument, input field and enum value coverage were collected in the field walk.")
+
+  test_argument_coverage_happy_path()
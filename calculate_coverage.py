@@ -1,11 +1,54 @@
-def calculate_coverage(schema_fields: set, used_fields: set, normalize: bool = False) -> tuple[float, set, set]:
+from collections import defaultdict
+from typing import Dict, Tuple
+
+def build_case_folding_index(schema_fields: set) -> Dict[str, Tuple[str, ...]]:
+    """
+    Builds the index used for case-insensitive coverage, once per schema.
+
+    Args:
+        schema_fields (set): Set of all hierarchical field names defined in the schema.
+
+    Returns:
+        Dict[str, Tuple[str, ...]]: Maps each case-folded field name to the original schema field names folding to it
+                                    (several when the schema has fields differing only in case).
+    """
+    index = defaultdict(list)
+    for field in schema_fields:
+        index[field.casefold()].append(field)
+    return {key: tuple(sorted(fields)) for key, fields in index.items()}
+
+def fold_field_usage(field_usage: dict, folding_index: Dict[str, Tuple[str, ...]]) -> defaultdict:
+    """
+    Attributes usage counts recorded under any casing to the original schema field names.
+
+    The counts of all casings are summed, so a file using two casings of a field must only be counted under one
+    of them (`parse_queries_with_metrics(..., casefold_usage=True)`); otherwise it counts twice for that field.
+
+    Args:
+        field_usage (dict): Dictionary mapping used field names to their usage counts.
+        folding_index (Dict[str, Tuple[str, ...]]): Index built by `build_case_folding_index`.
+
+    Returns:
+        defaultdict: Usage counts keyed by original schema field names. Fields not in the schema keep their name.
+    """
+    folded = defaultdict(int)
+    for field, count in field_usage.items():
+        for original in folding_index.get(field.casefold(), (field,)):
+            folded[original] += count
+    return folded
+
+def calculate_coverage(schema_fields: set, used_fields: set, normalize: bool = False,
+                       folding_index: Dict[str, Tuple[str, ...]] = None) -> tuple[float, set, set]:
     """
     Calculates the coverage percentage of schema fields that are used in queries.
 
     Args:
         schema_fields (set): Set of all hierarchical field names defined in the schema.
         used_fields (set): Set of all hierarchical field names used in queries.
-        normalize (bool): If True, convert all field names to lowercase for comparison.
+        normalize (bool): If True, field names are compared case-insensitively. Covered and uncovered fields
+                          are still returned with their original schema names.
+        folding_index (Dict[str, Tuple[str, ...]], optional): Index built by `build_case_folding_index` for
+                                                              `schema_fields`, so it is not rebuilt on every call.
 
     Returns:
         tuple:
@@ -16,15 +59,19 @@ def calculate_coverage(schema_fields: set, used_fields: set, normalize: bool = F
     if not isinstance(schema_fields, set) or not isinstance(used_fields, set):
         raise TypeError("Both schema_fields and used_fields must be sets.")
 
-    if normalize:
-        schema_fields = {field.lower() for field in schema_fields}
-        used_fields = {field.lower() for field in used_fields}
-
     if not schema_fields:
         return 0.0, set(), set()
 
-    covered = schema_fields.intersection(used_fields)
-    uncovered = schema_fields.difference(used_fields)
+    if normalize:
+        if folding_index is None:
+            folding_index = build_case_folding_index(schema_fields)
+        # Only the used fields are folded; each maps straight to the schema fields it covers
+        covered = set()
+        for field in used_fields:
+            covered.update(folding_index.get(field.casefold(), ()))
+    else:
+        covered = schema_fields.intersection(used_fields)
+    uncovered = schema_fields.difference(covered)
     coverage_percentage = (len(covered) / len(schema_fields)) * 100
     return coverage_percentage, covered, uncovered
 
@@ -85,6 +132,24 @@ if __name__ == "__main__":
       assert covered_fields == expected_covered_fields, "Covered fields do not match expected fields."
       assert uncovered_fields == expected_uncovered_fields, "Uncovered fields do not match expected fields."
 
+      # Normalized comparison reports the original schema names
+      coverage_percentage, covered_fields, uncovered_fields = calculate_coverage(
+          schema_fields, {'USER.ID', 'Post.Title', 'unknown.field'}, normalize=True)
+      assert covered_fields == {'user.id', 'post.title'}, "Covered fields must keep their original names."
+      assert uncovered_fields == schema_fields - covered_fields and uncovered_fields <= schema_fields
+      assert abs(coverage_percentage - (2 / 12) * 100) < 0.01
+
+      index = build_case_folding_index({'book.ISBN', 'book.isbn', 'book.title'})
+      assert index['book.isbn'] == ('book.ISBN', 'book.isbn'), "Fields differing only in case must both be kept."
+      assert dict(fold_field_usage({'BOOK.TITLE': 2, 'book.title': 1}, index)) == {'book.title': 3}
+
+      # A file using two casings of a field counts once for it
+      from parse_queries_and_extract_fields import parse_queries_with_metrics
+      queries = [("a.graphql", "query { book { title TITLE } }"), ("b.graphql", "query { BOOK { title } }")]
+      field_usage, used_fields, _ = parse_queries_with_metrics(queries, only_leafs=True, casefold_usage=True)
+      assert used_fields == {'book.title', 'book.TITLE', 'BOOK.title'}, "Every casing must still be reported as used."
+      assert dict(fold_field_usage(field_usage, index)) == {'book.title': 2}, f"Unexpected usage: {dict(field_usage)}"
+
       print("All tests passed!")
 
   # Run the test
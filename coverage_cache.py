@@ -0,0 +1,211 @@
+import json
+import os
+from graphql import DocumentNode, parse
+from extract_root_types import extract_root_types
+from get_schema_fields import get_type_fields, get_argument_tables, enumerate_root_paths
+from load_schema import load_schema
+from path_filter import PathFilter
+
+CACHE_VERSION = 1
+
+def build_schema_index(schema: DocumentNode) -> dict:
+    """
+    Extracts the compact tables a snapshot is enumerated from, after which the schema AST is no longer needed.
+
+    Args:
+        schema (DocumentNode): A parsed GraphQL schema represented as a DocumentNode.
+
+    Returns:
+        dict: The snapshot keys 'root_types', 'type_fields' and 'argument_tables' (see `build_schema_snapshot`).
+
+    Raises:
+        ValueError: If the root query type is not found in the schema.
+    """
+    root_query_type, root_mutation_type = extract_root_types(schema)
+    type_fields = get_type_fields(schema)
+    if root_query_type not in type_fields:
+        raise ValueError(f"Root query type '{root_query_type}' not found in schema.")
+    return {
+        'root_types': [root_query_type, root_mutation_type],
+        'type_fields': type_fields,
+        'argument_tables': get_argument_tables(schema),
+    }
+
+def snapshot_from_index(index: dict, path_filter: PathFilter = None, workers: int = 1, subtree_cache=None) -> dict:
+    """
+    Enumerates the paths of a schema index built by `build_schema_index` into a snapshot.
+
+    Args:
+        index (dict): The tables built by `build_schema_index`.
+        path_filter (PathFilter, optional): Include/exclude rules applied during traversal.
+        workers (int, optional): Number of worker processes enumerating root fields in parallel (see `enumerate_root_paths`).
+        subtree_cache (SubtreeCache, optional): Cache of type subtrees shared across schemas (see `enumerate_root_paths`).
+
+    Returns:
+        dict: A snapshot as returned by `build_schema_snapshot`.
+    """
+    root_query_type, root_mutation_type = index['root_types']
+    type_fields = index['type_fields']
+    root_types = [root_query_type]
+    if root_mutation_type and root_mutation_type in type_fields:
+        root_types.append(root_mutation_type)
+    paths = enumerate_root_paths(type_fields, root_types, path_filter=path_filter, workers=workers,
+                                 subtree_cache=subtree_cache)
+
+    return {
+        'root_types': index['root_types'],
+        'type_fields': type_fields,
+        'paths': paths,
+        'path_filter': path_filter,
+        'argument_tables': index['argument_tables'],
+    }
+
+def build_schema_snapshot(schema: DocumentNode, path_filter: PathFilter = None, workers: int = 1,
+                          subtree_cache=None) -> dict:
+    """
+    Enumerates a schema once and keeps everything needed to update that enumeration incrementally later.
+
+    Args:
+        schema (DocumentNode): A parsed GraphQL schema represented as a DocumentNode.
+        path_filter (PathFilter, optional): Include/exclude rules applied during traversal.
+        workers (int, optional): Number of worker processes enumerating root fields in parallel (see `enumerate_root_paths`).
+        subtree_cache (SubtreeCache, optional): Cache of type subtrees shared across schemas (see `enumerate_root_paths`).
+
+    Returns:
+        dict: A snapshot with the keys:
+            - 'root_types': [root query type, root mutation type (or None)].
+            - 'type_fields': Object type name -> {field name: named type}.
+            - 'paths': List of (hierarchical field, owner type, field name, field type, has_subfields) tuples.
+            - 'path_filter': The PathFilter the paths were enumerated with (or None).
+            - 'argument_tables': Field arguments, input fields and enum values (see `get_argument_tables`).
+
+    Raises:
+        ValueError: If the root query type is not found in the schema.
+    """
+    return snapshot_from_index(build_schema_index(schema), path_filter=path_filter, workers=workers,
+                               subtree_cache=subtree_cache)
+
+def load_schema_snapshot(schema_path: str, path_filter: PathFilter = None, workers: int = 1, subtree_cache=None) -> dict:
+    """
+    Like `build_schema_snapshot` for a schema file, with the lowest peak memory.
+
+    The schema is parsed without location information, and its AST is released once the compact index is
+    built, before the paths are enumerated.
+
+    Args:
+        schema_path (str): The file path to the GraphQL schema.
+        path_filter (PathFilter, optional): Include/exclude rules applied during traversal.
+        workers (int, optional): Number of worker processes enumerating root fields in parallel.
+        subtree_cache (SubtreeCache, optional): Cache of type subtrees shared across schemas.
+
+    Returns:
+        dict: A snapshot as returned by `build_schema_snapshot`.
+    """
+    index = build_schema_index(load_schema(schema_path, no_location=True))
+    return snapshot_from_index(index, path_filter=path_filter, workers=workers, subtree_cache=subtree_cache)
+
+def snapshot_fields(snapshot: dict, only_leafs: bool = False) -> set:
+    """
+    Returns the hierarchical schema fields of a snapshot, exactly as `get_schema_fields` would.
+
+    Args:
+        snapshot (dict): A snapshot built by `build_schema_snapshot`.
+        only_leafs (bool): If True, only returns fields that don't have sub-fields.
+
+    Returns:
+        set: A set of hierarchical field names.
+    """
+    path_filter = snapshot.get('path_filter')
+    return {path[0] for path in snapshot['paths']
+            if (not only_leafs or not path[4]) and (path_filter is None or path_filter.is_included(path[0]))}
+
+def save_coverage_cache(cache_path: str, snapshot: dict, field_usage: dict, only_leafs: bool = False):
+    """
+    Stores a schema snapshot and the query field usage of a run so that later runs can reuse them.
+
+    Args:
+        cache_path (str): Path of the JSON cache file to write.
+        snapshot (dict): A snapshot built by `build_schema_snapshot`.
+        field_usage (dict): Dictionary mapping field names to their usage counts.
+        only_leafs (bool): The `only_leafs` setting the run was made with.
+    """
+    cache = {
+        'version': CACHE_VERSION,
+        'only_leafs': only_leafs,
+        'root_types': snapshot['root_types'],
+        'type_fields': snapshot['type_fields'],
+        'paths': [list(path) for path in snapshot['paths']],
+        'path_filter': None,
+        'field_usage': dict(field_usage),
+    }
+    if snapshot.get('path_filter') is not None:
+        cache['path_filter'] = {'include': snapshot['path_filter'].include, 'exclude': snapshot['path_filter'].exclude}
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(cache, file)
+    os.replace(tmp_path, cache_path)
+
+def load_coverage_cache(cache_path: str) -> dict:
+    """
+    Loads a cache written by `save_coverage_cache`.
+
+    Args:
+        cache_path (str): Path of the JSON cache file.
+
+    Returns:
+        dict: The cache, with 'paths' converted back to tuples and 'path_filter' back to a PathFilter.
+
+    Raises:
+        FileNotFoundError: If the cache file does not exist.
+        ValueError: If the cache was written by an incompatible version.
+    """
+    with open(cache_path, 'r') as file:
+        cache = json.load(file)
+    if cache.get('version') != CACHE_VERSION:
+        raise ValueError(f"Unsupported coverage cache version in {cache_path}: {cache.get('version')}")
+    cache['paths'] = [tuple(path) for path in cache['paths']]
+    if cache['path_filter'] is not None:
+        cache['path_filter'] = PathFilter(**cache['path_filter'])
+    return cache
+
+
+if __name__ == "__main__":
+  def test_coverage_cache_round_trip():
+      """
+      Tests that a snapshot and its field usage survive a save/load round trip.
+      """
+      schema = parse("""
+      type Query {
+          book: Book
+      }
+
+      type Book {
+          title: String
+          author: Author
+      }
+
+      type Author {
+          name: String
+      }
+      """)
+      snapshot = build_schema_snapshot(schema)
+      assert snapshot_fields(snapshot) == {"book", "book.title", "book.author", "book.author.name"}
+      assert snapshot_fields(snapshot, only_leafs=True) == {"book.title", "book.author.name"}
+
+      cache_path = 'temp_coverage_cache.json'
+      try:
+          save_coverage_cache(cache_path, snapshot, {"book": 1, "book.title": 1}, only_leafs=False)
+          cache = load_coverage_cache(cache_path)
+          assert cache['paths'] == snapshot['paths'], "Paths did not survive the round trip."
+          assert cache['type_fields'] == snapshot['type_fields'], "Type fields did not survive the round trip."
+          assert cache['field_usage'] == {"book": 1, "book.title": 1}, "Field usage did not survive the round trip."
+
+          filtered = build_schema_snapshot(schema, path_filter=PathFilter(exclude=["*.author"]))
+          save_coverage_cache(cache_path, filtered, {}, only_leafs=False)
+          cache = load_coverage_cache(cache_path)
+          assert snapshot_fields(cache) == {"book", "book.title"}, "Path filter did not survive the round trip."
+          print("Test passed: Coverage cache round trip preserved the snapshot and field usage.")
+      finally:
+          os.remove(cache_path)
+
+  test_coverage_cache_round_trip()
@@ -0,0 +1,253 @@
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timezone
+from graphql import parse
+from calculate_coverage import calculate_coverage
+from coverage_cache import build_schema_snapshot, snapshot_fields
+from parse_queries_and_extract_fields import parse_queries_and_extract_fields
+from path_filter import PathFilter
+
+def _git(repo_path: str, *args: str, input: bytes = None) -> bytes:
+    return subprocess.run(["git", "-C", repo_path, *args], input=input, capture_output=True, check=True).stdout
+
+def list_commits(repo_path: str, max_count: int, rev: str = "HEAD") -> list:
+    """
+    Lists the most recent commits reachable from a revision, oldest first.
+
+    Args:
+        repo_path (str): Path to a local git repository.
+        max_count (int): The maximum number of commits to list.
+        rev (str): The revision to walk back from.
+
+    Returns:
+        list: A list of (commit sha, commit timestamp) tuples.
+    """
+    output = _git(repo_path, "rev-list", f"--max-count={max_count}", "--format=%ct", rev).decode()
+    commits = []
+    lines = output.split("\n")
+    for header, timestamp in zip(lines[0::2], lines[1::2]):
+        commits.append((header.split()[1], int(timestamp)))
+    return commits[::-1]
+
+def list_tree_blobs(repo_path: str, commit: str, schema_path: str, queries_path: str) -> tuple:
+    """
+    Finds the schema blob and the GraphQL query blobs of a commit without checking it out.
+
+    Args:
+        repo_path (str): Path to a local git repository.
+        commit (str): The commit sha.
+        schema_path (str): Path of the schema file, relative to the repository root.
+        queries_path (str): Path of the queries directory, relative to the repository root.
+
+    Returns:
+        tuple: (schema blob sha or None, list of (file path, blob sha) tuples for the `.graphql` query files).
+    """
+    output = _git(repo_path, "ls-tree", "-r", "-z", "--full-tree", commit, "--", schema_path, queries_path)
+    schema_blob = None
+    query_blobs = []
+    for entry in output.decode().split("\0"):
+        if not entry:
+            continue
+        meta, path = entry.split("\t", 1)
+        _, object_type, sha = meta.split()
+        if object_type != "blob":
+            continue
+        if path == schema_path:
+            schema_blob = sha
+        elif path.endswith(".graphql"):
+            query_blobs.append((path, sha))
+    return schema_blob, query_blobs
+
+def read_blobs(repo_path: str, shas: list) -> dict:
+    """
+    Reads many blobs straight from the git object store with a single `git cat-file --batch` call.
+
+    Args:
+        repo_path (str): Path to a local git repository.
+        shas (list): Blob shas to read.
+
+    Returns:
+        dict: Maps each blob sha to its decoded text.
+    """
+    if not shas:
+        return {}
+    output = _git(repo_path, "cat-file", "--batch", input="".join(f"{sha}\n" for sha in shas).encode())
+    blobs = {}
+    offset = 0
+    for sha in shas:
+        header_end = output.index(b"\n", offset)
+        size = int(output[offset:header_end].split()[2])
+        blobs[sha] = output[header_end + 1:header_end + 1 + size].decode("utf-8", errors="replace")
+        offset = header_end + 1 + size + 1
+    return blobs
+
+def _extract_blob_fields(kind: str, sha: str, text: str, only_leafs: bool, path_filter: PathFilter):
+    if kind == "schema":
+        try:
+            snapshot = build_schema_snapshot(parse(text, no_location=True), path_filter=path_filter)
+        except Exception as e:
+            print(f"Error parsing schema blob {sha}: {e}")
+            return None
+        return sorted(snapshot_fields(snapshot, only_leafs=only_leafs))
+    _, used_fields = parse_queries_and_extract_fields([(sha, text)], only_leafs=only_leafs, path_filter=path_filter)
+    return sorted(used_fields)
+
+def coverage_history(repo_path: str, schema_path: str, queries_path: str, max_count: int,
+                     only_leafs: bool = False, cache_path: str = None, workers: int = None,
+                     path_filter: PathFilter = None) -> list:
+    """
+    Computes schema coverage for each of the last commits of a git repository.
+
+    Schema and query files are read from the object store by blob sha, and each distinct blob is parsed
+    once, so the cost grows with the number of distinct file versions instead of with the number of commits.
+    Per-blob field sets are optionally persisted in a JSON cache and reused by later runs. The cache is
+    replaced atomically and only keeps the blobs of the walked commits, so blobs of commits that are no
+    longer reachable (e.g. after a rebase) are dropped instead of accumulating.
+
+    Args:
+        repo_path (str): Path to a local git repository.
+        schema_path (str): Path of the schema file, relative to the repository root.
+        queries_path (str): Path of the queries directory, relative to the repository root.
+        max_count (int): The number of commits to walk back from HEAD.
+        only_leafs (bool): If True, only leaf fields are considered.
+        cache_path (str, optional): Path of a JSON file holding the per-blob field sets.
+        workers (int, optional): Number of worker processes/threads. Defaults to the executor's default.
+        path_filter (PathFilter, optional): Include/exclude rules applied while traversing schemas and queries.
+
+    Returns:
+        list: One dictionary per commit (oldest first) with the keys 'commit', 'date', 'total_fields',
+              'covered_fields', 'coverage' and 'query_files'. Commits without a parseable schema are skipped.
+    """
+    # Field sets depend on the extraction settings, so a cache is only reused for the same settings
+    settings = {"only_leafs": only_leafs,
+                "include": path_filter.include if path_filter else [],
+                "exclude": path_filter.exclude if path_filter else []}
+    blob_fields = {}
+    if cache_path and os.path.isfile(cache_path):
+        with open(cache_path, "r") as file:
+            cache = json.load(file)
+        if cache.get("settings") == settings:
+            blob_fields = cache["blobs"]
+
+    commits = list_commits(repo_path, max_count)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        trees = list(executor.map(lambda c: list_tree_blobs(repo_path, c[0], schema_path, queries_path), commits))
+
+    # Parse every blob that has not been seen before, in parallel
+    kinds = {}
+    for schema_blob, query_blobs in trees:
+        if schema_blob:
+            kinds[schema_blob] = "schema"
+        for _, sha in query_blobs:
+            kinds.setdefault(sha, "query")
+    new_shas = [sha for sha in kinds if sha not in blob_fields]
+    texts = read_blobs(repo_path, new_shas)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parsed = executor.map(_extract_blob_fields, [kinds[sha] for sha in new_shas], new_shas,
+                              [texts[sha] for sha in new_shas], [only_leafs] * len(new_shas),
+                              [path_filter] * len(new_shas))
+        blob_fields.update(zip(new_shas, parsed))
+
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"settings": settings, "blobs": {sha: blob_fields[sha] for sha in kinds}}, file)
+        os.replace(tmp_path, cache_path)
+
+    field_sets = {sha: frozenset(fields) for sha, fields in blob_fields.items() if fields is not None}
+    history = []
+    for (commit, timestamp), (schema_blob, query_blobs) in zip(commits, trees):
+        if schema_blob not in field_sets:
+            print(f"Skipping commit {commit}: no parseable schema at {schema_path}")
+            continue
+        used_fields = set()
+        for _, sha in query_blobs:
+            used_fields.update(field_sets.get(sha, ()))
+        coverage, covered, _ = calculate_coverage(schema_fields=set(field_sets[schema_blob]), used_fields=used_fields)
+        history.append({
+            "commit": commit,
+            "date": datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(),
+            "total_fields": len(field_sets[schema_blob]),
+            "covered_fields": len(covered),
+            "coverage": coverage,
+            "query_files": len(query_blobs),
+        })
+    return history
+
+def generate_history_report(history: list, csv_path: str = "schema_coverage_history.csv",
+                            plot_path: str = "schema_coverage_history.png"):
+    """
+    Writes the coverage time series to a CSV file and plots it.
+
+    Args:
+        history (list): The time series returned by `coverage_history`.
+        csv_path (str): Path to the CSV file for the time series.
+        plot_path (str): Path to the plot file for the coverage trend chart.
+    """
+    import pandas as pd
+    import matplotlib.pyplot as plt
+
+    df = pd.DataFrame(history, columns=["commit", "date", "total_fields", "covered_fields", "coverage", "query_files"])
+    print("Coverage History:")
+    print(df.to_string(index=False))
+    df.to_csv(csv_path, index=False)
+
+    plt.figure(figsize=(12, 8))
+    plt.plot(pd.to_datetime(df["date"]), df["coverage"], marker="o", color="blue")
+    plt.title("GraphQL Schema Coverage History")
+    plt.xlabel("Commit Date")
+    plt.ylabel("Coverage (%)")
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    plt.savefig(plot_path)
+    plt.show()
+
+
+if __name__ == "__main__":
+  def test_coverage_history_reuses_blobs():
+      """
+      Tests that coverage_history produces one point per commit and parses each distinct blob once.
+      """
+      import tempfile
+
+      with tempfile.TemporaryDirectory() as repo_path:
+          def commit(files: dict, message: str):
+              for path, text in files.items():
+                  os.makedirs(os.path.dirname(os.path.join(repo_path, path)), exist_ok=True)
+                  with open(os.path.join(repo_path, path), "w") as file:
+                      file.write(text)
+              _git(repo_path, "add", "-A")
+              _git(repo_path, "-c", "user.name=test", "-c", "user.email=test@example.com",
+                   "commit", "-q", "-m", message)
+
+          _git(repo_path, "init", "-q")
+          commit({"schema.graphql": "type Query { book: Book }\ntype Book { title: String isbn: String }",
+                  "queries/a.graphql": "query { book { title } }"}, "first")
+          commit({"queries/README.txt": "not a query"}, "unrelated")
+          commit({"queries/b.graphql": "query { book { isbn } }"}, "second query")
+
+          cache_path = os.path.join(repo_path, "history_cache.json")
+          history = coverage_history(repo_path, "schema.graphql", "queries", max_count=10,
+                                     only_leafs=True, cache_path=cache_path, workers=2)
+          assert [round(point["coverage"]) for point in history] == [50, 50, 100], f"Unexpected history: {history}"
+
+          with open(cache_path, "r") as file:
+              cached_blobs = json.load(file)["blobs"]
+          assert len(cached_blobs) == 3, f"Expected 3 distinct blobs to be parsed, got {len(cached_blobs)}"
+
+          # A second run must find every blob in the cache
+          assert coverage_history(repo_path, "schema.graphql", "queries", max_count=10,
+                                  only_leafs=True, cache_path=cache_path) == history
+
+          # Blobs only referenced by commits that are no longer reachable are pruned from the cache
+          _git(repo_path, "reset", "-q", "--hard", "HEAD~1")
+          coverage_history(repo_path, "schema.graphql", "queries", max_count=10, only_leafs=True, cache_path=cache_path)
+          with open(cache_path, "r") as file:
+              assert len(json.load(file)["blobs"]) == 2, "The blob of the dropped commit must be pruned."
+          assert not [name for name in os.listdir(repo_path) if name.endswith(".tmp")], "Temporary files must be replaced."
+
+      print("Test passed: Coverage history reused per-blob field sets across commits and runs.")
+
+  test_coverage_history_reuses_blobs()
@@ -0,0 +1,201 @@
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from graphql import DocumentNode
+from coverage_cache import build_schema_snapshot, load_schema_snapshot, snapshot_fields
+from load_queries import READ_WORKERS, iter_queries
+from load_schema import load_schema
+from operation_collector import load_collected_operations
+from parse_queries_and_extract_fields import parse_queries_with_metrics
+from parse_schema import parse_schema
+from path_filter import PathFilter
+from scan_sources import load_embedded_queries
+from subtree_cache import SubtreeCache
+
+QUEUE_SIZE = 64
+# In low-memory mode, fewer query texts are read ahead of the parser
+LOW_MEMORY_QUEUE_SIZE = 8
+LOW_MEMORY_READ_WORKERS = 2
+_DONE = object()
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def peak_rss() -> tuple:
+    """
+    Returns the peak resident set size of this process and of its largest terminated child process.
+
+    Returns:
+        tuple: Both peaks in bytes, or (None, None) where the platform does not report them.
+    """
+    if resource is None:
+        return None, None
+    # Linux reports kilobytes, macOS bytes
+    scale = 1 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+def _schema_stage(schema_path: str, schema: DocumentNode, only_leafs: bool, path_filter: PathFilter, with_snapshot: bool,
+                  workers: int, subtree_cache: SubtreeCache, low_memory: bool = False) -> tuple:
+    if low_memory and schema is None:
+        snapshot = load_schema_snapshot(schema_path, path_filter=path_filter, workers=workers, subtree_cache=subtree_cache)
+        return snapshot_fields(snapshot, only_leafs=only_leafs), snapshot if with_snapshot else None
+    if with_snapshot or schema is not None:
+        snapshot = build_schema_snapshot(schema if schema is not None else load_schema(schema_path),
+                                         path_filter=path_filter, workers=workers, subtree_cache=subtree_cache)
+        return snapshot_fields(snapshot, only_leafs=only_leafs), snapshot if with_snapshot else None
+    return parse_schema(schema_path=schema_path, only_leafs=only_leafs, path_filter=path_filter, workers=workers,
+                        subtree_cache=subtree_cache), None
+
+class _QueryReader(threading.Thread):
+    """Reads queries from every source into a bounded queue, so reading runs ahead of parsing by at most `queue_size`."""
+
+    def __init__(self, sources: list, queue_size: int):
+        super().__init__(name="graphql-query-reader", daemon=True)
+        self.sources = sources
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+
+    def _put(self, item) -> bool:
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        try:
+            for source in self.sources:
+                for query in source():
+                    if not self._put(query):
+                        return
+        except Exception as e:
+            self._put(e)
+        self._put(_DONE)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+def run_coverage_pipeline(schema_path: str, queries_path: str = None, operations_path: str = None,
+                          sources_path: str = None, only_leafs: bool = False, path_filter: PathFilter = None,
+                          with_snapshot: bool = False, metrics: tuple = (), queue_size: int = QUEUE_SIZE,
+                          workers: int = None, schema: DocumentNode = None, subtree_cache: SubtreeCache = None,
+                          evaluate_directives: bool = False, low_memory: bool = False, field_matrix=None,
+                          casefold_usage: bool = False) -> tuple:
+    """
+    Loads the schema and the queries concurrently instead of one after the other.
+
+    The schema is loaded and enumerated in a separate process, so it overlaps with query work despite the GIL.
+    Meanwhile a reader thread reads the query files (and collected operations and embedded client documents)
+    into a bounded queue, and the calling thread parses them as they arrive. The end-to-end time is about the
+    longer of the two stages rather than their sum.
+
+    Args:
+        schema_path (str): The file path to the GraphQL schema.
+        queries_path (str, optional): Directory searched recursively for `.graphql` query files.
+        operations_path (str, optional): JSONL file of operations recorded by an `OperationCollector`.
+        sources_path (str, optional): Directory of generated client sources with embedded GraphQL documents.
+        only_leafs (bool): If True, only leaf fields are considered.
+        path_filter (PathFilter, optional): Include/exclude rules applied to the schema and the queries.
+        with_snapshot (bool): If True, also returns the schema snapshot that `save_coverage_cache` stores.
+        metrics (tuple): `OperationVisitor` classes run on every operation while its fields are extracted.
+        queue_size (int): Maximum number of queries read ahead of the parser.
+        workers (int, optional): Number of worker processes used to scan `sources_path` and to enumerate large schemas.
+        schema (DocumentNode, optional): An already parsed schema (e.g. a composed supergraph) used instead of `schema_path`.
+        subtree_cache (SubtreeCache, optional): Cache of type subtrees shared across schemas and runs.
+        evaluate_directives (bool): If True, `@skip`/`@include` of collected operations are evaluated with the
+                                    variables captured with each request.
+        low_memory (bool): If True, the schema and the queries are parsed without source locations, the schema AST
+                           is released before its paths are enumerated, and fewer queries are read ahead.
+        field_matrix (OperationFieldMatrix, optional): If given, the fields of every operation are added to it.
+        casefold_usage (bool): If True, fields of a file that differ only in case are counted once (see `parse_queries_with_metrics`).
+
+    Returns:
+        tuple: The schema fields, the schema snapshot (None unless `with_snapshot`), the field usage, the used fields
+               and the per-operation metrics, as returned by `parse_schema` and `parse_queries_with_metrics`.
+
+    Raises:
+        FileNotFoundError: If `queries_path` contains no query files.
+    """
+    read_workers = READ_WORKERS
+    if low_memory:
+        queue_size, read_workers = min(queue_size, LOW_MEMORY_QUEUE_SIZE), LOW_MEMORY_READ_WORKERS
+    sources = []
+    if queries_path:
+        sources.append(lambda: iter_queries(queries_path, workers=read_workers))
+    if operations_path:
+        sources.append(lambda: load_collected_operations(operations_path, with_variables=evaluate_directives))
+    if sources_path:
+        sources.append(lambda: load_embedded_queries(sources_path, workers=workers))
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        schema_future = executor.submit(_schema_stage, schema_path, schema, only_leafs, path_filter, with_snapshot, workers,
+                                        subtree_cache, low_memory)
+        reader = _QueryReader(sources, queue_size)
+        reader.start()
+        try:
+            field_usage, used_fields, operation_metrics = parse_queries_with_metrics(
+                reader, only_leafs=only_leafs, path_filter=path_filter, metrics=metrics, low_memory=low_memory,
+                field_matrix=field_matrix, casefold_usage=casefold_usage)
+        finally:
+            reader.stopped.set()
+        schema_fields, snapshot = schema_future.result()
+    return schema_fields, snapshot, field_usage, used_fields, operation_metrics
+
+
+if __name__ == "__main__":
+  def test_run_coverage_pipeline_happy_path():
+      """
+      Tests that the pipeline returns the same results as running the stages one after another.
+      """
+      import tempfile
+      from operation_metrics import DepthVisitor
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          schema_path = os.path.join(tmp_dir, "schema.graphql")
+          queries_path = os.path.join(tmp_dir, "queries")
+          os.makedirs(queries_path)
+          with open(schema_path, "w") as file:
+              file.write("type Query { book: Book }\ntype Book { title: String isbn: String author: String }")
+          for i in range(200):
+              with open(os.path.join(queries_path, f"q{i}.graphql"), "w") as file:
+                  file.write("query { book { title %s } }" % ("isbn" if i % 2 else ""))
+          with open(os.path.join(queries_path, "broken.graphql"), "w") as file:
+              file.write("query { book {")
+
+          schema_fields, snapshot, field_usage, used_fields, operation_metrics = run_coverage_pipeline(
+              schema_path, queries_path=queries_path, only_leafs=True, with_snapshot=True, metrics=(DepthVisitor,), queue_size=4)
+          assert schema_fields == parse_schema(schema_path, only_leafs=True)
+          assert snapshot is not None and snapshot["root_types"] == ["Query", None], f"Unexpected snapshot: {snapshot}"
+          assert dict(field_usage) == {"book.title": 200, "book.isbn": 100}, f"Unexpected usage: {dict(field_usage)}"
+          assert used_fields == {"book.title", "book.isbn"}
+          assert len(operation_metrics) == 200 and all(m["depth"] == 2 for m in operation_metrics)
+
+          low_memory = run_coverage_pipeline(schema_path, queries_path=queries_path, only_leafs=True, with_snapshot=True,
+                                             metrics=(DepthVisitor,), low_memory=True)
+          assert low_memory[0] == schema_fields and low_memory[1] == snapshot and dict(low_memory[2]) == dict(field_usage)
+          assert all(peak > 0 for peak in peak_rss()), "The peak RSS must be reported on this platform."
+
+          empty_path = os.path.join(tmp_dir, "empty")
+          os.makedirs(empty_path)
+          try:
+              run_coverage_pipeline(schema_path, queries_path=empty_path)
+              raise AssertionError("An empty queries directory must raise.")
+          except FileNotFoundError:
+              pass
+
+      print("Test passed: Pipelined schema and query loading matches the sequential stages.")
+
+  test_run_coverage_pipeline_happy_path()
@@ -0,0 +1,326 @@
+import json
+import os
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from os.path import isdir, isfile
+from graphql import GraphQLError
+from coverage_session import CoverageSession
+from load_queries import iter_queries
+from metrics_exporter import CoverageMetrics
+from parse_queries_and_extract_fields import extract_document_fields
+from path_filter import PathFilter
+
+HOST = "127.0.0.1"
+PORT = 8765
+# Seconds between rewrites of the metrics file while serving
+METRICS_INTERVAL = 5.0
+
+class CoverageState:
+    """
+    The schema index and baseline query usage a coverage server answers requests from.
+
+    The baseline session is built once at start-up and only read afterwards; each request's usage is overlaid
+    on the baseline result without copying it, so requests can be served concurrently. When `metrics_path` is
+    set, the baseline usage plus the usage of every document requested since start-up is kept as
+    `CoverageMetrics`, and a background thread rewrites the file every `metrics_interval` seconds if it changed.
+    Call `close()` to stop the thread and write the final state.
+    """
+
+    def __init__(self, schema_path: str, queries_path: str = None, only_leafs: bool = False,
+                 path_filter: PathFilter = None, metrics_path: str = None, metrics_depth: int = 2,
+                 metrics_top_k: int = 20, metrics_interval: float = METRICS_INTERVAL):
+        self.baseline = CoverageSession.from_schema_path(schema_path, only_leafs=only_leafs, path_filter=path_filter)
+        if queries_path:
+            self.baseline.add_directory(queries_path)
+        self.schema_fields = self.baseline.schema_fields
+        self.baseline_result = self.baseline.result()
+        self.metrics_path = metrics_path
+        self.metrics = None
+        self.metrics_interval = metrics_interval
+        self.metrics_lock = threading.Lock()
+        self._metrics_changed = False
+        self._stopped = threading.Event()
+        self._thread = None
+        if metrics_path:
+            self.metrics = CoverageMetrics(self.schema_fields, max_depth=metrics_depth, top_k=metrics_top_k)
+            self.metrics.add_usage(self.baseline_result.field_usage)
+            self.metrics.write(metrics_path)
+            self._thread = threading.Thread(target=self._run, name="graphql-coverage-metrics", daemon=True)
+            self._thread.start()
+
+    def flush_metrics(self):
+        """Rewrites the metrics file if requests were answered since it was last written."""
+        with self.metrics_lock:
+            if not self._metrics_changed:
+                return
+            self._metrics_changed = False
+            text = self.metrics.render()
+        tmp_path = f"{self.metrics_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(text)
+        os.replace(tmp_path, self.metrics_path)
+
+    def _run(self):
+        while not self._stopped.wait(self.metrics_interval):
+            self.flush_metrics()
+
+    def close(self):
+        """Stops the metrics thread and writes the metrics of every answered request."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+            self.flush_metrics()
+
+    def coverage(self, documents: list = None, paths: list = None) -> dict:
+        """
+        Computes the coverage of the baseline queries plus the given documents.
+
+        Args:
+            documents (list, optional): GraphQL query documents as strings.
+            paths (list, optional): Paths of `.graphql` files, or of directories searched recursively for them.
+
+        Returns:
+            dict: The keys 'coverage', 'baseline_coverage', 'coverage_delta', 'total_fields', 'covered_fields',
+                  'used_fields', 'newly_covered_fields', 'unknown_fields' and 'field_usage' (usage across the given documents).
+
+        Raises:
+            FileNotFoundError: If a path does not exist or a directory contains no query files.
+            graphql.error.GraphQLError: If a document cannot be parsed.
+        """
+        queries = list(documents or [])
+        for path in paths or []:
+            if isdir(path):
+                queries.extend(query_str for _, query_str in iter_queries(path))
+            elif isfile(path):
+                with open(path, 'r') as file:
+                    queries.append(file.read())
+            else:
+                raise FileNotFoundError(f"Query path not found: {path}")
+
+        baseline = self.baseline
+        field_usage = {}
+        for query_str in queries:
+            used = extract_document_fields(query_str, only_leafs=baseline.only_leafs, path_filter=baseline.path_filter)
+            for used_field in used:
+                field_usage[used_field] = field_usage.get(used_field, 0) + 1
+        used_fields = set(field_usage)
+        newly_covered = (used_fields & self.schema_fields) - self.baseline_result.covered_fields
+        total = self.baseline_result.total_fields
+        covered = len(self.baseline_result.covered_fields) + len(newly_covered)
+        coverage = (covered / total) * 100 if total else 0.0
+        if self.metrics is not None:
+            with self.metrics_lock:
+                self.metrics.add_usage(field_usage)
+                self._metrics_changed = True
+        return {
+            'coverage': coverage,
+            'baseline_coverage': self.baseline_result.coverage,
+            'coverage_delta': coverage - self.baseline_result.coverage,
+            'total_fields': total,
+            'covered_fields': covered,
+            'used_fields': sorted(used_fields),
+            'newly_covered_fields': sorted(newly_covered),
+            'unknown_fields': sorted(used_fields - self.schema_fields),
+            'field_usage': field_usage,
+        }
+
+class CoverageRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the coverage server:
+
+    - GET /health: {"status": "ok", "total_fields": ...}
+    - GET /fields: {"schema_fields": [...], "uncovered_fields": [...]} for the baseline.
+    - POST /coverage with {"documents": [...], "paths": [...]}: the result of `CoverageState.coverage`.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "total_fields": len(state.schema_fields)})
+        elif self.path == "/fields":
+            self._send_json(200, {"schema_fields": sorted(state.schema_fields),
+                                  "uncovered_fields": sorted(state.baseline_result.uncovered_fields)})
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/coverage":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("The request body must be a JSON object.")
+            self._send_json(200, self.server.state.coverage(documents=request.get("documents"), paths=request.get("paths")))
+        except (ValueError, FileNotFoundError, GraphQLError) as e:
+            self._send_json(400, {"error": str(e)})
+
+    def address_string(self):
+        return str(self.client_address or "unix")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class _PooledServerMixIn:
+    """Hands each accepted connection to a bounded thread pool instead of starting a thread per request."""
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request_in_pool, request, client_address)
+
+    def _process_request_in_pool(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+class PooledHTTPServer(_PooledServerMixIn, HTTPServer):
+    pass
+
+class PooledUnixHTTPServer(_PooledServerMixIn, socketserver.UnixStreamServer):
+    pass
+
+def create_coverage_server(state: CoverageState, host: str = HOST, port: int = PORT, socket_path: str = None,
+                           workers: int = None, verbose: bool = False):
+    """
+    Creates (but does not start) a coverage server bound to a TCP port or a Unix socket.
+
+    Args:
+        state (CoverageState): The preloaded schema index and baseline usage.
+        host (str): Host to bind to when serving over TCP.
+        port (int): Port to bind to when serving over TCP. 0 picks a free port.
+        socket_path (str, optional): If set, serve on this Unix socket instead of TCP.
+        workers (int, optional): Size of the request worker pool. Defaults to the executor's default.
+        verbose (bool): If True, logs every request.
+
+    Returns:
+        The server. Call `serve_forever()` to start it and `server_close()` to release it.
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = PooledUnixHTTPServer(socket_path, CoverageRequestHandler)
+    else:
+        server = PooledHTTPServer((host, port), CoverageRequestHandler)
+    server.state = state
+    server.verbose = verbose
+    server.pool = ThreadPoolExecutor(max_workers=workers)
+    return server
+
+def serve_coverage(schema_path: str, queries_path: str = None, only_leafs: bool = False, path_filter: PathFilter = None,
+                   host: str = HOST, port: int = PORT, socket_path: str = None, workers: int = None,
+                   metrics_path: str = None, metrics_depth: int = 2, metrics_top_k: int = 20,
+                   metrics_interval: float = METRICS_INTERVAL):
+    """
+    Loads and indexes the schema once, then answers coverage requests until interrupted.
+
+    Args:
+        schema_path (str): The file path to the GraphQL schema.
+        queries_path (str, optional): Directory with the baseline queries that deltas are reported against.
+        only_leafs (bool): If True, only leaf fields are considered.
+        path_filter (PathFilter, optional): Include/exclude rules applied during traversal.
+        host (str): Host to bind to when serving over TCP.
+        port (int): Port to bind to when serving over TCP.
+        socket_path (str, optional): If set, serve on this Unix socket instead of TCP.
+        workers (int, optional): Size of the request worker pool.
+        metrics_path (str, optional): If set, OpenMetrics text file kept up to date with the usage seen by the server.
+        metrics_depth (int): Deepest path prefix level reported in the metrics.
+        metrics_top_k (int): Number of most used fields reported in the metrics.
+        metrics_interval (float): Seconds between rewrites of the metrics file.
+    """
+    state = CoverageState(schema_path, queries_path=queries_path, only_leafs=only_leafs, path_filter=path_filter,
+                          metrics_path=metrics_path, metrics_depth=metrics_depth, metrics_top_k=metrics_top_k,
+                          metrics_interval=metrics_interval)
+    server = create_coverage_server(state, host=host, port=port, socket_path=socket_path, workers=workers, verbose=True)
+    print(f"Serving coverage for {len(state.schema_fields)} schema fields on {socket_path or f'http://{host}:{server.server_port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        state.close()
+
+
+if __name__ == "__main__":
+  def test_coverage_server_happy_path():
+      """
+      Tests that the server answers coverage requests from the preloaded schema, including concurrent ones.
+      """
+      import tempfile
+      import urllib.error
+      import urllib.request
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          schema_path = os.path.join(tmp_dir, "schema.graphql")
+          queries_path = os.path.join(tmp_dir, "queries")
+          os.makedirs(queries_path)
+          with open(schema_path, "w") as file:
+              file.write("type Query { book: Book }\ntype Book { title: String isbn: String author: String }")
+          with open(os.path.join(queries_path, "a.graphql"), "w") as file:
+              file.write("query { book { title } }")
+
+          metrics_path = os.path.join(tmp_dir, "coverage.prom")
+          state = CoverageState(schema_path, queries_path=queries_path, only_leafs=True, metrics_path=metrics_path,
+                                metrics_interval=3600)
+          server = create_coverage_server(state, port=0, workers=4)
+          thread = threading.Thread(target=server.serve_forever, daemon=True)
+          thread.start()
+          url = f"http://127.0.0.1:{server.server_port}"
+          try:
+              def post(body):
+                  request = urllib.request.Request(f"{url}/coverage", data=json.dumps(body).encode(), method="POST")
+                  with urllib.request.urlopen(request) as response:
+                      return json.loads(response.read())
+
+              result = post({"documents": ["query { book { isbn } }"]})
+              assert result["newly_covered_fields"] == ["book.isbn"], f"Unexpected delta: {result}"
+              assert round(result["baseline_coverage"]) == 33 and round(result["coverage"]) == 67, f"Unexpected coverage: {result}"
+
+              with ThreadPoolExecutor(max_workers=8) as executor:
+                  results = list(executor.map(lambda _: post({"paths": [queries_path]}), range(16)))
+              assert all(r["coverage_delta"] == 0 for r in results), "Concurrent requests returned wrong deltas."
+
+              # A JSON body that is not an object is rejected
+              try:
+                  post([])
+                  assert False, "Expected a 400 response for a JSON array body."
+              except urllib.error.HTTPError as e:
+                  assert e.code == 400, f"Unexpected status: {e.code}"
+
+              # The metrics count the baseline plus every requested document once they are flushed
+              with open(metrics_path) as file:
+                  assert 'field="book.title"} 1\n' in file.read(), "The metrics were rewritten before the interval elapsed."
+              state.close()
+              with open(metrics_path) as file:
+                  metrics = file.read()
+              assert 'graphql_coverage_field_usage{field="book.title"} 17\n' in metrics, metrics
+              assert "graphql_coverage_covered_fields 2\n" in metrics and metrics.endswith("# EOF\n")
+
+              with urllib.request.urlopen(f"{url}/health") as response:
+                  assert json.loads(response.read())["total_fields"] == 3
+          finally:
+              server.shutdown()
+              server.server_close()
+
+      print("Test passed: Coverage server answered sequential and concurrent requests.")
+
+  test_coverage_server_happy_path()
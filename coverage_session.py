@@ -0,0 +1,200 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import FrozenSet, Mapping, Optional, Set
+from graphql import DocumentNode, parse
+from coverage_cache import build_schema_snapshot, snapshot_fields
+from load_queries import iter_queries
+from load_schema import load_schema
+from parse_queries_and_extract_fields import extract_document_fields
+from path_filter import PathFilter
+
+@dataclass(frozen=True)
+class CoverageResult:
+    """
+    An immutable view of the coverage of a `CoverageSession` at one point in time.
+
+    Attributes:
+        coverage (float): Coverage percentage.
+        total_fields (int): Number of schema fields.
+        covered_fields (FrozenSet[str]): Schema fields used by at least one document.
+        used_fields (FrozenSet[str]): All fields used by the documents, including ones unknown to the schema.
+        field_usage (Mapping[str, int]): Number of documents each used field appears in.
+    """
+    coverage: float
+    total_fields: int
+    covered_fields: FrozenSet[str]
+    used_fields: FrozenSet[str]
+    field_usage: Mapping[str, int]
+    _schema_fields: FrozenSet[str] = field(repr=False, compare=False)
+
+    @property
+    def uncovered_fields(self) -> FrozenSet[str]:
+        """Schema fields not used by any document."""
+        return self._schema_fields - self.covered_fields
+
+    @property
+    def unknown_fields(self) -> FrozenSet[str]:
+        """Used fields that are not defined in the schema."""
+        return self.used_fields - self._schema_fields
+
+class CoverageSession:
+    """
+    Owns a parsed and enumerated schema and accumulates query documents against it.
+
+    The schema is parsed and enumerated once; documents are added incrementally and results are produced on
+    demand. A result is cached until the next document is added, so repeated queries are free.
+
+    Example:
+        session = CoverageSession.from_schema_path("schema.graphql", only_leafs=True)
+        session.add_file("queries/launches.graphql")
+        print(session.result().coverage)
+    """
+
+    def __init__(self, schema: DocumentNode, only_leafs: bool = False, path_filter: Optional[PathFilter] = None):
+        """
+        Args:
+            schema (DocumentNode): A parsed GraphQL schema represented as a DocumentNode.
+            only_leafs (bool): If True, only leaf fields are considered.
+            path_filter (Optional[PathFilter]): Include/exclude rules applied to the schema and to every document.
+        """
+        self.only_leafs = only_leafs
+        self.path_filter = path_filter
+        self.schema_fields: FrozenSet[str] = frozenset(
+            snapshot_fields(build_schema_snapshot(schema, path_filter=path_filter), only_leafs=only_leafs))
+        self.reset()
+
+    @classmethod
+    def from_schema_path(cls, schema_path: str, only_leafs: bool = False,
+                         path_filter: Optional[PathFilter] = None) -> "CoverageSession":
+        """Creates a session from a GraphQL schema file."""
+        return cls(load_schema(schema_path), only_leafs=only_leafs, path_filter=path_filter)
+
+    def reset(self):
+        """Forgets every added document but keeps the schema index."""
+        self._field_usage = {}
+        self._covered = set()
+        self._result = None
+
+    def copy(self) -> "CoverageSession":
+        """Returns a session sharing this session's schema index, with a copy of its documents' usage."""
+        session = object.__new__(CoverageSession)
+        session.only_leafs = self.only_leafs
+        session.path_filter = self.path_filter
+        session.schema_fields = self.schema_fields
+        session._field_usage = dict(self._field_usage)
+        session._covered = set(self._covered)
+        session._result = self._result
+        return session
+
+    def add_fields(self, used_fields: Set[str]):
+        """
+        Records the fields used by one document.
+
+        Args:
+            used_fields (Set[str]): The unique hierarchical fields used by the document.
+        """
+        field_usage = self._field_usage
+        for used_field in used_fields:
+            field_usage[used_field] = field_usage.get(used_field, 0) + 1
+        self._covered.update(used_fields & self.schema_fields)
+        self._result = None
+
+    def add_document(self, document: str) -> Set[str]:
+        """
+        Parses a GraphQL query document and adds its fields.
+
+        Args:
+            document (str): A GraphQL query document.
+
+        Returns:
+            Set[str]: The hierarchical fields used by the document.
+
+        Raises:
+            graphql.error.GraphQLError: If the document cannot be parsed.
+        """
+        used_fields = extract_document_fields(document, only_leafs=self.only_leafs, path_filter=self.path_filter)
+        self.add_fields(used_fields)
+        return used_fields
+
+    def add_file(self, path: str) -> Set[str]:
+        """
+        Reads a GraphQL query file and adds its fields.
+
+        Args:
+            path (str): Path of the `.graphql` file.
+
+        Returns:
+            Set[str]: The hierarchical fields used by the file.
+        """
+        with open(path, 'r') as file:
+            return self.add_document(file.read())
+
+    def add_directory(self, queries_path: str):
+        """
+        Adds every GraphQL query file found recursively in a directory. Files that fail to parse are reported and skipped.
+
+        Args:
+            queries_path (str): The path to the directory containing GraphQL query files.
+        """
+        for file_path, query_str in iter_queries(queries_path):
+            try:
+                self.add_document(query_str)
+            except Exception as e:
+                print(f"Error parsing {file_path}: {e}")
+
+    def result(self) -> CoverageResult:
+        """
+        Returns the coverage of all documents added so far.
+
+        Returns:
+            CoverageResult: An immutable result; it is unaffected by documents added later.
+        """
+        if self._result is None:
+            total = len(self.schema_fields)
+            self._result = CoverageResult(
+                coverage=(len(self._covered) / total) * 100 if total else 0.0,
+                total_fields=total,
+                covered_fields=frozenset(self._covered),
+                used_fields=frozenset(self._field_usage),
+                field_usage=MappingProxyType(dict(self._field_usage)),
+                _schema_fields=self.schema_fields,
+            )
+        return self._result
+
+
+if __name__ == "__main__":
+  def test_coverage_session_happy_path():
+      """
+      Tests that documents are accumulated incrementally and that results are immutable snapshots.
+      """
+      session = CoverageSession(parse("""
+      type Query {
+          book: Book
+      }
+
+      type Book {
+          title: String
+          isbn: String
+      }
+      """), only_leafs=True)
+
+      assert session.result().coverage == 0.0, "An empty session must have no coverage."
+      assert session.add_document("query { book { title } }") == {"book.title"}
+      first = session.result()
+      assert first is session.result(), "Results must be cached until a document is added."
+      assert first.coverage == 50.0 and first.uncovered_fields == {"book.isbn"}
+
+      session.add_document("query { book { title isbn unknown } }")
+      second = session.result()
+      assert first.coverage == 50.0, "Earlier results must not change when documents are added."
+      assert second.coverage == 100.0 and second.uncovered_fields == frozenset()
+      assert second.field_usage == {"book.title": 2, "book.isbn": 1, "book.unknown": 1}
+      assert second.unknown_fields == {"book.unknown"}
+
+      forked = session.copy()
+      session.reset()
+      assert session.result().coverage == 0.0 and forked.result().coverage == 100.0, "Copies must be independent."
+
+      print("Test passed: Coverage session accumulates documents and returns immutable results.")
+
+  test_coverage_session_happy_path()
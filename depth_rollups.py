@@ -0,0 +1,143 @@
+import json
+import os
+
+ROLLUP_COLUMNS = ("prefix", "depth", "parent", "is_field", "usage_count", "covered",
+                  "subtree_fields", "subtree_covered", "subtree_usage")
+
+def compute_depth_rollups(schema_fields: set, field_usage: dict, uncovered_fields: set) -> dict:
+    """
+    Computes coverage and usage rollups for every depth level at once.
+
+    Each field is visited once and its counts are added to every prefix of its path, which yields a prefix
+    tree with one row per distinct prefix. The tree is returned in a columnar layout (one list per column,
+    all of the same length) so that any depth, or any subtree, can be read without recomputation.
+
+    Args:
+        schema_fields (set): Set of all schema fields.
+        field_usage (dict): Dictionary mapping field names to their usage counts.
+        uncovered_fields (set): Set of schema fields not covered by any queries.
+
+    Returns:
+        dict: Maps each name in `ROLLUP_COLUMNS` to a list of values, one per prefix row:
+            - prefix: The dotted path prefix.
+            - depth: Number of path segments of the prefix (1 for top-level fields).
+            - parent: Row index of the parent prefix, -1 for top-level prefixes.
+            - is_field: Whether the prefix is itself a schema field (always true unless only leafs are reported).
+            - usage_count / covered: The prefix's own usage count and coverage, when it is a schema field.
+            - subtree_fields / subtree_covered / subtree_usage: Totals over the prefix and all fields below it.
+    """
+    columns = {name: [] for name in ROLLUP_COLUMNS}
+    prefix_col, depth_col, parent_col = columns["prefix"], columns["depth"], columns["parent"]
+    is_field_col, usage_col, covered_col = columns["is_field"], columns["usage_count"], columns["covered"]
+    fields_col, sub_covered_col, sub_usage_col = columns["subtree_fields"], columns["subtree_covered"], columns["subtree_usage"]
+    rows = {}
+
+    def row_of(prefix: str, depth: int, parent: int) -> int:
+        row = rows.get(prefix)
+        if row is None:
+            row = rows[prefix] = len(prefix_col)
+            prefix_col.append(prefix)
+            depth_col.append(depth)
+            parent_col.append(parent)
+            is_field_col.append(False)
+            usage_col.append(0)
+            covered_col.append(False)
+            fields_col.append(0)
+            sub_covered_col.append(0)
+            sub_usage_col.append(0)
+        return row
+
+    for field in sorted(schema_fields):
+        usage = field_usage.get(field, 0)
+        covered = field not in uncovered_fields
+        parent = -1
+        depth = 1
+        idx = field.find('.')
+        while True:
+            row = row_of(field if idx == -1 else field[:idx], depth, parent)
+            fields_col[row] += 1
+            sub_covered_col[row] += covered
+            sub_usage_col[row] += usage
+            if idx == -1:
+                break
+            parent = row
+            depth += 1
+            idx = field.find('.', idx + 1)
+        is_field_col[row] = True
+        usage_col[row] = usage
+        covered_col[row] = covered
+
+    return columns
+
+def rollup_at_depth(rollups: dict, depth: int) -> list:
+    """
+    Reads the usage aggregated at one depth out of precomputed rollups.
+
+    Fields deeper than `depth` are summed into their prefix of that depth, while fields at a shallower
+    depth keep their own usage, which matches aggregating each field name by its first `depth` segments.
+
+    Args:
+        rollups (dict): Rollups returned by `compute_depth_rollups`.
+        depth (int): The depth level. Values <= 0 disable aggregation.
+
+    Returns:
+        list: A list of (aggregated field, usage count) tuples.
+    """
+    aggregated = []
+    for prefix, row_depth, is_field, usage, subtree_usage in zip(
+            rollups["prefix"], rollups["depth"], rollups["is_field"], rollups["usage_count"], rollups["subtree_usage"]):
+        if depth <= 0 or row_depth > depth:
+            if is_field and depth <= 0:
+                aggregated.append((prefix, usage))
+        elif row_depth == depth:
+            aggregated.append((prefix, subtree_usage))
+        elif is_field:
+            aggregated.append((prefix, usage))
+    return aggregated
+
+def save_depth_rollups(rollups: dict, rollup_path: str):
+    """
+    Writes precomputed rollups to a single columnar JSON file.
+
+    Args:
+        rollups (dict): Rollups returned by `compute_depth_rollups`.
+        rollup_path (str): Path of the JSON file to write.
+    """
+    tmp_path = f"{rollup_path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump({"columns": list(ROLLUP_COLUMNS), "rows": len(rollups["prefix"]), "data": rollups}, file)
+    os.replace(tmp_path, rollup_path)
+
+
+if __name__ == "__main__":
+  def test_compute_depth_rollups_happy_path():
+      """
+      Tests that one rollup pass answers every depth like a per-depth aggregation would.
+      """
+      schema_fields = {"user", "user.id", "user.address", "user.address.city", "post", "post.title"}
+      field_usage = {"user": 3, "user.id": 2, "user.address": 1, "user.address.city": 1, "post.title": 4}
+      uncovered_fields = {"post"}
+
+      rollups = compute_depth_rollups(schema_fields, field_usage, uncovered_fields)
+      assert len({len(column) for column in rollups.values()}) == 1, "Columns must have the same length."
+
+      def aggregate_by_name(depth):
+          totals = {}
+          for field in schema_fields:
+              parts = field.split('.')
+              key = field if depth <= 0 or depth > len(parts) else '.'.join(parts[:depth])
+              totals[key] = totals.get(key, 0) + field_usage.get(field, 0)
+          return totals
+
+      for depth in range(0, 5):
+          assert dict(rollup_at_depth(rollups, depth)) == aggregate_by_name(depth), f"Rollup mismatch at depth {depth}"
+
+      row = rollups["prefix"].index("user")
+      assert rollups["subtree_fields"][row] == 4 and rollups["subtree_covered"][row] == 4
+      row = rollups["prefix"].index("post")
+      assert rollups["subtree_fields"][row] == 2 and rollups["subtree_covered"][row] == 1
+      assert rollups["parent"][rollups["prefix"].index("user.address.city")] == rollups["prefix"].index("user.address")
+
+      print("Test passed: Depth rollups match per-depth aggregation at every level.")
+
+  test_compute_depth_rollups_happy_path()
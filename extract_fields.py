@@ -1,85 +1,231 @@
+import re
 from graphql.language.ast import (
     OperationDefinitionNode,
     FieldNode,
     FragmentDefinitionNode,
     FragmentSpreadNode,
     InlineFragmentNode,
+    VariableNode,
 )
-from typing import Set, Dict
+from graphql.error import GraphQLError
+from graphql.utilities import value_from_ast_untyped
+from typing import Set, Dict, List, Optional, Tuple
+from path_filter import PathFilter
 
+# Variables deciding a `@skip(if: $x)` or `@include(if: $x)` directive; matches in comments only add unused names
+DIRECTIVE_VARIABLE_RE = re.compile(r"@(?:skip|include)\s*\(\s*if\s*:\s*\$(\w+)")
 
-def extract_fields(
+
+class OperationVisitor:
+    """
+    An analysis plugin for `walk_operation`. Several visitors share one traversal of each operation.
+
+    Subclasses override the hooks they need; `result` returns the visitor's per-operation metrics.
+    """
+
+    def enter_operation(self, node: OperationDefinitionNode):
+        """Called once per operation, before any of its fields, e.g. to read its variable definitions."""
+
+    def enter_field(self, field: FieldNode, path: str, depth: int, has_subfields: bool):
+        """Called for every field selection, before its sub-selections. `depth` is 1 for root fields."""
+
+    def leave_field(self, field: FieldNode, path: str, depth: int, has_subfields: bool):
+        """Called for every field selection, after its sub-selections."""
+
+    def result(self) -> dict:
+        """Returns the metrics of the walked operation as a mapping from metric name to value."""
+        return {}
+
+
+class FieldPathVisitor(OperationVisitor):
+    """Collects the hierarchical field paths used by an operation."""
+
+    def __init__(self, only_leafs: bool = False, path_filter: Optional[PathFilter] = None, verbose: bool = False):
+        self.only_leafs = only_leafs
+        self.path_filter = path_filter
+        self.verbose = verbose
+        self.fields = set()
+
+    def enter_field(self, field, path, depth, has_subfields):
+        if self.verbose:
+            print(f"Processing Field: {path} (Has subfields: {has_subfields})")
+        # Add field based on only_leafs parameter
+        if not self.only_leafs or (self.only_leafs and not has_subfields):
+            if self.path_filter is None or self.path_filter.is_included(path):
+                self.fields.add(path)
+
+
+def directive_variables(document: str) -> Tuple[str, ...]:
+    """
+    Returns the names of the variables that `@skip`/`@include` directives of a document depend on, without parsing it.
+
+    Args:
+        document (str): A GraphQL document.
+
+    Returns:
+        Tuple[str, ...]: The sorted variable names. Only these variables change which fields are selected.
+    """
+    return tuple(sorted(set(DIRECTIVE_VARIABLE_RE.findall(document))))
+
+
+def is_selected(selection, variables: dict) -> bool:
+    """
+    Applies the `@skip` and `@include` directives of a selection.
+
+    Args:
+        selection: A field, fragment spread or inline fragment node.
+        variables (dict): The request variables, including the operation's default values.
+
+    Returns:
+        bool: False if `@skip(if: ...)` is true or `@include(if: ...)` is not true, True otherwise.
+    """
+    for directive in selection.directives:
+        name = directive.name.value
+        if name != "skip" and name != "include":
+            continue
+        condition = None
+        for argument in directive.arguments:
+            if argument.name.value == "if":
+                value = argument.value
+                condition = variables.get(value.name.value) if isinstance(value, VariableNode) else getattr(value, "value", None)
+        if (condition is True) == (name == "skip"):
+            return False
+    return True
+
+
+def walk_operation(
     node: OperationDefinitionNode,
     fragments: Dict[str, FragmentDefinitionNode],
+    visitors: List[OperationVisitor],
     parent_path: str = "",
-    only_leafs: bool = False,
     verbose: bool = False,
-) -> Set[str]:
+    path_filter: Optional[PathFilter] = None,
+    variables: Optional[dict] = None,
+):
     """
-    Extracts hierarchical fields from a given GraphQL AST node, including nested fields and fragments.
+    Walks the field selections of an operation once, expanding fragments in place, and calls every visitor.
 
     Args:
         node (OperationDefinitionNode): The GraphQL AST node representing the operation (query, mutation, etc.).
         fragments (Dict[str, FragmentDefinitionNode]): A dictionary of fragment definitions.
+        visitors (List[OperationVisitor]): The analysis plugins sharing the traversal.
         parent_path (str): The hierarchical path of the parent field.
-        only_leafs (bool): If True, only includes fields without sub-fields (leaf nodes).
         verbose (bool): If True, prints debug statements.
+        path_filter (Optional[PathFilter]): Include/exclude rules. Excluded selections are skipped without visiting their sub-selections.
+        variables (Optional[dict]): The variables of a request executing the operation. If given, selections removed by
+                                    `@skip`/`@include` are not walked; otherwise every selection is.
 
-    Returns:
-        Set[str]: A set of hierarchical field names extracted from the node.
+    Raises:
+        graphql.error.GraphQLError: If a fragment spreads itself, directly or through other fragments.
     """
-    fields = set()
-
-    def traverse_selection(selection, current_path):
-        if isinstance(selection, FieldNode):
-            field_name = selection.name.value
-            hierarchical_field = f"{current_path}.{field_name}" if current_path else field_name
-            has_subfields = selection.selection_set is not None
-
-            if verbose:
-                print(f"Processing Field: {hierarchical_field} (Has subfields: {has_subfields})")
-
-            # Add field based on only_leafs parameter
-            if not only_leafs or (only_leafs and not has_subfields):
-                fields.add(hierarchical_field)
-
-            # Recursively process subfields
-            if has_subfields:
-                for sub_selection in selection.selection_set.selections:
-                    traverse_selection(sub_selection, hierarchical_field)
-
-        elif isinstance(selection, FragmentSpreadNode):
-            fragment_name = selection.name.value
-            if verbose:
-                print(f"Processing Fragment Spread: {fragment_name}")
-            fragment = fragments.get(fragment_name)
-            if fragment:
-                for frag_selection in fragment.selection_set.selections:
-                    traverse_selection(frag_selection, current_path)  # Use current_path to maintain hierarchy
-            else:
+    if variables is not None:
+        defaults = {definition.variable.name.value: value_from_ast_untyped(definition.default_value)
+                    for definition in node.variable_definitions or () if definition.default_value is not None}
+        variables = {**defaults, **variables}
+
+    # Pre-resolve which visitors implement each hook, and the selections of every fragment
+    entering = [visitor.enter_field for visitor in visitors if type(visitor).enter_field is not OperationVisitor.enter_field]
+    leaving = [visitor.leave_field for visitor in visitors if type(visitor).leave_field is not OperationVisitor.leave_field]
+    fragment_selections = {name: fragment.selection_set.selections for name, fragment in fragments.items()}
+    for visitor in visitors:
+        if type(visitor).enter_operation is not OperationVisitor.enter_operation:
+            visitor.enter_operation(node)
+
+    # Explicit stack with one frame per selection set being walked: (remaining selections, path, depth, field whose
+    # sub-selections these are, fragments being expanded on the way here), so depth is bounded only by memory.
+    # Fragments are walked in frames of their own at the depth and path of the spread.
+    stack = [(iter(node.selection_set.selections), parent_path, 1, None, frozenset())]
+    push = stack.append
+    while stack:
+        selections, current_path, depth, parent_field, active_fragments = stack[-1]
+        for selection in selections:
+            if variables is not None and selection.directives and not is_selected(selection, variables):
+                continue
+            if selection.__class__ is FieldNode or isinstance(selection, FieldNode):
+                field_name = selection.name.value
+                # Introspection meta fields such as `__typename` (added by generated clients) are not schema fields
+                if field_name[0] == "_" and field_name.startswith("__"):
+                    continue
+                hierarchical_field = f"{current_path}.{field_name}" if current_path else field_name
+                has_subfields = selection.selection_set is not None
+
+                if path_filter is not None and not path_filter.should_visit(hierarchical_field):
+                    if verbose:
+                        print(f"Skipping filtered Field: {hierarchical_field}")
+                    continue
+
+                for enter_field in entering:
+                    enter_field(selection, hierarchical_field, depth, has_subfields)
+
+                # Process subfields next; the field is left once its frame is done
+                if has_subfields:
+                    push((iter(selection.selection_set.selections), hierarchical_field, depth + 1, selection, active_fragments))
+                    break
+                for leave_field in leaving:
+                    leave_field(selection, hierarchical_field, depth, False)
+
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment_name = selection.name.value
+                if verbose:
+                    print(f"Processing Fragment Spread: {fragment_name}")
+                fragment = fragment_selections.get(fragment_name)
+                if fragment is not None:
+                    # A cyclic spread would expand forever; such documents are invalid (see the NoFragmentCycles rule)
+                    if fragment_name in active_fragments:
+                        raise GraphQLError(f"Cannot spread fragment '{fragment_name}' within itself.", selection)
+                    push((iter(fragment), current_path, depth, None, active_fragments | {fragment_name}))  # Use current_path to maintain hierarchy
+                    break
                 if verbose:
                     print(f"Fragment '{fragment_name}' not found.")
 
-        elif isinstance(selection, InlineFragmentNode):
-            type_condition = (
-                selection.type_condition.name.value if selection.type_condition else "UnknownType"
-            )
-            if verbose:
-                print(f"Processing Inline Fragment on {type_condition}")
-            for inline_selection in selection.selection_set.selections:
-                traverse_selection(inline_selection, current_path)  # Use current_path to maintain hierarchy
+            elif isinstance(selection, InlineFragmentNode):
+                type_condition = (
+                    selection.type_condition.name.value if selection.type_condition else "UnknownType"
+                )
+                if verbose:
+                    print(f"Processing Inline Fragment on {type_condition}")
+                # Use current_path to maintain hierarchy
+                push((iter(selection.selection_set.selections), current_path, depth, None, active_fragments))
+                break
 
+            else:
+                if verbose:
+                    print(f"Unknown selection type: {type(selection)}")
         else:
-            if verbose:
-                print(f"Unknown selection type: {type(selection)}")
+            stack.pop()
+            if parent_field is not None:
+                for leave_field in leaving:
+                    leave_field(parent_field, current_path, depth - 1, True)
 
-    for selection in node.selection_set.selections:
-        traverse_selection(selection, parent_path)
 
-    return fields
+def extract_fields(
+    node: OperationDefinitionNode,
+    fragments: Dict[str, FragmentDefinitionNode],
+    parent_path: str = "",
+    only_leafs: bool = False,
+    verbose: bool = False,
+    path_filter: Optional[PathFilter] = None,
+) -> Set[str]:
+    """
+    Extracts hierarchical fields from a given GraphQL AST node, including nested fields and fragments.
+
+    Args:
+        node (OperationDefinitionNode): The GraphQL AST node representing the operation (query, mutation, etc.).
+        fragments (Dict[str, FragmentDefinitionNode]): A dictionary of fragment definitions.
+        parent_path (str): The hierarchical path of the parent field.
+        only_leafs (bool): If True, only includes fields without sub-fields (leaf nodes).
+        verbose (bool): If True, prints debug statements.
+        path_filter (Optional[PathFilter]): Include/exclude rules. Excluded selections are skipped without visiting their sub-selections.
 
+    Returns:
+        Set[str]: A set of hierarchical field names extracted from the node.
+    """
+    field_paths = FieldPathVisitor(only_leafs=only_leafs, path_filter=path_filter, verbose=verbose)
+    walk_operation(node, fragments, [field_paths], parent_path=parent_path, verbose=verbose, path_filter=path_filter)
+    return field_paths.fields
 
-from graphql import parse, DocumentNode
+
+from graphql import parse, print_ast, DocumentNode
 from collections import defaultdict
 
 
@@ -113,6 +259,7 @@ if __name__ == "__main__":
       query_str_all_fields = """
       query {
           book {
+              __typename
               title
               author {
                   name
@@ -204,5 +351,109 @@ if __name__ == "__main__":
 
       print("Test passed: Both all fields and leaf-only fields were extracted correctly.")
 
+  def test_extract_fields_with_path_filter():
+      """
+      Tests that excluded selections are skipped together with their sub-selections.
+      """
+      query = parse("""
+      query {
+          book {
+              title
+              author {
+                  name
+              }
+          }
+      }
+      """)
+      operation = query.definitions[0]
+
+      fields = extract_fields(operation, {}, path_filter=PathFilter(exclude=["*.author"]))
+      assert fields == {"book", "book.title"}, f"Unexpected fields with exclusion: {fields}"
+
+      fields = extract_fields(operation, {}, path_filter=PathFilter(include=["book.author"]))
+      assert fields == {"book.author", "book.author.name"}, f"Unexpected fields with inclusion: {fields}"
+
+      print("Test passed: Path filter was applied while extracting fields.")
+
+  def test_extract_fields_deep_nesting():
+      """
+      Tests that operations nested far deeper than Python's recursion limit are walked.
+      """
+      import sys
+      from graphql.language.ast import NameNode, OperationType, SelectionSetNode
+
+      depth = sys.getrecursionlimit() * 3
+      selection_set = SelectionSetNode(selections=(FieldNode(name=NameNode(value="leaf")),))
+      for _ in range(depth):
+          selection_set = SelectionSetNode(selections=(FieldNode(name=NameNode(value="node"), selection_set=selection_set),))
+      operation = OperationDefinitionNode(operation=OperationType.QUERY, selection_set=selection_set)
+
+      fields = extract_fields(operation, {}, only_leafs=True)
+      assert fields == {".".join(["node"] * depth + ["leaf"])}, "The deepest leaf must be extracted."
+
+      print("Test passed: Deeply nested selections were walked without recursion.")
+
+  def test_walk_operation_with_directives():
+      """
+      Tests that @skip/@include are applied from request variables and defaults only when variables are given.
+      """
+      document = parse("""
+      query Book($withAuthor: Boolean = true, $brief: Boolean!) {
+          book {
+              title
+              isbn @skip(if: $brief)
+              author @include(if: $withAuthor) { name }
+              ... on Book @include(if: false) { price }
+              ...Reviews @skip(if: true)
+          }
+      }
+      fragment Reviews on Book { reviews { body } }
+      """)
+      operation, fragments = document.definitions[0], {"Reviews": document.definitions[1]}
+      assert directive_variables(print_ast(document)) == ("brief", "withAuthor")
+
+      def fields(variables):
+          field_paths = FieldPathVisitor(only_leafs=True)
+          walk_operation(operation, fragments, [field_paths], variables=variables)
+          return field_paths.fields
+
+      assert fields(None) == {"book.title", "book.isbn", "book.author.name", "book.price", "book.reviews.body"}
+      assert fields({"brief": True}) == {"book.title", "book.author.name"}, "Defaults must apply to missing variables."
+      assert fields({"brief": False, "withAuthor": False}) == {"book.title", "book.isbn"}
+
+      print("Test passed: @skip/@include were evaluated with the request variables.")
+
+  def test_walk_operation_fragment_cycle():
+      """
+      Tests that cyclic fragments raise a GraphQLError instead of being expanded forever, while a fragment spread
+      several times outside a cycle is expanded each time.
+      """
+      document = parse("""
+      query { book { ...A } }
+      fragment A on Book { title ...B }
+      fragment B on Book { author { name } ...A }
+      """)
+      operation = document.definitions[0]
+      fragments = {definition.name.value: definition for definition in document.definitions[1:]}
+      try:
+          extract_fields(operation, fragments)
+      except GraphQLError as e:
+          assert "'A'" in e.message, f"Unexpected error: {e}"
+      else:
+          raise AssertionError("A fragment cycle must raise a GraphQLError.")
+
+      document = parse("""
+      query { book { ...Name author { ...Name } } }
+      fragment Name on Book { name }
+      """)
+      fields = extract_fields(document.definitions[0], {"Name": document.definitions[1]}, only_leafs=True)
+      assert fields == {"book.name", "book.author.name"}, f"Unexpected fields: {fields}"
+
+      print("Test passed: Fragment cycles were rejected.")
+
   # Run the test
-  test_extract_fields_hierarchical()
\ No newline at end of file
+  test_extract_fields_hierarchical()
+  test_extract_fields_with_path_filter()
+  test_extract_fields_deep_nesting()
+  test_walk_operation_with_directives()
+  test_walk_operation_fragment_cycle()
@@ -0,0 +1,148 @@
+import json
+import os
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>GraphQL Schema Coverage</title>
+<style>
+  body { font-family: sans-serif; margin: 2em; }
+  ul { list-style: none; padding-left: 1.5em; margin: 0; }
+  li > div { display: flex; align-items: center; gap: 0.75em; padding: 2px 0; cursor: default; }
+  .toggle { width: 1em; cursor: pointer; color: #555; }
+  .name { min-width: 18em; }
+  .bar { width: 10em; height: 0.8em; background: #e74c3c; }
+  .bar > span { display: block; height: 100%; background: #27ae60; }
+  .stats { color: #555; font-size: 0.9em; }
+  .more { color: #2a6ebb; cursor: pointer; }
+</style>
+</head>
+<body>
+<h1>GraphQL Schema Coverage: __COVERAGE__%</h1>
+<p class="stats">__SUMMARY__ Expand a field to see its sub-fields. Bars show the share of covered fields in each subtree.</p>
+<ul id="root"></ul>
+<script>
+const D = __DATA__;
+const PAGE = 200;
+const n = D.name.length;
+const children = Array.from({length: n}, () => []);
+const roots = [];
+for (let i = 0; i < n; i++) (D.parent[i] < 0 ? roots : children[D.parent[i]]).push(i);
+const byUsage = (a, b) => D.subtree_usage[b] - D.subtree_usage[a] || D.name[a].localeCompare(D.name[b]);
+
+function renderRows(list, ids, start) {
+  const end = Math.min(ids.length, start + PAGE);
+  for (let k = start; k < end; k++) list.appendChild(renderNode(ids[k]));
+  if (end < ids.length) {
+    const more = document.createElement("li");
+    more.className = "more";
+    more.textContent = "Show " + Math.min(PAGE, ids.length - end) + " more of " + (ids.length - end) + " remaining";
+    more.onclick = () => { more.remove(); renderRows(list, ids, end); };
+    list.appendChild(more);
+  }
+}
+
+function renderNode(i) {
+  const li = document.createElement("li");
+  const row = document.createElement("div");
+  const toggle = document.createElement("span");
+  toggle.className = "toggle";
+  toggle.textContent = children[i].length ? "\\u25B8" : "";
+  const name = document.createElement("span");
+  name.className = "name";
+  name.textContent = D.name[i] + (D.is_field[i] && !D.covered[i] ? " (uncovered)" : "");
+  const bar = document.createElement("span");
+  bar.className = "bar";
+  const fill = document.createElement("span");
+  fill.style.width = (100 * D.subtree_covered[i] / D.subtree_fields[i]) + "%";
+  bar.appendChild(fill);
+  const stats = document.createElement("span");
+  stats.className = "stats";
+  stats.textContent = D.subtree_covered[i] + "/" + D.subtree_fields[i] + " covered, usage " + D.subtree_usage[i];
+  row.append(toggle, name, bar, stats);
+  li.appendChild(row);
+  if (children[i].length) {
+    let list = null;
+    toggle.onclick = () => {
+      if (!list) {
+        // Child levels are only rendered when they are first expanded
+        list = document.createElement("ul");
+        renderRows(list, children[i].slice().sort(byUsage), 0);
+        li.appendChild(list);
+      } else {
+        list.hidden = !list.hidden;
+      }
+      toggle.textContent = list.hidden ? "\\u25B8" : "\\u25BE";
+    };
+  }
+  return li;
+}
+
+renderRows(document.getElementById("root"), roots.sort(byUsage), 0);
+</script>
+</body>
+</html>
+"""
+
+def generate_html_report(coverage: float, rollups: dict, html_path: str = "schema_coverage_explorer.html"):
+    """
+    Writes a self-contained interactive HTML coverage explorer.
+
+    The page embeds the pre-aggregated prefix tree from `compute_depth_rollups` (one compact array per column,
+    with only the last path segment of each prefix) and renders a collapsible tree. Only expanded levels are
+    turned into page elements, and long child lists are paged, so the cost of rendering does not grow with the
+    total number of schema fields.
+
+    Args:
+        coverage (float): Overall coverage percentage.
+        rollups (dict): Rollups returned by `compute_depth_rollups`.
+        html_path (str): Path to the HTML file for the coverage explorer.
+    """
+    data = {
+        "name": [prefix.rsplit('.', 1)[-1] for prefix in rollups["prefix"]],
+        "parent": rollups["parent"],
+        "is_field": [int(value) for value in rollups["is_field"]],
+        "covered": [int(value) for value in rollups["covered"]],
+        "subtree_fields": rollups["subtree_fields"],
+        "subtree_covered": rollups["subtree_covered"],
+        "subtree_usage": rollups["subtree_usage"],
+    }
+    total_fields = sum(rollups["is_field"])
+    covered_fields = sum(covered for is_field, covered in zip(rollups["is_field"], rollups["covered"]) if is_field)
+    html = (HTML_TEMPLATE
+            .replace("__COVERAGE__", f"{coverage:.2f}")
+            .replace("__SUMMARY__", f"{covered_fields} of {total_fields} fields covered.")
+            .replace("__DATA__", json.dumps(data, separators=(",", ":")).replace("</", "<\\/")))
+
+    tmp_path = f"{html_path}.tmp"
+    with open(tmp_path, 'w') as file:
+        file.write(html)
+    os.replace(tmp_path, html_path)
+
+
+if __name__ == "__main__":
+  def test_generate_html_report_happy_path():
+      """
+      Tests that the explorer embeds the compact tree data and nothing per field beyond it.
+      """
+      from depth_rollups import compute_depth_rollups
+
+      schema_fields = {"user", "user.id", "user.name", "post", "post.title"}
+      rollups = compute_depth_rollups(schema_fields, {"user": 1, "user.id": 1}, {"user.name", "post", "post.title"})
+
+      html_path = 'temp_schema_coverage_explorer.html'
+      try:
+          generate_html_report(40.0, rollups, html_path)
+          with open(html_path, 'r') as file:
+              html = file.read()
+          assert "GraphQL Schema Coverage: 40.00%" in html, "Coverage header missing."
+          assert "2 of 5 fields covered." in html, "Summary missing."
+          data = json.loads(html.split("const D = ", 1)[1].split(";\n", 1)[0])
+          assert data["name"] == ["post", "title", "user", "id", "name"], f"Unexpected names: {data['name']}"
+          assert data["parent"] == [-1, 0, -1, 2, 2], f"Unexpected parents: {data['parent']}"
+          print("Test passed: HTML explorer embeds the pre-aggregated tree.")
+      finally:
+          os.remove(html_path)
+
+  test_generate_html_report_happy_path()
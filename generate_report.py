@@ -1,7 +1,14 @@
+import os
 from collections import defaultdict
+from depth_rollups import compute_depth_rollups, rollup_at_depth, save_depth_rollups
+from generate_html_report import generate_html_report
 
 def generate_report(coverage: float, field_usage: defaultdict, schema_fields: set, uncovered_fields: set, depth: int = None,
-                    csv_path: str = "schema_coverage_report.csv", plot_path: str = "schema_coverage_chart.png"):
+                    csv_path: str = "schema_coverage_report.csv", plot_path: str = "schema_coverage_chart.png",
+                    rollup_path: str = None, html_path: str = None, operation_metrics: list = None,
+                    operations_csv_path: str = None, subgraph_coverage: list = None, subgraphs_csv_path: str = None,
+                    argument_coverage: list = None, argument_summary: list = None, arguments_csv_path: str = None,
+                    redundant_operations: list = None, redundant_csv_path: str = None):
     """
     Generates a comprehensive coverage report.
 
@@ -13,7 +20,28 @@ def generate_report(coverage: float, field_usage: defaultdict, schema_fields: se
         depth (int, optional): The depth level for aggregating fields in the plot.
                                - depth=1: Top-level fields (e.g., 'launchesUpcoming')
                                - depth=2: Second-level fields (e.g., 'launchesUpcoming.rocket')
-                               - depth=None: No aggregation, plot all fields individually
+                               - depth=None: No aggregation, explore all fields individually in the HTML explorer
+        csv_path (str): Path to the CSV file for the coverage report.
+        plot_path (str): Path to the plot file for the coverage chart.
+        rollup_path (str, optional): If set, coverage and usage rollups for every depth level are written
+                                     to this JSON file (see `compute_depth_rollups`).
+        html_path (str, optional): If set, an interactive HTML coverage explorer is written to this file.
+                                   With depth=None it defaults to `plot_path` with an `.html` extension.
+        operation_metrics (list, optional): Per-operation metrics from `parse_queries_with_metrics`, one dict per operation.
+        operations_csv_path (str, optional): Path to the CSV file for the per-operation metrics.
+                                             Defaults to `csv_path` with an `_operations` suffix.
+        subgraph_coverage (list, optional): Coverage per subgraph of a federated supergraph, from `supergraph.subgraph_coverage`.
+        subgraphs_csv_path (str, optional): Path to the CSV file for the coverage per subgraph.
+                                            Defaults to `csv_path` with a `_subgraphs` suffix.
+        argument_coverage (list, optional): Coverage of every argument, input field and enum value,
+                                            from `ArgumentIndex.report_rows`.
+        argument_summary (list, optional): Coverage per argument category, from `ArgumentIndex.summary`.
+        arguments_csv_path (str, optional): Path to the CSV file for the argument coverage.
+                                            Defaults to `csv_path` with an `_arguments` suffix.
+        redundant_operations (list, optional): Duplicate, subset and near-duplicate operations,
+                                               from `operation_overlap.find_redundant_operations`.
+        redundant_csv_path (str, optional): Path to the CSV file for the redundant operations.
+                                            Defaults to `csv_path` with a `_redundant` suffix.
     """
     import pandas as pd
     import matplotlib.pyplot as plt
@@ -36,18 +64,21 @@ def generate_report(coverage: float, field_usage: defaultdict, schema_fields: se
     print("Detailed Field Usage:")
     print(df.to_string(index=False))
 
-    # Aggregation Function
-    def aggregate_field(field: str, depth: int) -> str:
-        parts = field.split('.')
-        if depth is None or depth <= 0 or depth > len(parts):
-            return field
-        return '.'.join(parts[:depth])
+    # All depth levels are rolled up in a single pass over the fields
+    rollups = compute_depth_rollups(schema_fields, field_usage, uncovered_fields)
+    if rollup_path:
+        save_depth_rollups(rollups, rollup_path)
+
+    # A bar per field does not scale, so the unaggregated view is the interactive explorer instead
+    if depth is None and html_path is None:
+        html_path = os.path.splitext(plot_path)[0] + ".html"
+    if html_path:
+        generate_html_report(coverage, rollups, html_path)
 
     # Prepare Data for Plotting
     if depth is not None:
         # Aggregate fields based on the specified depth
-        df['Aggregated Field'] = df['Field'].apply(lambda x: aggregate_field(x, depth))
-        aggregated_df = df.groupby('Aggregated Field')['Usage Count'].sum().reset_index()
+        aggregated_df = pd.DataFrame(rollup_at_depth(rollups, depth), columns=['Aggregated Field', 'Usage Count'])
         
         # Sort aggregated data
         aggregated_df = aggregated_df.sort_values(by='Usage Count', ascending=False)
@@ -63,27 +94,48 @@ def generate_report(coverage: float, field_usage: defaultdict, schema_fields: se
         plt.savefig(plot_path)
         plt.show()
     else:
-        # Plotting the coverage without aggregation (current implementation)
-        plt.figure(figsize=(12, 8))
+        print(f"Per-field coverage explorer written to {html_path}")
 
-        # Separate covered and uncovered fields
-        covered_df = df[df['Covered'] == True]
-        uncovered_df = df[df['Covered'] == False]
+    # Optionally, save the DataFrame to a CSV for further analysis
+    df.to_csv(csv_path, index=False)
 
-        # Plot covered fields
-        covered_df.plot(kind='bar', x='Field', y='Usage Count', color='green', label='Covered Fields', ax=plt.gca())
+    if operation_metrics:
+        operations_df = pd.DataFrame(operation_metrics)
+        metric_columns = [column for column in operations_df.columns if column not in ('File', 'Operation')]
+        print("\nOperation Metrics (maximum over all operations):")
+        print(operations_df[metric_columns].max().to_string())
+        if operations_csv_path is None:
+            root, extension = os.path.splitext(csv_path)
+            operations_csv_path = f"{root}_operations{extension}"
+        operations_df.to_csv(operations_csv_path, index=False)
 
-        # Plot uncovered fields on the same axis
-        if not uncovered_df.empty:
-            uncovered_df.plot(kind='bar', x='Field', y='Usage Count', color='red', label='Uncovered Fields', ax=plt.gca())
+    if subgraph_coverage:
+        subgraphs_df = pd.DataFrame(subgraph_coverage)
+        print("\nCoverage per Subgraph:")
+        print(subgraphs_df.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+        if subgraphs_csv_path is None:
+            root, extension = os.path.splitext(csv_path)
+            subgraphs_csv_path = f"{root}_subgraphs{extension}"
+        subgraphs_df.to_csv(subgraphs_csv_path, index=False)
 
-        plt.title('GraphQL Schema Field Usage')
-        plt.xlabel('Fields')
-        plt.ylabel('Usage Count')
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(plot_path)
-        plt.show()
+    if argument_summary:
+        print("\nArgument Coverage:")
+        for row in argument_summary:
+            print(f"{row['Category']}: {row['Covered']}/{row['Total']} ({row['Coverage']:.2f}%)")
+    if argument_coverage:
+        arguments_df = pd.DataFrame(argument_coverage)
+        if arguments_csv_path is None:
+            root, extension = os.path.splitext(csv_path)
+            arguments_csv_path = f"{root}_arguments{extension}"
+        arguments_df.to_csv(arguments_csv_path, index=False)
 
-    # Optionally, save the DataFrame to a CSV for further analysis
-    df.to_csv(csv_path, index=False)
+    if redundant_operations is not None:
+        redundant_df = pd.DataFrame(redundant_operations, columns=['File', 'Operation', 'Relation', 'Other File',
+                                                                   'Other Operation', 'Fields', 'Other Fields', 'Jaccard'])
+        print("\nRedundant Operations:")
+        for relation in ('duplicate', 'subset', 'near-duplicate'):
+            print(f"{relation}: {(redundant_df['Relation'] == relation).sum()}")
+        if redundant_csv_path is None:
+            root, extension = os.path.splitext(csv_path)
+            redundant_csv_path = f"{root}_redundant{extension}"
+        redundant_df.to_csv(redundant_csv_path, index=False)
@@ -1,4 +1,6 @@
 from graphql.language.ast import (
+    EnumTypeDefinitionNode,
+    InputObjectTypeDefinitionNode,
     ObjectTypeDefinitionNode,
     SchemaDefinitionNode,
     FieldDefinitionNode,
@@ -6,15 +8,284 @@ from graphql.language.ast import (
     ListTypeNode,
     NonNullTypeNode,
 )
-from typing import Set, Optional
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Set, Optional, Dict, List, Tuple
 from extract_root_types import extract_root_types
+from path_filter import PathFilter
 from graphql import parse, DocumentNode
 
+# Schemas with fewer field definitions are enumerated in-process, where a pool would cost more than it saves
+PARALLEL_MIN_FIELDS = 2000
+# A task hands the frames it has not expanded yet back to the pool once it has emitted this many paths
+TASK_PATH_BUDGET = 20000
+
+def get_named_type(node) -> Optional[str]:
+    """
+    Unwraps list and non-null wrappers and returns the underlying named type.
+
+    Args:
+        node: A GraphQL type node (NamedTypeNode, ListTypeNode or NonNullTypeNode).
+
+    Returns:
+        Optional[str]: The name of the underlying type, or None for unknown nodes.
+    """
+    if isinstance(node, NonNullTypeNode) or isinstance(node, ListTypeNode):
+        return get_named_type(node.type)
+    elif isinstance(node, NamedTypeNode):
+        return node.name.value
+    return None
+
+
+def get_type_fields(schema: DocumentNode) -> Dict[str, Dict[str, str]]:
+    """
+    Builds a lookup of every object type to its fields and their named (unwrapped) types.
+
+    Args:
+        schema (DocumentNode): A parsed GraphQL schema represented as a DocumentNode.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Maps each object type name to an ordered dictionary of field name -> named type.
+    """
+    return {
+        d.name.value: {field.name.value: get_named_type(field.type) for field in d.fields}
+        for d in schema.definitions
+        if isinstance(d, ObjectTypeDefinitionNode)
+    }
+
+
+def get_argument_tables(schema: DocumentNode) -> Dict[str, dict]:
+    """
+    Builds the lookups needed for argument, input field and enum value coverage.
+
+    Args:
+        schema (DocumentNode): A parsed GraphQL schema represented as a DocumentNode.
+
+    Returns:
+        Dict[str, dict]: A dictionary with the keys:
+            - 'field_arguments': Object type name -> {field name: {argument name: named type}}, for fields with arguments.
+            - 'input_fields': Input object type name -> {field name: named type}.
+            - 'enum_values': Enum type name -> list of value names.
+    """
+    field_arguments, input_fields, enum_values = {}, {}, {}
+    for d in schema.definitions:
+        if isinstance(d, ObjectTypeDefinitionNode):
+            arguments = {
+                field.name.value: {argument.name.value: get_named_type(argument.type) for argument in field.arguments}
+                for field in d.fields if field.arguments
+            }
+            if arguments:
+                field_arguments[d.name.value] = arguments
+        elif isinstance(d, InputObjectTypeDefinitionNode):
+            input_fields[d.name.value] = {field.name.value: get_named_type(field.type) for field in d.fields or ()}
+        elif isinstance(d, EnumTypeDefinitionNode):
+            enum_values[d.name.value] = [value.name.value for value in d.values or ()]
+    return {'field_arguments': field_arguments, 'input_fields': input_fields, 'enum_values': enum_values}
+
+
+def enumerate_schema_paths(
+    type_fields: Dict[str, Dict[str, str]],
+    type_name: str,
+    current_path: str = "",
+    visited: Optional[Set[str]] = None,
+    path_filter: Optional[PathFilter] = None,
+) -> List[Tuple[str, str, str, str, bool]]:
+    """
+    Enumerates every hierarchical field path reachable below a type.
+
+    A type that already appears among the ancestors of a path is not expanded again, so recursive
+    types terminate. Root types are enumerated with `visited=None`, which mirrors how
+    `get_schema_fields` treats the root Query and Mutation types.
+
+    Args:
+        type_fields (Dict[str, Dict[str, str]]): Lookup built by `get_type_fields`.
+        type_name (str): The type whose fields are enumerated.
+        current_path (str): The hierarchical path at which `type_name` is located ("" for a root type).
+        visited (Optional[Set[str]]): Types of the ancestors of `current_path`, including `type_name` itself.
+                                      None for a root type.
+        path_filter (Optional[PathFilter]): Include/exclude rules. Paths it prunes are neither returned nor expanded,
+                                            but paths that only lead to included subtrees are still returned.
+
+    Returns:
+        List[Tuple[str, str, str, str, bool]]: One tuple per path containing
+            (hierarchical field, owner type, field name, field type, has_subfields).
+    """
+    # Pre-resolve every type's fields once, so the walk does no per-node dictionary lookups for them
+    child_table = {
+        owner: [(field_name, field_type, field_type in type_fields) for field_name, field_type in fields.items()]
+        for owner, fields in type_fields.items()
+    }
+    paths = []
+    # Types of the current path's ancestors; a type is added when the walk descends into it and removed on the way back
+    ancestors = set(visited) if visited else set()
+
+    # Explicit stack of (owner type, path, remaining fields, type entered by this frame), so depth is bounded only by memory
+    stack = [(type_name, current_path, iter(child_table.get(type_name, ())), None)]
+    while stack:
+        owner, path, remaining_fields, entered_type = stack[-1]
+        for field_name, field_type, has_subfields in remaining_fields:
+            hierarchical_field = f"{path}.{field_name}" if path else field_name
+            if path_filter is not None and not path_filter.should_visit(hierarchical_field):
+                continue
+            paths.append((hierarchical_field, owner, field_name, field_type, has_subfields))
+
+            # Descend into the field's type unless it already appears among the ancestors
+            if has_subfields and field_type not in ancestors:
+                ancestors.add(field_type)
+                stack.append((field_type, hierarchical_field, iter(child_table[field_type]), field_type))
+                break
+        else:
+            stack.pop()
+            if entered_type is not None:
+                ancestors.discard(entered_type)
+    return paths
+
+
+def _field_table(type_fields: Dict[str, Dict[str, str]]) -> tuple:
+    # Every (owner type, field) gets an ID, so tasks and their results refer to fields by small integers
+    table, child_ids = [], {}
+    for owner, fields in type_fields.items():
+        ids = child_ids[owner] = []
+        for field_name, field_type in fields.items():
+            ids.append(len(table))
+            table.append((owner, field_name, field_type, field_type in type_fields))
+    return table, child_ids
+
+_worker_state = None
+
+def _init_enumeration_worker(table: list, child_ids: dict, path_filter: Optional[PathFilter], budget: int):
+    global _worker_state
+    _worker_state = (table, child_ids, path_filter, budget)
+
+def _enumerate_task(task: tuple) -> tuple:
+    """
+    Enumerates the subtrees of a list of sibling fields, like `enumerate_schema_paths`, until the path budget is spent.
+
+    Args:
+        task (tuple): (path of the siblings' parent, types of its ancestors, field IDs of the siblings).
+
+    Returns:
+        tuple: The field ID of every enumerated path, the paths themselves joined by newlines (GraphQL names
+               never contain one), and the continuation tasks of the frames left unexpanded, in the order their
+               paths follow the enumerated ones.
+    """
+    prefix, visited, field_ids = task
+    table, child_ids, path_filter, budget = _worker_state
+    ids, hierarchical_fields = array('i'), []
+    ancestors = set(visited)
+
+    stack = [(prefix, iter(field_ids), None)]
+    while stack and len(ids) < budget:
+        path, remaining_fields, entered_type = stack[-1]
+        for field_id in remaining_fields:
+            _, field_name, field_type, has_subfields = table[field_id]
+            hierarchical_field = f"{path}.{field_name}" if path else field_name
+            if path_filter is not None and not path_filter.should_visit(hierarchical_field):
+                continue
+            ids.append(field_id)
+            hierarchical_fields.append(hierarchical_field)
+            if has_subfields and field_type not in ancestors:
+                ancestors.add(field_type)
+                stack.append((hierarchical_field, iter(child_ids[field_type]), field_type))
+                break
+        else:
+            stack.pop()
+            if entered_type is not None:
+                ancestors.discard(entered_type)
+
+    # The deepest frame's remaining fields come first in depth-first order, then those of the frames above it
+    continuations = []
+    for path, remaining_fields, entered_type in reversed(stack):
+        remaining_ids = list(remaining_fields)
+        if remaining_ids:
+            continuations.append((path, tuple(ancestors), remaining_ids))
+        if entered_type is not None:
+            ancestors.discard(entered_type)
+    return ids, "\n".join(hierarchical_fields), continuations
+
+def enumerate_root_paths(
+    type_fields: Dict[str, Dict[str, str]],
+    root_types: List[str],
+    path_filter: Optional[PathFilter] = None,
+    workers: Optional[int] = 1,
+    subtree_cache=None,
+) -> List[Tuple[str, str, str, str, bool]]:
+    """
+    Enumerates the paths below several root types, sharded by root field over a process pool.
+
+    Each root field is a task. A task that exceeds `TASK_PATH_BUDGET` paths returns what it has enumerated so
+    far together with its unexpanded frames, which go back to the shared queue as new tasks, so idle workers
+    take over the rest of a huge root field. Tasks return their paths as one newline-joined string and an array
+    of field IDs, which are merged in depth-first order, so the result is identical to enumerating the root
+    types one after another with `enumerate_schema_paths`.
+
+    Whichever process walks the schema, the path strings and tuples end up in this one, and creating them is
+    most of an unfiltered walk: merging the results of 1.1M paths (0.7s) takes longer than walking them in-process
+    (0.5s). The workers pay off with a path filter, whose include/exclude checks make the walk several times
+    slower than the merge, so without a path filter the schema is enumerated in-process.
+
+    Args:
+        type_fields (Dict[str, Dict[str, str]]): Lookup built by `get_type_fields`.
+        root_types (List[str]): The root types, in the order their paths are returned.
+        path_filter (Optional[PathFilter]): Include/exclude rules, as for `enumerate_schema_paths`.
+        workers (Optional[int]): Number of worker processes. 1 enumerates in-process, None uses every CPU.
+                                 Small schemas (see `PARALLEL_MIN_FIELDS`) are always enumerated in-process.
+        subtree_cache (SubtreeCache, optional): Cache of type subtrees re-rooted under the root fields (see
+                                                `subtree_cache.SubtreeCache`). Only used without a path filter,
+                                                since filters depend on the absolute paths.
+
+    Returns:
+        List[Tuple[str, str, str, str, bool]]: One tuple per path, as returned by `enumerate_schema_paths`.
+    """
+    if subtree_cache is not None and path_filter is None:
+        return subtree_cache.enumerate(type_fields, root_types)
+    if (workers == 1 or path_filter is None
+            or sum(len(fields) for fields in type_fields.values()) < PARALLEL_MIN_FIELDS):
+        paths = []
+        for root_type in root_types:
+            paths.extend(enumerate_schema_paths(type_fields, root_type, path_filter=path_filter))
+        return paths
+
+    table, child_ids = _field_table(type_fields)
+    # Each node is [encoded result, child nodes of its continuations]
+    roots, pending = [], {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_enumeration_worker,
+                             initargs=(table, child_ids, path_filter, TASK_PATH_BUDGET)) as executor:
+        for root_type in root_types:
+            for field_id in child_ids.get(root_type, ()):
+                node = [None, []]
+                roots.append(node)
+                pending[executor.submit(_enumerate_task, ("", (), [field_id]))] = node
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = pending.pop(future)
+                ids, hierarchical_fields, continuations = future.result()
+                node[0] = (ids, hierarchical_fields)
+                for continuation in continuations:
+                    child = [None, []]
+                    node[1].append(child)
+                    pending[executor.submit(_enumerate_task, continuation)] = child
+
+    paths = []
+    stack = roots[::-1]
+    while stack:
+        (ids, hierarchical_fields), children = stack.pop()
+        if ids:
+            # Each path tuple is its string followed by the (owner type, field name, field type, has_subfields) of its field
+            paths.extend(map(tuple.__add__, zip(hierarchical_fields.split("\n")), map(table.__getitem__, ids)))
+        stack.extend(reversed(children))
+    return paths
+
+
 def get_schema_fields(
     schema: DocumentNode, 
     only_leafs: bool = False, 
     root_query_type: Optional[str] = None,
-    root_mutation_type: Optional[str] = None
+    root_mutation_type: Optional[str] = None,
+    path_filter: Optional[PathFilter] = None,
+    workers: Optional[int] = 1,
+    subtree_cache=None
 ) -> Set[str]:
     """
     Recursively extracts hierarchical field names from a GraphQL schema, starting from the root Query and Mutation types.
@@ -23,9 +294,11 @@ def get_schema_fields(
         schema (DocumentNode): A parsed GraphQL schema represented as a DocumentNode.
         only_leafs (bool): If True, only returns fields that don't have sub-fields (leaf nodes).
                            If False, returns all fields including intermediate nodes.
-        parent_path (str): The hierarchical path of the parent field.
         root_query_type (Optional[str]): Name of the root query type. If None, defaults to extracting from schema.
         root_mutation_type (Optional[str]): Name of the root mutation type. If None, defaults to extracting from schema.
+        path_filter (Optional[PathFilter]): Include/exclude rules applied during traversal. Excluded subtrees are never expanded.
+        workers (Optional[int]): Number of worker processes enumerating root fields in parallel (see `enumerate_root_paths`).
+        subtree_cache (SubtreeCache, optional): Cache of type subtrees shared across schemas (see `enumerate_root_paths`).
 
     Returns:
         Set[str]: A set of hierarchical field names from the schema, filtered based on the only_leafs parameter.
@@ -33,10 +306,7 @@ def get_schema_fields(
     Raises:
         ValueError: If the root query type is not found in the schema.
     """
-    fields = set()
-    type_definitions = {
-        d.name.value: d for d in schema.definitions if isinstance(d, ObjectTypeDefinitionNode)
-    }
+    type_fields = get_type_fields(schema)
 
     # Extract root types if not provided
     if root_query_type is None or root_mutation_type is None:
@@ -45,84 +315,19 @@ def get_schema_fields(
         _root_query_type = root_query_type
         _root_mutation_type = root_mutation_type
 
-    if _root_query_type not in type_definitions:
+    if _root_query_type not in type_fields:
         raise ValueError(f"Root query type '{_root_query_type}' not found in schema.")
 
-    def get_named_type(node):
-        if isinstance(node, NonNullTypeNode) or isinstance(node, ListTypeNode):
-            return get_named_type(node.type)
-        elif isinstance(node, NamedTypeNode):
-            return node.name.value
-        return None
-
-    def extract_fields_from_type(
-        type_name: str, current_path: str, visited: Set[str] = None
-    ) -> Set[str]:
-        if visited is None:
-            visited = set()
-
-        if type_name in visited:
-            return set()
-
-        visited.add(type_name)
-        type_def = type_definitions.get(type_name)
-
-        if not type_def:
-            return set()
-
-        for field in type_def.fields:
-            field_name = field.name.value
-            field_type = get_named_type(field.type)
-            has_subfields = field_type in type_definitions
-
-            hierarchical_field = f"{current_path}.{field_name}" if current_path else field_name
-
-            # Add field based on only_leafs parameter
-            if not only_leafs or (only_leafs and not has_subfields):
-                fields.add(hierarchical_field)
-
-            # Recursively process subfields using a fresh copy of visited for each branch
-            if has_subfields:
-                extract_fields_from_type(field_type, hierarchical_field, visited.copy())
-
-        return fields
-
-    # Process Query type
-    query_type_def = type_definitions[_root_query_type]
-    for field in query_type_def.fields:
-        field_name = field.name.value
-        field_type = get_named_type(field.type)
-        has_subfields = field_type in type_definitions
-
-        hierarchical_field = field_name
-
-        # Add field based on only_leafs parameter
-        if not only_leafs or (only_leafs and not has_subfields):
-            fields.add(hierarchical_field)
-
-        # Recursively get subfields
-        if has_subfields:
-            extract_fields_from_type(field_type, hierarchical_field)
-
     # Optionally, handle Mutation type if exists
-    if _root_mutation_type and _root_mutation_type in type_definitions:
-        mutation_type_def = type_definitions[_root_mutation_type]
-        for field in mutation_type_def.fields:
-            field_name = field.name.value
-            field_type = get_named_type(field.type)
-            has_subfields = field_type in type_definitions
-
-            hierarchical_field = field_name
-
-            # Add field based on only_leafs parameter
-            if not only_leafs or (only_leafs and not has_subfields):
-                fields.add(hierarchical_field)
+    root_types = [_root_query_type]
+    if _root_mutation_type and _root_mutation_type in type_fields:
+        root_types.append(_root_mutation_type)
+    paths = enumerate_root_paths(type_fields, root_types, path_filter=path_filter, workers=workers,
+                                 subtree_cache=subtree_cache)
 
-            # Recursively get subfields
-            if has_subfields:
-                extract_fields_from_type(field_type, hierarchical_field)
-
-    return fields
+    # Add field based on only_leafs parameter
+    return {path[0] for path in paths
+            if (not only_leafs or not path[4]) and (path_filter is None or path_filter.is_included(path[0]))}
 
 if __name__ == "__main__":
   def test_get_schema_fields_happy_path():
@@ -226,5 +431,30 @@ if __name__ == "__main__":
 
       print("Test passed: Both all fields and leaf-only fields were extracted correctly.")
 
+  def test_enumerate_root_paths_parallel():
+      """
+      Tests that sharded enumeration, including tasks split on their path budget, matches sequential enumeration.
+      """
+      import random
+      global PARALLEL_MIN_FIELDS, TASK_PATH_BUDGET
+
+      rng = random.Random(0)
+      names = [f"Type{i}" for i in range(12)]
+      type_fields = {name: {f"field{j}": rng.choice(names) if rng.random() < 0.25 else "String" for j in range(8)}
+                     for name in names}
+      type_fields["Query"] = {f"query{j}": rng.choice(names) for j in range(6)}
+      type_fields["Mutation"] = {f"mutation{j}": rng.choice(names) for j in range(2)}
+      path_filter = PathFilter(exclude=["*.field1.field2"])
+
+      expected = (enumerate_schema_paths(type_fields, "Query", path_filter=path_filter)
+                  + enumerate_schema_paths(type_fields, "Mutation", path_filter=path_filter))
+      PARALLEL_MIN_FIELDS, TASK_PATH_BUDGET = 0, 20
+      paths = enumerate_root_paths(type_fields, ["Query", "Mutation"], path_filter=path_filter, workers=2)
+      assert len(expected) > 10 * TASK_PATH_BUDGET, "The schema must be large enough to split tasks."
+      assert paths == expected, "Parallel enumeration must return the sequential paths in the same order."
+
+      print("Test passed: Parallel enumeration sharded by root field matched sequential enumeration.")
+
   # Run the test
-  test_get_schema_fields_happy_path()
\ No newline at end of file
+  test_get_schema_fields_happy_path()
+  test_enumerate_root_paths_parallel()
\ No newline at end of file
@@ -1,10 +1,30 @@
 from os.path import isfile, isdir
-from load_queries import load_queries
+from load_queries import iter_queries
 from get_schema_fields import get_schema_fields
-from parse_queries_and_extract_fields import parse_queries_and_extract_fields
-from calculate_coverage import calculate_coverage
+from calculate_coverage import calculate_coverage, build_case_folding_index, fold_field_usage
 from generate_report import generate_report
 from parse_schema import parse_schema
+from load_schema import load_schema
+from coverage_cache import build_schema_snapshot, load_schema_snapshot, snapshot_fields, save_coverage_cache, load_coverage_cache
+from schema_diff import run_schema_diff
+from coverage_history import coverage_history, generate_history_report
+from path_filter import PathFilter
+from coverage_server import serve_coverage
+from operation_collector import iter_collected_operations
+from scan_sources import load_embedded_queries
+from usage_sketch import sketch_queries
+from windowed_usage import windowed_field_usage
+from coverage_pipeline import peak_rss, run_coverage_pipeline
+from sample_coverage import sample_coverage, print_sample_estimate, generate_sample_report
+from operation_overlap import OperationFieldMatrix, find_redundant_operations
+from operation_metrics import DEFAULT_METRICS
+from supergraph import compose_supergraph, field_owners, subgraph_coverage
+from subtree_cache import SubtreeCache
+from argument_coverage import ArgumentIndex, ArgumentVisitor
+from metrics_exporter import CoverageMetrics
+from functools import partial
+from itertools import chain
+from graphql import print_ast
 import argparse
 
 SCHEMA_PATH = 'GraphQLClients/spaceXplayground/schema.graphql'
@@ -14,36 +34,273 @@ ONLY_LEAFS = False
 # When `only_leafs=True`: We target only the leaf fields—those that do not have any further sub-fields. This results in a set of terminal fields, omitting intermediate nodes in the hierarchy.
 # For the plot, we can aggregate the fields at a certain depth in case we have a large schema.
 DEPTH = 1
-# When `normalize_field_names=True`: We normalize the field names to do a lowercase comparison.
+# When `normalize_field_names=True`: We normalize the field names to do a lowercase comparison. The report keeps the schema's
+# original field names, and usage recorded under another casing is attributed to them.
 NORMALIZE_FIELD_NAMES = False
 CSV_PATH = "schema_coverage_report.csv"
+# Per-operation metrics (depth, breadth, aliases, estimated cost) are written here; defaults to `csv_path` with an `_operations` suffix.
+OPERATIONS_CSV_PATH = None
 PLOT_PATH = "schema_coverage_chart.png"
+# When `rollup_path` is set: Coverage and usage rollups for every depth level are written to one columnar JSON file.
+ROLLUP_PATH = None
+# When `html_path` is set: An interactive HTML coverage explorer (a collapsible tree of all fields) is written there.
+HTML_PATH = None
+# When `cache_path` is set: A normal run stores the schema enumeration and the query field usage there,
+# and a `schema_diff` run reads them back to compute the coverage delta of a new schema without re-reading the queries.
+CACHE_PATH = None
+SCHEMA_DIFF = False
+DIFF_PATH = "schema_coverage_diff.json"
+# When `history` is set: Coverage is computed for that many of the last commits of the git repository at `repo_path`,
+# reading `schema_path` and `queries_path` (relative to the repository root) from each commit instead of the working tree.
+HISTORY = None
+REPO_PATH = "."
+HISTORY_CACHE_PATH = None
+WORKERS = None
+# Include/exclude path patterns (globs over dotted paths, or regexes prefixed with `re:`). They are applied while the
+# schema and the queries are traversed, so excluded subtrees such as `*.pageInfo` are never expanded.
+INCLUDE = None
+EXCLUDE = None
+# When `serve` is set: The schema (and the queries at `queries_path`, as a baseline) are loaded once and coverage
+# requests are answered as JSON over HTTP on `host`:`port`, or on the Unix socket `socket_path`.
+SERVE = False
+HOST = "127.0.0.1"
+PORT = 8765
+SOCKET_PATH = None
+# When `operations_path` is set: Operations recorded at runtime by the collector middleware (a JSONL file) are analysed
+# in addition to the query files in `queries_path`, which then becomes optional.
+OPERATIONS_PATH = None
+# When `evaluate_directives=True`: `@skip`/`@include` directives of the collected operations are applied with the variables
+# captured with each request, so skipped selections do not count as covered. Each document is walked once per combination.
+EVALUATE_DIRECTIVES = False
+# When `sources_path` is set: GraphQL documents embedded as string literals in generated C#, TypeScript/JavaScript and
+# Python client sources under that directory are analysed as well.
+SOURCES_PATH = None
+# When `approximate=True`: Field usage is estimated with a count-min sketch (within `sketch_epsilon` of the total usage,
+# with probability `1 - sketch_delta`) and distinct operations per field with HyperLogLog (relative error `hll_error`),
+# while coverage stays exact. Memory no longer grows with traffic, and the sketch can be saved to `sketch_path` and merged.
+APPROXIMATE = False
+SKETCH_EPSILON = 0.001
+SKETCH_DELTA = 0.01
+HLL_ERROR = 0.05
+SKETCH_PATH = None
+# When `window_days` is set: Only the runtime operations at `operations_path` are analysed, and a field counts as covered
+# only if it was used within the last `window_days` days. The time-bucketed usage is updated incrementally from the new
+# lines of the operations file and kept at `window_state_path`, so later runs never recompute it from scratch.
+WINDOW_DAYS = None
+WINDOW_STATE_PATH = None
+# When `subgraph_paths` is set: The subgraph SDL files of a federated graph are composed once into a supergraph (written to
+# `supergraph_path` if set), which replaces `schema_path`. Coverage is computed against the supergraph and attributed back
+# to the subgraphs owning each field. `schema_diff` diffs the supergraph; `serve` needs `supergraph_path`, and `history` cannot be combined with subgraphs.
+SUBGRAPH_PATHS = None
+SUPERGRAPH_PATH = None
+# Where the coverage of every field argument, input object field and enum value is written. It is collected in the same
+# walk as the fields and defaults to `csv_path` with an `_arguments` suffix.
+ARGUMENTS_CSV_PATH = None
+# When `subtree_cache_path` is set: The paths below each type are cached in that directory, keyed by a hash of the type's
+# transitive definition, so types shared by several client schemas are enumerated once across runs. The directory is kept
+# below `subtree_cache_mb` megabytes by removing the least recently used entries. Not used with --include/--exclude.
+SUBTREE_CACHE_PATH = None
+SUBTREE_CACHE_MB = 256
+# When `metrics_path` is set: Overall coverage, coverage and usage per path prefix down to `metrics_depth` levels and the usage
+# of the `metrics_top_k` most used fields are written there as an OpenMetrics text file, for Prometheus' textfile collector.
+# With `serve`, the file is kept up to date with the usage of every requested document.
+METRICS_PATH = None
+METRICS_DEPTH = 2
+METRICS_TOP_K = 20
+# When `low_memory=True`: The schema and the queries are parsed without source locations, each query's text and AST are
+# released as soon as its fields are extracted, and the schema AST is released once its compact index is built. The peak
+# resident memory of the run is printed at the end.
+LOW_MEMORY = False
+# When `sample` is set: Only a random sample of the query files is processed, stratified by directory: that many files if it
+# is at least 1, or that fraction of the files if it is below 1. Coverage and per-field usage are estimated with confidence
+# intervals at level `sample_confidence`, and printed each time the number of processed files doubles.
+SAMPLE = None
+SAMPLE_SEED = 0
+SAMPLE_CONFIDENCE = 0.95
+# When `find_redundant=True`: The fields of every operation are kept, and operations duplicating, contained in, or nearly
+# duplicating (Jaccard similarity of at least `redundancy_threshold`) another operation are written to `redundant_csv_path`,
+# which defaults to `csv_path` with a `_redundant` suffix.
+FIND_REDUNDANT = False
+REDUNDANT_CSV_PATH = None
+REDUNDANCY_THRESHOLD = 0.9
 
-def main(schema_path: str, queries_path: str, only_leafs: bool = False, depth: int = 1, normalize_field_names: bool = False, csv_path: str = "schema_coverage_report.csv", plot_path: str = "schema_coverage_chart.png"):
-    assert isfile(schema_path)
-    assert isdir(queries_path)
+def main(schema_path: str, queries_path: str, only_leafs: bool = False, depth: int = 1, normalize_field_names: bool = False, csv_path: str = "schema_coverage_report.csv", plot_path: str = "schema_coverage_chart.png",
+         cache_path: str = None, schema_diff: bool = False, diff_path: str = "schema_coverage_diff.json",
+         history: int = None, repo_path: str = ".", history_cache_path: str = None, workers: int = None,
+         include: list = None, exclude: list = None, rollup_path: str = None, html_path: str = None,
+         serve: bool = False, host: str = "127.0.0.1", port: int = 8765, socket_path: str = None,
+         operations_path: str = None, sources_path: str = None, approximate: bool = False,
+         sketch_epsilon: float = 0.001, sketch_delta: float = 0.01, hll_error: float = 0.05, sketch_path: str = None,
+         window_days: int = None, window_state_path: str = None, operations_csv_path: str = None,
+         subgraph_paths: list = None, supergraph_path: str = None, arguments_csv_path: str = None,
+         subtree_cache_path: str = None, subtree_cache_mb: int = 256, evaluate_directives: bool = False,
+         metrics_path: str = None, metrics_depth: int = 2, metrics_top_k: int = 20, low_memory: bool = False,
+         sample: float = None, sample_seed: int = 0, sample_confidence: float = 0.95, find_redundant: bool = False,
+         redundant_csv_path: str = None, redundancy_threshold: float = 0.9):
+    path_filter = PathFilter(include=include, exclude=exclude) if include or exclude else None
 
-    schema_fields = parse_schema(schema_path=schema_path, only_leafs=only_leafs)
-    queries = load_queries(queries_path=queries_path)
-    field_usage, used_fields = parse_queries_and_extract_fields(queries=queries, only_leafs=only_leafs)
+    # History reads the schema of every commit from the git object store, where the composed supergraph does not exist
+    assert not (history and subgraph_paths), "--history reads --schema_path from each commit and cannot compose --subgraph_paths."
+
+    if subgraph_paths:
+        assert all(isfile(subgraph_path) for subgraph_path in subgraph_paths)
+        schema = compose_supergraph(subgraph_paths)
+        if supergraph_path:
+            with open(supergraph_path, 'w') as file:
+                file.write(print_ast(schema))
+            schema_path = supergraph_path
+    else:
+        schema = None
+    if serve and schema is not None:
+        assert supergraph_path, "--serve reads the schema from a file; pass --supergraph_path to write the composed supergraph."
+
+    if serve:
+        assert isfile(schema_path)
+        serve_coverage(schema_path=schema_path, queries_path=queries_path if isdir(queries_path) else None,
+                       only_leafs=only_leafs, path_filter=path_filter, host=host, port=port,
+                       socket_path=socket_path, workers=workers, metrics_path=metrics_path,
+                       metrics_depth=metrics_depth, metrics_top_k=metrics_top_k)
+        return
+
+    if history:
+        points = coverage_history(repo_path=repo_path, schema_path=schema_path, queries_path=queries_path,
+                                  max_count=history, only_leafs=only_leafs, cache_path=history_cache_path,
+                                  workers=workers, path_filter=path_filter)
+        generate_history_report(points, csv_path=csv_path, plot_path=plot_path)
+        return
+
+    assert schema is not None or isfile(schema_path)
+
+    if schema_diff:
+        assert cache_path and isfile(cache_path), "A schema diff needs the cache of a previous run (--cache_path)."
+        run_schema_diff(schema_path=schema_path, cache=load_coverage_cache(cache_path), diff_path=diff_path, schema=schema)
+        return
+
+    subtree_cache = SubtreeCache(subtree_cache_path, max_bytes=subtree_cache_mb * 1024 * 1024) if subtree_cache_path else None
+    if sample:
+        assert isdir(queries_path), "A sampled run needs the query files (--queries_path)."
+        if schema is not None:
+            schema_fields = snapshot_fields(build_schema_snapshot(schema, path_filter=path_filter, workers=workers,
+                                                                  subtree_cache=subtree_cache), only_leafs=only_leafs)
+        else:
+            schema_fields = parse_schema(schema_path=schema_path, only_leafs=only_leafs, path_filter=path_filter,
+                                         workers=workers, subtree_cache=subtree_cache)
+        estimator = sample_coverage(schema_fields, queries_path, sample=sample, seed=sample_seed, only_leafs=only_leafs,
+                                    path_filter=path_filter, confidence=sample_confidence, on_checkpoint=print_sample_estimate)
+        generate_sample_report(estimator, csv_path=csv_path)
+        return
+
+    if window_days:
+        assert operations_path and isfile(operations_path), "A windowed run needs the collected operations (--operations_path)."
+    else:
+        assert isdir(queries_path) or operations_path or sources_path
+
+    if sources_path:
+        assert isdir(sources_path)
+
+    if window_days or approximate:
+        if low_memory and schema is None:
+            snapshot = load_schema_snapshot(schema_path, path_filter=path_filter, workers=workers, subtree_cache=subtree_cache)
+            schema_fields = snapshot_fields(snapshot, only_leafs=only_leafs)
+        elif cache_path or schema is not None:
+            snapshot = build_schema_snapshot(schema if schema is not None else load_schema(schema_path),
+                                             path_filter=path_filter, workers=workers, subtree_cache=subtree_cache)
+            schema_fields = snapshot_fields(snapshot, only_leafs=only_leafs)
+        else:
+            schema_fields = parse_schema(schema_path=schema_path, only_leafs=only_leafs, path_filter=path_filter,
+                                         workers=workers, subtree_cache=subtree_cache)
+    operation_metrics = None
+    argument_coverage = None
+    argument_summary = None
+    redundant_operations = None
+    if window_days:
+        field_usage, used_fields = windowed_field_usage(operations_path, schema_fields, window_days=window_days,
+                                                        state_path=window_state_path, only_leafs=only_leafs,
+                                                        path_filter=path_filter)
+    elif approximate:
+        # Streamed, so memory does not grow with the corpus; collected operations carry their execution counts
+        sources = []
+        if isdir(queries_path):
+            sources.append(iter_queries(queries_path))
+        if operations_path:
+            sources.append(iter_collected_operations(operations_path))
+        if sources_path:
+            sources.append(load_embedded_queries(sources_path, workers=workers))
+        sketch = sketch_queries(chain.from_iterable(sources), schema_fields, only_leafs=only_leafs, path_filter=path_filter,
+                                epsilon=sketch_epsilon, delta=sketch_delta, hll_error=hll_error, workers=workers)
+        if sketch_path:
+            sketch.save(sketch_path)
+        field_usage = sketch.field_usage()
+        used_fields = sketch.covered_fields() | sketch.unknown_fields
+        bounds = sketch.error_bounds()
+        print(f"Usage estimates overcount by at most {bounds['usage_overcount']:.1f} with probability "
+              f"{bounds['usage_confidence']:.3f}; distinct operation counts are within ±{bounds['distinct_relative_error']:.1%}.")
+    else:
+        # The schema is enumerated while the queries are read and parsed; arguments are recorded in the same walk
+        argument_usages = set()
+        field_matrix = OperationFieldMatrix() if find_redundant else None
+        schema_fields, snapshot, field_usage, used_fields, operation_metrics = run_coverage_pipeline(
+            schema_path, queries_path=queries_path if isdir(queries_path) else None, operations_path=operations_path,
+            sources_path=sources_path, only_leafs=only_leafs, path_filter=path_filter, with_snapshot=True,
+            metrics=DEFAULT_METRICS + (partial(ArgumentVisitor, argument_usages),), workers=workers, schema=schema,
+            subtree_cache=subtree_cache, evaluate_directives=evaluate_directives, low_memory=low_memory,
+            field_matrix=field_matrix, casefold_usage=normalize_field_names)
+        argument_index = ArgumentIndex(snapshot)
+        argument_covered = argument_index.resolve(argument_usages)
+        argument_coverage = argument_index.report_rows(argument_covered)
+        argument_summary = argument_index.summary(argument_covered)
+        if field_matrix is not None:
+            redundant_operations = find_redundant_operations(field_matrix, threshold=redundancy_threshold)
     
     # Compute missing fields: those used but not defined in the schema
     missing_fields = used_fields - schema_fields
+    folding_index = None
+    if normalize_field_names:
+        # Built once per schema; coverage is then a lookup per used field
+        folding_index = build_case_folding_index(schema_fields)
+        missing_fields = {field for field in missing_fields if field.casefold() not in folding_index}
+        field_usage = fold_field_usage(field_usage, folding_index)
     # Assert that there are no missing fields. If there are, include them in the error message.
     assert not missing_fields, (
         f"All used fields must be defined in the schema. The following fields are missing: {missing_fields}"
     )
+
+    if cache_path:
+        save_coverage_cache(cache_path, snapshot, field_usage, only_leafs=only_leafs)
     
     coverage_percentage, covered_fields, uncovered_fields = calculate_coverage(schema_fields=schema_fields,
                                                                                used_fields=used_fields,
-                                                                               normalize=normalize_field_names)
+                                                                               normalize=normalize_field_names,
+                                                                               folding_index=folding_index)
+    subgraphs = None
+    if schema is not None:
+        subgraphs = subgraph_coverage(snapshot, schema_fields, schema_fields - uncovered_fields, field_owners(schema))
     generate_report(coverage=coverage_percentage,
                    field_usage=field_usage,
                    schema_fields=schema_fields,
                    uncovered_fields=uncovered_fields,
                    depth=depth,
                    csv_path=csv_path,
-                   plot_path=plot_path)
+                   plot_path=plot_path,
+                   rollup_path=rollup_path,
+                   html_path=html_path,
+                   operation_metrics=operation_metrics,
+                   operations_csv_path=operations_csv_path,
+                   subgraph_coverage=subgraphs,
+                   argument_coverage=argument_coverage,
+                   argument_summary=argument_summary,
+                   arguments_csv_path=arguments_csv_path,
+                   redundant_operations=redundant_operations,
+                   redundant_csv_path=redundant_csv_path)
+    if metrics_path:
+        metrics = CoverageMetrics(schema_fields, max_depth=metrics_depth, top_k=metrics_top_k)
+        metrics.add_usage(field_usage)
+        metrics.write(metrics_path)
+        print(f"Coverage metrics written to {metrics_path}")
+    if low_memory:
+        peak, schema_peak = peak_rss()
+        if peak is not None:
+            print(f"Peak RSS: {peak / 2**20:.1f} MB (schema process: {schema_peak / 2**20:.1f} MB)")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Calculate GraphQL coverage.")
@@ -83,12 +340,259 @@ if __name__ == "__main__":
         default=CSV_PATH,
         help='Path to the CSV file for the coverage report.'
     )
+    parser.add_argument(
+        '--operations_csv_path',
+        type=str,
+        default=OPERATIONS_CSV_PATH,
+        help='Path to the CSV file for the per-operation metrics. Defaults to --csv_path with an _operations suffix.'
+    )
     parser.add_argument(
         '--plot_path',
         type=str,
         default=PLOT_PATH,
         help='Path to the plot file for the coverage chart.'
     )
+    parser.add_argument(
+        '--rollup_path',
+        type=str,
+        default=ROLLUP_PATH,
+        help='Path to the JSON file with coverage and usage rollups for every depth level.'
+    )
+    parser.add_argument(
+        '--html_path',
+        type=str,
+        default=HTML_PATH,
+        help='Path to the HTML file for the interactive coverage explorer.'
+    )
+    parser.add_argument(
+        '--cache_path',
+        type=str,
+        default=CACHE_PATH,
+        help='Path to the JSON cache of a run. Written by normal runs, read by --schema_diff.'
+    )
+    parser.add_argument(
+        '--schema_diff',
+        action='store_true',
+        default=SCHEMA_DIFF,
+        help='If set, compare --schema_path against the cached run and report the coverage delta only.'
+    )
+    parser.add_argument(
+        '--diff_path',
+        type=str,
+        default=DIFF_PATH,
+        help='Path to the JSON file for the schema diff coverage delta.'
+    )
+    parser.add_argument(
+        '--history',
+        type=int,
+        default=HISTORY,
+        help='If set, report the coverage trend over this many of the last commits of --repo_path.'
+    )
+    parser.add_argument(
+        '--repo_path',
+        type=str,
+        default=REPO_PATH,
+        help='Path to the git repository walked by --history.'
+    )
+    parser.add_argument(
+        '--history_cache_path',
+        type=str,
+        default=HISTORY_CACHE_PATH,
+        help='Path to the JSON cache of per-blob field sets reused by --history runs.'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=WORKERS,
+        help='Number of parallel workers. Defaults to the number of CPUs.'
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=INCLUDE,
+        help='Only consider fields matching this path pattern and their sub-fields. Can be repeated.'
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=EXCLUDE,
+        help='Ignore fields matching this path pattern and their sub-fields. Can be repeated.'
+    )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        default=SERVE,
+        help='If set, keep the schema in memory and answer coverage requests over HTTP.'
+    )
+    parser.add_argument(
+        '--host',
+        type=str,
+        default=HOST,
+        help='Host the coverage server binds to.'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=PORT,
+        help='Port the coverage server binds to.'
+    )
+    parser.add_argument(
+        '--socket_path',
+        type=str,
+        default=SOCKET_PATH,
+        help='If set, the coverage server listens on this Unix socket instead of host and port.'
+    )
+    parser.add_argument(
+        '--operations_path',
+        type=str,
+        default=OPERATIONS_PATH,
+        help='Path to a JSONL file of operations recorded by the collector middleware, analysed in addition to the queries.'
+    )
+    parser.add_argument(
+        '--sources_path',
+        type=str,
+        default=SOURCES_PATH,
+        help='Path to a directory of generated client sources (C#, TypeScript, JavaScript, Python) scanned for embedded GraphQL documents.'
+    )
+    parser.add_argument(
+        '--approximate',
+        action='store_true',
+        default=APPROXIMATE,
+        help='If set, estimate field usage with mergeable sketches instead of exact counters. Coverage stays exact.'
+    )
+    parser.add_argument(
+        '--sketch_epsilon',
+        type=float,
+        default=SKETCH_EPSILON,
+        help='Error bound of the usage estimates, relative to the total usage (with --approximate).'
+    )
+    parser.add_argument(
+        '--sketch_delta',
+        type=float,
+        default=SKETCH_DELTA,
+        help='Probability that a usage estimate exceeds its error bound (with --approximate).'
+    )
+    parser.add_argument(
+        '--hll_error',
+        type=float,
+        default=HLL_ERROR,
+        help='Relative error of the distinct operations per field estimates (with --approximate).'
+    )
+    parser.add_argument(
+        '--sketch_path',
+        type=str,
+        default=SKETCH_PATH,
+        help='Path to the .npz file the usage sketch is saved to, for merging with sketches of other runs.'
+    )
+    parser.add_argument(
+        '--window_days',
+        type=int,
+        default=WINDOW_DAYS,
+        help='If set, only count runtime operations (--operations_path) used within this many days.'
+    )
+    parser.add_argument(
+        '--window_state_path',
+        type=str,
+        default=WINDOW_STATE_PATH,
+        help='Path to the .npz file with the time-bucketed usage, updated incrementally by --window_days runs.'
+    )
+    parser.add_argument(
+        '--subgraph_paths',
+        nargs='+',
+        default=SUBGRAPH_PATHS,
+        help='Paths to the subgraph SDL files of a federated graph, composed into one supergraph instead of --schema_path.'
+    )
+    parser.add_argument(
+        '--supergraph_path',
+        type=str,
+        default=SUPERGRAPH_PATH,
+        help='Path the composed supergraph SDL is written to (with --subgraph_paths).'
+    )
+    parser.add_argument(
+        '--arguments_csv_path',
+        type=str,
+        default=ARGUMENTS_CSV_PATH,
+        help='Path to the CSV report of argument, input field and enum value coverage (default: --csv_path with an _arguments suffix).'
+    )
+    parser.add_argument(
+        '--evaluate_directives',
+        action='store_true',
+        default=EVALUATE_DIRECTIVES,
+        help='Apply @skip/@include of the collected operations with the variables captured with each request.'
+    )
+    parser.add_argument(
+        '--subtree_cache_path',
+        type=str,
+        default=SUBTREE_CACHE_PATH,
+        help='Directory caching the enumerated paths below each type, shared across runs and client schemas.'
+    )
+    parser.add_argument(
+        '--subtree_cache_mb',
+        type=int,
+        default=SUBTREE_CACHE_MB,
+        help='Maximum size of --subtree_cache_path in megabytes; the least recently used entries are removed beyond it.'
+    )
+    parser.add_argument(
+        '--metrics_path',
+        type=str,
+        default=METRICS_PATH,
+        help='Path to an OpenMetrics text file with coverage and usage metrics (e.g. in the node exporter textfile directory).'
+    )
+    parser.add_argument(
+        '--metrics_depth',
+        type=int,
+        default=METRICS_DEPTH,
+        help='Deepest path prefix level reported in --metrics_path.'
+    )
+    parser.add_argument(
+        '--metrics_top_k',
+        type=int,
+        default=METRICS_TOP_K,
+        help='Number of most used fields reported in --metrics_path.'
+    )
+    parser.add_argument(
+        '--low_memory',
+        action='store_true',
+        default=LOW_MEMORY,
+        help='Parse without source locations and release query texts and ASTs as soon as they are consumed; prints the peak RSS.'
+    )
+    parser.add_argument(
+        '--sample',
+        type=float,
+        default=SAMPLE,
+        help='Only process a random sample of the query files, stratified by directory: N files, or a fraction below 1. '
+             'Coverage and usage are reported as estimates with confidence intervals.'
+    )
+    parser.add_argument(
+        '--sample_seed',
+        type=int,
+        default=SAMPLE_SEED,
+        help='Seed of the --sample, so a preview can be reproduced.'
+    )
+    parser.add_argument(
+        '--sample_confidence',
+        type=float,
+        default=SAMPLE_CONFIDENCE,
+        help='Confidence level of the intervals reported with --sample.'
+    )
+    parser.add_argument(
+        '--find_redundant',
+        action='store_true',
+        default=FIND_REDUNDANT,
+        help='Report operations duplicating, contained in, or nearly duplicating another operation.'
+    )
+    parser.add_argument(
+        '--redundant_csv_path',
+        type=str,
+        default=REDUNDANT_CSV_PATH,
+        help='Path to the CSV file for --find_redundant. Defaults to --csv_path with a _redundant suffix.'
+    )
+    parser.add_argument(
+        '--redundancy_threshold',
+        type=float,
+        default=REDUNDANCY_THRESHOLD,
+        help='Minimum Jaccard similarity of the fields of two operations reported as near-duplicates.'
+    )
     
     args = parser.parse_args()
 
@@ -99,5 +603,46 @@ if __name__ == "__main__":
         depth=args.depth,
         normalize_field_names=args.normalize_field_names,
         csv_path=args.csv_path,
-        plot_path=args.plot_path
+        plot_path=args.plot_path,
+        cache_path=args.cache_path,
+        schema_diff=args.schema_diff,
+        diff_path=args.diff_path,
+        history=args.history,
+        repo_path=args.repo_path,
+        history_cache_path=args.history_cache_path,
+        workers=args.workers,
+        include=args.include,
+        exclude=args.exclude,
+        rollup_path=args.rollup_path,
+        html_path=args.html_path,
+        serve=args.serve,
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket_path,
+        operations_path=args.operations_path,
+        sources_path=args.sources_path,
+        approximate=args.approximate,
+        sketch_epsilon=args.sketch_epsilon,
+        sketch_delta=args.sketch_delta,
+        hll_error=args.hll_error,
+        sketch_path=args.sketch_path,
+        window_days=args.window_days,
+        window_state_path=args.window_state_path,
+        operations_csv_path=args.operations_csv_path,
+        subgraph_paths=args.subgraph_paths,
+        supergraph_path=args.supergraph_path,
+        arguments_csv_path=args.arguments_csv_path,
+        subtree_cache_path=args.subtree_cache_path,
+        subtree_cache_mb=args.subtree_cache_mb,
+        evaluate_directives=args.evaluate_directives,
+        metrics_path=args.metrics_path,
+        metrics_depth=args.metrics_depth,
+        metrics_top_k=args.metrics_top_k,
+        low_memory=args.low_memory,
+        sample=args.sample,
+        sample_seed=args.sample_seed,
+        sample_confidence=args.sample_confidence,
+        find_redundant=args.find_redundant,
+        redundant_csv_path=args.redundant_csv_path,
+        redundancy_threshold=args.redundancy_threshold
     )
@@ -1,7 +1,121 @@
 import glob
+import heapq
 import os
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-QUERIES_PATH = 'GraphQLClients/spaceXplayground/Queries'
+QUERIES_PATH = 'GraphQLClients/spaceXplayground/queries'
+# Reads in flight at once; high-latency (network) filesystems benefit from many concurrent reads.
+READ_WORKERS = 16
+
+def _sorted_entries(directory: str) -> list:
+    # A directory sorts as its name plus a separator, so its files take their place in sorted path order
+    with os.scandir(directory) as entries:
+        return sorted((entry for entry in entries if not entry.name.startswith('.')),
+                      key=lambda entry: entry.name + os.sep if entry.is_dir() else entry.name)
+
+def _find_query_files(queries_path: str):
+    # Walks the directory lazily, depth first, yielding paths in sorted order and skipping hidden entries like `glob` does
+    stack = [iter(_sorted_entries(queries_path))]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+        elif entry.is_dir():
+            stack.append(iter(_sorted_entries(entry.path)))
+        elif entry.name.endswith('.graphql') and entry.is_file():
+            yield entry.path
+
+def _read_query_file(file_path: str) -> tuple:
+    with open(file_path, 'rb') as file:
+        return file_path, file.read().decode('utf-8')
+
+def iter_query_files(file_paths, workers: int = READ_WORKERS):
+    """
+    Lazily yields the content of the given query files, in order, reading several files concurrently.
+
+    At most `2 * workers` files are read ahead of the consumer.
+
+    Args:
+        file_paths (Iterable[str]): Paths of GraphQL query files.
+        workers (int): Number of files read concurrently.
+
+    Yields:
+        tuple: The file path and the content of a GraphQL query file.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for file_path in file_paths:
+            pending.append(executor.submit(_read_query_file, file_path))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def iter_queries(queries_path: str, workers: int = READ_WORKERS):
+    """
+    Lazily yields the GraphQL query files of a directory, reading several files concurrently.
+
+    Files are found while the directory tree is walked, and at most `2 * workers` files are read ahead of the
+    consumer, so parsing can start before the whole corpus is read and the corpus is never held in memory at once.
+
+    Args:
+        queries_path (str): The path to the directory containing GraphQL query files.
+        workers (int): Number of files read concurrently.
+
+    Yields:
+        tuple: The file path and the content of a GraphQL query file, in sorted path order.
+
+    Raises:
+        FileNotFoundError: If no GraphQL query files are found in the specified directory.
+    """
+    found = False
+    for query in iter_query_files(_find_query_files(queries_path), workers=workers):
+        found = True
+        yield query
+    if not found:
+        raise FileNotFoundError(f"No GraphQL query files found in directory: {queries_path}")
+
+def sample_query_files(queries_path: str, seed: int = 0) -> tuple:
+    """
+    Orders the query files of a directory so that every prefix of the order is a stratified random sample.
+
+    Files are stratified by directory. Each directory's files are shuffled, and the next file is always taken
+    from the directory whose share taken so far is the smallest, so the first `n` files hold each directory in
+    proportion to its size. Processing the order from the start therefore refines a sample progressively,
+    up to the whole corpus.
+
+    Args:
+        queries_path (str): The path to the directory containing GraphQL query files.
+        seed (int): Seed of the shuffles, so a sample can be reproduced.
+
+    Returns:
+        tuple: The file paths in sampling order, and the number of files per directory (stratum).
+
+    Raises:
+        FileNotFoundError: If no GraphQL query files are found in the specified directory.
+    """
+    strata = {}
+    for file_path in _find_query_files(queries_path):
+        strata.setdefault(os.path.dirname(file_path), []).append(file_path)
+    if not strata:
+        raise FileNotFoundError(f"No GraphQL query files found in directory: {queries_path}")
+
+    rng = random.Random(seed)
+    for file_paths in strata.values():
+        rng.shuffle(file_paths)
+    # (share taken, -stratum size, directory, taken); larger directories go first on equal shares
+    heap = [(0.0, -len(file_paths), directory, 0) for directory, file_paths in strata.items()]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        _, negative_size, directory, taken = heapq.heappop(heap)
+        order.append(strata[directory][taken])
+        taken += 1
+        if taken < -negative_size:
+            heapq.heappush(heap, (taken / -negative_size, negative_size, directory, taken))
+    return order, {directory: len(file_paths) for directory, file_paths in strata.items()}
 
 def load_queries(queries_path: str) -> list:
     """
@@ -16,15 +130,7 @@ def load_queries(queries_path: str) -> list:
     Raises:
         FileNotFoundError: If no GraphQL query files are found in the specified directory.
     """
-    query_files = glob.glob(os.path.join(queries_path, '**', '*.graphql'), recursive=True)
-    if not query_files:
-        raise FileNotFoundError(f"No GraphQL query files found in directory: {queries_path}")
-    
-    queries = []
-    for file_path in query_files:
-        with open(file_path, 'r') as file:
-            queries.append((file_path, file.read()))
-    return queries
+    return list(iter_queries(queries_path))
 
 if __name__ == "__main__":
     def test_load_queries_happy_path(queries_path = QUERIES_PATH):
@@ -40,5 +146,53 @@ if __name__ == "__main__":
       except Exception as e:
           raise AssertionError(f"Test failed with exception: {e}")
 
+    def test_iter_queries_streaming():
+      """
+      Tests that iter_queries yields the same files as a sorted recursive glob, in the same order.
+      """
+      import tempfile
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          for relative_path in ["a.graphql", "b/c.graphql", "b/d/e.graphql", "b/z.graphql", "b.graphql",
+                                "b0.graphql", ".hidden/f.graphql", "b/g.txt"]:
+              os.makedirs(os.path.dirname(os.path.join(tmp_dir, relative_path)), exist_ok=True)
+              with open(os.path.join(tmp_dir, relative_path), 'w') as file:
+                  file.write("query { book { title } }\n" * (1000 if relative_path == "a.graphql" else 1))
+
+          expected = sorted(glob.glob(os.path.join(tmp_dir, '**', '*.graphql'), recursive=True))
+          queries = list(iter_queries(tmp_dir, workers=2))
+          assert [path for path, _ in queries] == expected, f"Unexpected files: {queries}"
+          assert all(text.count("book") == (1000 if path.endswith("a.graphql") else 1) for path, text in queries)
+
+          try:
+              list(iter_queries(os.path.join(tmp_dir, "b", "d", "missing")))
+              raise AssertionError("A missing directory must raise.")
+          except FileNotFoundError:
+              pass
+      print("Test passed: Query files were streamed lazily and concurrently.")
+
+    def test_sample_query_files_stratified():
+      """
+      Tests that every prefix of the sampling order holds each directory in proportion to its size.
+      """
+      import tempfile
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          for directory, count in [("large", 60), ("small", 20), ("small/nested", 20)]:
+              os.makedirs(os.path.join(tmp_dir, directory), exist_ok=True)
+              for i in range(count):
+                  with open(os.path.join(tmp_dir, directory, f"q{i}.graphql"), 'w') as file:
+                      file.write("query { book { title } }")
+
+          order, strata = sample_query_files(tmp_dir, seed=7)
+          assert sorted(order) == sorted(glob.glob(os.path.join(tmp_dir, '**', '*.graphql'), recursive=True))
+          assert sorted(strata.values()) == [20, 20, 60]
+          first = [os.path.relpath(os.path.dirname(path), tmp_dir) for path in order[:10]]
+          assert (first.count("large"), first.count("small"), first.count(os.path.join("small", "nested"))) == (6, 2, 2), first
+          assert sample_query_files(tmp_dir, seed=7)[0] == order and sample_query_files(tmp_dir, seed=8)[0] != order
+      print("Test passed: Query files were ordered as a progressive stratified sample.")
+
     # Run the test
-    test_load_queries_happy_path()
\ No newline at end of file
+    test_iter_queries_streaming()
+    test_sample_query_files_stratified()
+    test_load_queries_happy_path()
@@ -5,12 +5,13 @@ from os.path import isfile
 
 SCHEMA_PATH = 'GraphQLClients/spaceXplayground/schema.graphql'
 
-def load_schema(schema_path: str) -> DocumentNode:
+def load_schema(schema_path: str, no_location: bool = False) -> DocumentNode:
     """
     Loads and parses a GraphQL schema from a file.
 
     Args:
         schema_path (str): The path to the GraphQL schema file.
+        no_location (bool): If True, the AST carries no source locations, which makes it considerably smaller.
 
     Returns:
         DocumentNode: A parsed representation of the GraphQL schema.
@@ -22,7 +23,7 @@ def load_schema(schema_path: str) -> DocumentNode:
     assert isfile(schema_path)
     with open(schema_path, 'r') as file:
         schema_str = file.read()
-    return parse(schema_str)
+    return parse(schema_str, no_location=no_location)
 
 if __name__ == "__main__":
     def test_load_schema_happy_path(schema_path = SCHEMA_PATH):  # Ensure this file exists and is a valid GraphQL schema
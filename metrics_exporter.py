@@ -0,0 +1,170 @@
+import heapq
+import os
+from typing import Dict, Iterable, List
+
+METRICS_NAMESPACE = "graphql_coverage"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class CoverageMetrics:
+    """
+    Coverage and usage metrics kept up to date incrementally and written as an OpenMetrics text file.
+
+    The file contains the overall coverage, the coverage and usage of every path prefix down to `max_depth`
+    segments and the usage of the `top_k` most used fields, so its cardinality is bounded by the schema's
+    prefixes up to that depth plus `top_k`, however large the schema is. Usage is added with `add_usage` or
+    `add_fields`, which only touch the prefixes of the given fields, and `write` renders the current state
+    without recomputing any report. Prometheus' node exporter picks the file up with its textfile collector.
+    """
+
+    def __init__(self, schema_fields: Iterable[str], max_depth: int = 2, top_k: int = 20, namespace: str = METRICS_NAMESPACE):
+        """
+        Args:
+            schema_fields (Iterable[str]): All hierarchical schema fields coverage is measured against.
+            max_depth (int): Deepest prefix level reported per prefix, e.g. 1 for root fields only. 0 disables prefixes.
+            top_k (int): Number of most used fields whose usage is reported.
+            namespace (str): Prefix of every metric name.
+        """
+        self.max_depth = max_depth
+        self.top_k = top_k
+        self.namespace = namespace
+        self.prefixes: List[str] = []
+        self.prefix_depths: List[int] = []
+        self.prefix_fields: List[int] = []
+        rows = {}
+        self.field_rows: Dict[str, tuple] = {}
+        for schema_field in sorted(schema_fields):
+            segments = schema_field.split(".")
+            field_rows = []
+            for depth in range(1, min(len(segments), max_depth) + 1):
+                prefix = ".".join(segments[:depth])
+                row = rows.get(prefix)
+                if row is None:
+                    row = rows[prefix] = len(self.prefixes)
+                    self.prefixes.append(prefix)
+                    self.prefix_depths.append(depth)
+                    self.prefix_fields.append(0)
+                self.prefix_fields[row] += 1
+                field_rows.append(row)
+            self.field_rows[schema_field] = tuple(field_rows)
+        self.prefix_covered = [0] * len(self.prefixes)
+        self.prefix_usage = [0] * len(self.prefixes)
+        self.field_usage: Dict[str, int] = {}
+        self.covered = 0
+
+    def add_usage(self, field_usage: Dict[str, int]):
+        """
+        Adds usage counts. Fields that are not schema fields are ignored.
+
+        Args:
+            field_usage (Dict[str, int]): Usage counts to add per hierarchical field.
+        """
+        usage = self.field_usage
+        for used_field, count in field_usage.items():
+            field_rows = self.field_rows.get(used_field)
+            if field_rows is None or count <= 0:
+                continue
+            previous = usage.get(used_field, 0)
+            usage[used_field] = previous + count
+            if previous == 0:
+                self.covered += 1
+                for row in field_rows:
+                    self.prefix_covered[row] += 1
+            for row in field_rows:
+                self.prefix_usage[row] += count
+
+    def add_fields(self, used_fields: Iterable[str]):
+        """Adds the fields used by one document, each with a usage of 1."""
+        self.add_usage(dict.fromkeys(used_fields, 1))
+
+    def render(self) -> str:
+        """
+        Renders the current state as OpenMetrics text.
+
+        Returns:
+            str: The exposition, ending with `# EOF`.
+        """
+        namespace = self.namespace
+        total = len(self.field_rows)
+        lines = [
+            f"# HELP {namespace}_ratio Share of schema fields used by at least one operation.",
+            f"# TYPE {namespace}_ratio gauge",
+            f"{namespace}_ratio {self.covered / total if total else 0.0}",
+            f"# HELP {namespace}_schema_fields Number of schema fields.",
+            f"# TYPE {namespace}_schema_fields gauge",
+            f"{namespace}_schema_fields {total}",
+            f"# HELP {namespace}_covered_fields Number of schema fields used by at least one operation.",
+            f"# TYPE {namespace}_covered_fields gauge",
+            f"{namespace}_covered_fields {self.covered}",
+        ]
+        if self.prefixes:
+            ratios, usages = [], []
+            for prefix, depth, fields, covered, usage in zip(self.prefixes, self.prefix_depths, self.prefix_fields,
+                                                             self.prefix_covered, self.prefix_usage):
+                labels = f'{{prefix="{_escape(prefix)}",depth="{depth}"}}'
+                ratios.append(f"{namespace}_prefix_ratio{labels} {covered / fields}")
+                usages.append(f"{namespace}_prefix_usage{labels} {usage}")
+            lines.append(f"# HELP {namespace}_prefix_ratio Share of the schema fields below a path prefix that are used.")
+            lines.append(f"# TYPE {namespace}_prefix_ratio gauge")
+            lines.extend(ratios)
+            lines.append(f"# HELP {namespace}_prefix_usage Usage of the schema fields below a path prefix.")
+            lines.append(f"# TYPE {namespace}_prefix_usage gauge")
+            lines.extend(usages)
+        if self.top_k > 0:
+            lines.append(f"# HELP {namespace}_field_usage Usage of the {self.top_k} most used schema fields.")
+            lines.append(f"# TYPE {namespace}_field_usage gauge")
+            for used_field, usage in heapq.nlargest(self.top_k, self.field_usage.items(), key=lambda item: (item[1], item[0])):
+                lines.append(f'{namespace}_field_usage{{field="{_escape(used_field)}"}} {usage}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_path: str):
+        """
+        Writes the current state atomically, so a scraper never reads a partially written file.
+
+        Args:
+            metrics_path (str): Path of the OpenMetrics text file, e.g. in the node exporter's textfile directory.
+        """
+        tmp_path = f"{metrics_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(self.render())
+        os.replace(tmp_path, metrics_path)
+
+
+if __name__ == "__main__":
+  def test_coverage_metrics_happy_path():
+      """
+      Tests that incremental updates match a batch update and that the exposition is bounded and well formed.
+      """
+      import tempfile
+
+      schema_fields = {"launches", "launches.id", "launches.rocket", "launches.rocket.name", "launches.rocket.type",
+                       "ships", "ships.name", 'ships.weird"name'}
+      field_usage = {"launches.id": 3, "launches.rocket.name": 2, "ships.name": 1, "unknown.field": 7}
+
+      batch = CoverageMetrics(schema_fields, max_depth=2, top_k=2)
+      batch.add_usage(field_usage)
+      incremental = CoverageMetrics(schema_fields, max_depth=2, top_k=2)
+      incremental.add_fields({"launches.id", "launches.rocket.name", "ships.name"})
+      incremental.add_usage({"launches.id": 2, "launches.rocket.name": 1})
+      assert incremental.render() == batch.render(), "Incremental updates must match a batch update."
+
+      text = batch.render()
+      assert "graphql_coverage_ratio 0.375\n" in text and "graphql_coverage_covered_fields 3\n" in text
+      assert 'graphql_coverage_prefix_ratio{prefix="launches",depth="1"} 0.4\n' in text
+      assert 'graphql_coverage_prefix_usage{prefix="launches",depth="1"} 5\n' in text
+      assert 'prefix="launches.rocket.name"' not in text, "Prefixes deeper than max_depth must not be reported."
+      assert text.count("graphql_coverage_field_usage{") == 2 and "unknown.field" not in text
+      assert 'prefix="ships.weird\\"name"' in text and text.endswith("# EOF\n")
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          metrics_path = os.path.join(tmp_dir, "graphql_coverage.prom")
+          batch.write(metrics_path)
+          with open(metrics_path) as file:
+              assert file.read() == text
+          assert os.listdir(tmp_dir) == ["graphql_coverage.prom"], "No temporary file must be left behind."
+
+      print("Test passed: Coverage metrics were updated incrementally and written as OpenMetrics text.")
+
+  test_coverage_metrics_happy_path()
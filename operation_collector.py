@@ -0,0 +1,369 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs
+from extract_fields import directive_variables
+
+class OperationCollector:
+    """
+    Records the GraphQL operation documents a server executes and appends them, deduplicated, to a JSONL file.
+
+    `record` only appends the raw request payload to a bounded queue, so the cost on the request path is a
+    single deque append. A background thread decodes the payloads, hashes each document, counts executions
+    and flushes one line per document and flush interval: `{"hash": ..., "count": ..., "time": ..., "document": ...}`,
+    where "document" is only written the first time a hash is flushed (or again after it was evicted from
+    the bounded table of known hashes).
+    """
+
+    def __init__(self, output_path: str, max_pending: int = 10000, max_documents: int = 100000,
+                 flush_interval: float = 1.0):
+        """
+        Args:
+            output_path (str): Path of the JSONL file the operations are appended to.
+            max_pending (int): Maximum number of payloads waiting to be processed. The oldest are dropped when full.
+            max_documents (int): Maximum number of document hashes remembered as already written.
+            flush_interval (float): Seconds between flushes of the background thread.
+        """
+        self.output_path = output_path
+        self.max_documents = max_documents
+        self.flush_interval = flush_interval
+        self._pending = deque(maxlen=max_pending)
+        self._written = OrderedDict()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="graphql-operation-collector", daemon=True)
+        self._thread.start()
+
+    def record(self, payload: bytes):
+        """
+        Queues the raw body of a GraphQL request (a JSON object, or a JSON array for batched requests).
+
+        Args:
+            payload (bytes): The request body.
+        """
+        self._pending.append(payload)
+
+    def _documents(self, payload: bytes):
+        try:
+            body = json.loads(payload)
+        except ValueError:
+            return
+        for request in body if isinstance(body, list) else [body]:
+            if isinstance(request, dict) and isinstance(request.get("query"), str):
+                variables = request.get("variables")
+                yield request["query"], variables if isinstance(variables, dict) else {}
+
+    def flush(self):
+        """Processes every queued payload and appends the new counts to the output file."""
+        with self._flush_lock:
+            counts = {}
+            documents = {}
+            names = {}
+            while self._pending:
+                for document, variables in self._documents(self._pending.popleft()):
+                    document_hash = hashlib.sha256(document.encode()).hexdigest()
+                    if document_hash not in names:
+                        known = self._written.get(document_hash)
+                        names[document_hash] = known if known is not None else directive_variables(document)
+                    key = (document_hash, tuple((name, json.dumps(variables[name])) for name in names[document_hash]
+                                                if name in variables))
+                    counts[key] = counts.get(key, 0) + 1
+                    if key not in documents:
+                        documents[key] = document, {name: variables[name] for name in names[document_hash] if name in variables}
+            if not counts:
+                return
+
+            lines = []
+            flush_time = time.time()
+            for key, count in counts.items():
+                document_hash = key[0]
+                document, variables = documents[key]
+                line = {"hash": document_hash, "count": count, "time": flush_time}
+                if variables:
+                    line["variables"] = variables
+                if document_hash in self._written:
+                    self._written.move_to_end(document_hash)
+                else:
+                    line["document"] = document
+                    # The directive variables of known documents are kept, so they are not searched for again
+                    self._written[document_hash] = names[document_hash]
+                    if len(self._written) > self.max_documents:
+                        self._written.popitem(last=False)
+                lines.append(json.dumps(line) + "\n")
+            with open(self.output_path, "a") as file:
+                file.writelines(lines)
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stops the background thread and flushes what is still queued."""
+        self._stopped.set()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class _RecordingInput:
+    """
+    Wraps a `wsgi.input` of unknown length (e.g. a chunked upload) and records the body once the application read it to the end.
+    """
+
+    def __init__(self, stream, collector: OperationCollector):
+        self.stream = stream
+        self.collector = collector
+        self.chunks = []
+        self.recorded = False
+
+    def _tee(self, data: bytes, at_end: bool) -> bytes:
+        if not self.recorded:
+            self.chunks.append(data)
+            if at_end:
+                self.recorded = True
+                self.collector.record(b"".join(self.chunks))
+                self.chunks = None
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read() if size is None or size < 0 else self.stream.read(size)
+        return self._tee(data, not data or size is None or size < 0)
+
+    def readline(self, size: int = -1) -> bytes:
+        data = self.stream.readline() if size is None or size < 0 else self.stream.readline(size)
+        return self._tee(data, not data)
+
+    def readlines(self, hint: int = -1) -> list:
+        return list(iter(self.readline, b""))
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+class GraphQLCollectorWSGIMiddleware:
+    """
+    WSGI middleware that records the operations sent to a GraphQL endpoint, then passes the request on unchanged.
+
+    A body with a Content-Length is read up front; a body without one (e.g. a chunked upload) is passed through
+    and recorded as the application reads it, once it reached the end.
+    """
+
+    def __init__(self, app, collector: OperationCollector, path: str = "/graphql"):
+        self.app = app
+        self.collector = collector
+        self.path = path
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") == self.path:
+            method = environ.get("REQUEST_METHOD")
+            if method == "POST":
+                if environ.get("CONTENT_LENGTH"):
+                    body = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+                    environ["wsgi.input"] = io.BytesIO(body)
+                    self.collector.record(body)
+                else:
+                    environ["wsgi.input"] = _RecordingInput(environ["wsgi.input"], self.collector)
+            elif method == "GET":
+                query = parse_qs(environ.get("QUERY_STRING", "")).get("query")
+                if query:
+                    self.collector.record(json.dumps({"query": query[0]}).encode())
+        return self.app(environ, start_response)
+
+class GraphQLCollectorASGIMiddleware:
+    """
+    ASGI middleware that records the operations sent to a GraphQL endpoint while the body streams through.
+    """
+
+    def __init__(self, app, collector: OperationCollector, path: str = "/graphql"):
+        self.app = app
+        self.collector = collector
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        if scope.get("method") == "GET":
+            query = parse_qs(scope.get("query_string", b"").decode()).get("query")
+            if query:
+                self.collector.record(json.dumps({"query": query[0]}).encode())
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.collector.record(b"".join(chunks))
+            return message
+
+        await self.app(scope, recording_receive, send)
+
+def load_collected_operations(operations_path: str, with_variables: bool = False) -> list:
+    """
+    Loads the operations written by an `OperationCollector` as query inputs for `parse_queries_and_extract_fields`.
+
+    Args:
+        operations_path (str): Path of the JSONL file written by the collector.
+        with_variables (bool): If True, returns one entry per distinct document and combination of its directive
+                               variables, with the variables as a third element, so `@skip`/`@include` are evaluated.
+
+    Returns:
+        list: A list of (name, document) tuples, one per distinct document, where the name is `collected:<hash>`,
+              or (name, document, variables) tuples with `with_variables`.
+    """
+    documents = {}
+    variable_sets = {}
+    with open(operations_path, "r") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "document" in entry:
+                documents.setdefault(entry["hash"], entry["document"])
+            if with_variables:
+                variables = entry.get("variables", {})
+                variable_sets.setdefault((entry["hash"], json.dumps(variables, sort_keys=True)), variables)
+    if with_variables:
+        return [(f"collected:{document_hash}", documents[document_hash], variables)
+                for (document_hash, _), variables in variable_sets.items() if document_hash in documents]
+    return [(f"collected:{document_hash}", document) for document_hash, document in documents.items()]
+
+def iter_collected_operations(operations_path: str):
+    """
+    Lazily yields the lines written by an `OperationCollector` with their execution counts.
+
+    Unlike `load_collected_operations`, every line is yielded, so the counts add up to the recorded traffic.
+    Only the documents are kept, to resolve the lines that refer to an earlier document by its hash.
+
+    Args:
+        operations_path (str): Path of the JSONL file written by the collector.
+
+    Yields:
+        tuple: The name `collected:<hash>`, the document and the number of executions the line records.
+               Lines whose document was never written are skipped.
+    """
+    documents = {}
+    with open(operations_path, "r") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "document" in entry:
+                documents.setdefault(entry["hash"], entry["document"])
+            document = documents.get(entry["hash"])
+            if document is not None:
+                yield f"collected:{entry['hash']}", document, entry.get("count", 1)
+
+
+if __name__ == "__main__":
+  def test_operation_collector_happy_path():
+      """
+      Tests that both middlewares record operations and that the collected file feeds the extraction pipeline.
+      """
+      import asyncio
+      import os
+      import tempfile
+      from parse_queries_and_extract_fields import parse_queries_and_extract_fields
+
+      def wsgi_app(environ, start_response):
+          body = environ["wsgi.input"].read()
+          start_response("200 OK", [("Content-Type", "application/json")])
+          return [body]
+
+      async def asgi_app(scope, receive, send):
+          body = b""
+          while True:
+              message = await receive()
+              body += message.get("body", b"")
+              if not message.get("more_body"):
+                  break
+          await send({"type": "http.response.start", "status": 200, "headers": []})
+          await send({"type": "http.response.body", "body": body})
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          operations_path = os.path.join(tmp_dir, "operations.jsonl")
+          with OperationCollector(operations_path, flush_interval=60) as collector:
+              wsgi = GraphQLCollectorWSGIMiddleware(wsgi_app, collector)
+              body = json.dumps({"query": "query { book { title } }"}).encode()
+              for _ in range(3):
+                  response = wsgi({"PATH_INFO": "/graphql", "REQUEST_METHOD": "POST", "CONTENT_LENGTH": str(len(body)),
+                                   "wsgi.input": io.BytesIO(body)}, lambda status, headers: None)
+                  assert b"".join(response) == body, "The application must still see the request body."
+
+              # Without a Content-Length (a chunked upload), the body streams through and is recorded once read
+              def chunked_app(environ, start_response):
+                  start_response("200 OK", [("Content-Type", "application/json")])
+                  return [b"".join(iter(lambda: environ["wsgi.input"].read(7), b""))]
+
+              response = GraphQLCollectorWSGIMiddleware(chunked_app, collector)(
+                  {"PATH_INFO": "/graphql", "REQUEST_METHOD": "POST", "wsgi.input": io.BytesIO(body)},
+                  lambda status, headers: None)
+              assert b"".join(response) == body, "A body without Content-Length must be passed through unchanged."
+
+              asgi = GraphQLCollectorASGIMiddleware(asgi_app, collector)
+              messages = [{"type": "http.request", "body": b'[{"query": "query { book ', "more_body": True},
+                          {"type": "http.request", "body": b'{ isbn } }"}]', "more_body": False}]
+
+              async def receive():
+                  return messages.pop(0)
+
+              async def send(message):
+                  pass
+
+              asyncio.run(asgi({"type": "http", "path": "/graphql", "method": "POST"}, receive, send))
+              collector.flush()
+              collector.record(body)
+
+          with open(operations_path, "r") as file:
+              lines = [json.loads(line) for line in file]
+          assert sum(line["count"] for line in lines) == 6, f"Unexpected counts: {lines}"
+          assert sum("document" in line for line in lines) == 2, "Each document must be written once."
+          collected = list(iter_collected_operations(operations_path))
+          assert sum(count for _, _, count in collected) == 6 and len({name for name, _, _ in collected}) == 2
+
+          field_usage, used_fields = parse_queries_and_extract_fields(load_collected_operations(operations_path), only_leafs=True)
+          assert used_fields == {"book.title", "book.isbn"}, f"Unexpected fields: {used_fields}"
+
+      print("Test passed: Operation collector recorded, deduplicated and replayed executed operations.")
+
+  def test_operation_collector_directive_variables():
+      """
+      Tests that executions are counted per directive variable combination and replayed with @skip/@include applied.
+      """
+      import os
+      import tempfile
+      from parse_queries_and_extract_fields import parse_queries_with_metrics
+
+      query = "query Book($brief: Boolean!, $id: ID) { book(id: $id) { title isbn @skip(if: $brief) } }"
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          operations_path = os.path.join(tmp_dir, "operations.jsonl")
+          with OperationCollector(operations_path, flush_interval=60) as collector:
+              for i in range(1000):
+                  collector.record(json.dumps({"query": query, "variables": {"brief": i % 10 != 0, "id": str(i)}}).encode())
+
+          with open(operations_path, "r") as file:
+              lines = [json.loads(line) for line in file]
+          assert sorted((line["variables"]["brief"], line["count"]) for line in lines) == [(False, 100), (True, 900)]
+          assert all("id" not in line["variables"] for line in lines), "Variables not deciding directives must not be written."
+
+          queries = load_collected_operations(operations_path, with_variables=True)
+          field_usage, used_fields, _ = parse_queries_with_metrics(queries * 1000, only_leafs=True)
+          assert len(queries) == 2 and field_usage["book.title"] == 2000 and field_usage["book.isbn"] == 1000
+          _, used_fields, _ = parse_queries_with_metrics([queries[0][:2] + ({"brief": True},)], only_leafs=True)
+          assert used_fields == {"book.title"}, f"Skipped fields must not be used: {used_fields}"
+
+      print("Test passed: Directive variables were collected and @skip/@include evaluated per combination.")
+
+  test_operation_collector_happy_path()
+  test_operation_collector_directive_variables()
@@ -0,0 +1,120 @@
+from graphql.language.ast import FieldNode, IntValueNode
+from extract_fields import OperationVisitor
+
+# Arguments that limit the length of a returned list, as used by common pagination conventions
+LIST_SIZE_ARGUMENTS = ("first", "last", "limit", "take", "pageSize")
+
+class DepthVisitor(OperationVisitor):
+    """Measures the nesting depth of an operation: 1 for an operation that only selects root fields."""
+
+    def __init__(self):
+        self.depth = 0
+
+    def enter_field(self, field, path, depth, has_subfields):
+        self.depth = max(self.depth, depth)
+
+    def result(self) -> dict:
+        return {"depth": self.depth}
+
+class BreadthVisitor(OperationVisitor):
+    """Measures the breadth of an operation: the largest number of fields selected directly under one field."""
+
+    def __init__(self):
+        self.counts = [0]
+        self.breadth = 0
+
+    def enter_field(self, field, path, depth, has_subfields):
+        self.counts[-1] += 1
+        self.counts.append(0)
+
+    def leave_field(self, field, path, depth, has_subfields):
+        self.breadth = max(self.breadth, self.counts.pop())
+
+    def result(self) -> dict:
+        return {"breadth": max(self.breadth, self.counts[0])}
+
+class AliasVisitor(OperationVisitor):
+    """Counts the aliased fields of an operation."""
+
+    def __init__(self):
+        self.aliases = 0
+
+    def enter_field(self, field, path, depth, has_subfields):
+        if field.alias is not None:
+            self.aliases += 1
+
+    def result(self) -> dict:
+        return {"aliases": self.aliases}
+
+class CostVisitor(OperationVisitor):
+    """
+    Estimates the cost of an operation as the number of fields it may resolve.
+
+    Every field costs 1, multiplied by the list sizes requested by its ancestors through literal pagination
+    arguments such as `first: 10`. Lists without a literal size count as a single item.
+    """
+
+    def __init__(self):
+        self.multipliers = [1]
+        self.cost = 0
+
+    def enter_field(self, field: FieldNode, path, depth, has_subfields):
+        multiplier = self.multipliers[-1]
+        self.cost += multiplier
+        if has_subfields:
+            for argument in field.arguments or ():
+                if argument.name.value in LIST_SIZE_ARGUMENTS and isinstance(argument.value, IntValueNode):
+                    multiplier *= max(int(argument.value.value), 1)
+                    break
+            self.multipliers.append(multiplier)
+
+    def leave_field(self, field, path, depth, has_subfields):
+        if has_subfields:
+            self.multipliers.pop()
+
+    def result(self) -> dict:
+        return {"cost": self.cost}
+
+# The metrics written to the operations report, in column order
+DEFAULT_METRICS = (DepthVisitor, BreadthVisitor, AliasVisitor, CostVisitor)
+
+
+if __name__ == "__main__":
+  def test_operation_metrics_happy_path():
+      """
+      Tests every metric on an operation with fragments, aliases and pagination arguments.
+      """
+      from graphql import parse
+      from extract_fields import FieldPathVisitor, walk_operation
+
+      document = parse("""
+      query Launches {
+          latest: launchLatest { mission_name }
+          launches(limit: 5) {
+              ...LaunchDetails
+              rocket { rocket_name rocket_type }
+          }
+      }
+
+      fragment LaunchDetails on Launch {
+          id
+          mission_name
+          site: launch_site { site_name }
+      }
+      """)
+      operation = document.definitions[0]
+      fragments = {"LaunchDetails": document.definitions[1]}
+
+      field_paths = FieldPathVisitor(only_leafs=True)
+      visitors = [field_paths] + [metric() for metric in DEFAULT_METRICS]
+      walk_operation(operation, fragments, visitors)
+
+      metrics = {}
+      for visitor in visitors[1:]:
+          metrics.update(visitor.result())
+      assert "launches.launch_site.site_name" in field_paths.fields
+      assert metrics == {"depth": 3, "breadth": 4, "aliases": 2, "cost": 2 + 1 + 5 * 7}, f"Unexpected metrics: {metrics}"
+
+      print("Test passed: Operation metrics were computed in the same traversal as the field paths.")
+
+  test_operation_metrics_happy_path()
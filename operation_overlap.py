@@ -0,0 +1,263 @@
+from array import array
+from typing import Dict, List
+import numpy as np
+
+# MinHash signature length, split into LSH bands of `MINHASH_ROWS` values each
+MINHASH_PERMUTATIONS = 64
+MINHASH_ROWS = 4
+# Buckets holding more field sets than this are compared within a sliding window of sets of similar size only
+MAX_BUCKET_SIZE = 64
+BUCKET_WINDOW = 8
+_PRIME = (1 << 31) - 1
+
+class OperationFieldMatrix:
+    """
+    The fields selected by every operation, as a sparse operation x field matrix in CSR form.
+
+    Row `i` holds the sorted IDs of the fields of operation `i` in `indices[indptr[i]:indptr[i + 1]]`; `fields`
+    maps IDs back to hierarchical field names, and `files` and `operations` label the rows. Rows are appended
+    while the queries are parsed (see `parse_queries_with_metrics`), at a few bytes per selected field.
+    """
+
+    def __init__(self):
+        self.fields: List[str] = []
+        self.field_ids: Dict[str, int] = {}
+        self.indptr = array('q', [0])
+        self.indices = array('i')
+        self.files: List[str] = []
+        self.operations: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def add(self, file_path: str, operation: str, used_fields: set):
+        """
+        Appends the row of one operation.
+
+        Args:
+            file_path (str): The file (or collected operation) the operation comes from.
+            operation (str): The operation's name.
+            used_fields (set): The hierarchical fields the operation uses.
+        """
+        field_ids = self.field_ids
+        ids = []
+        for used_field in used_fields:
+            field_id = field_ids.get(used_field)
+            if field_id is None:
+                field_id = field_ids[used_field] = len(self.fields)
+                self.fields.append(used_field)
+            ids.append(field_id)
+        ids.sort()
+        self.indices.extend(ids)
+        self.indptr.append(len(self.indices))
+        self.files.append(file_path)
+        self.operations.append(operation)
+
+    def row(self, i: int) -> set:
+        """Returns the field names of row `i`."""
+        return {self.fields[field_id] for field_id in self.indices[self.indptr[i]:self.indptr[i + 1]]}
+
+def _distinct_rows(matrix: OperationFieldMatrix) -> tuple:
+    # Groups operations selecting exactly the same fields; empty rows are left out
+    indptr = np.frombuffer(matrix.indptr, dtype=np.int64)
+    indices = np.frombuffer(matrix.indices, dtype=np.int32)
+    groups = {}
+    for i in range(len(matrix)):
+        if indptr[i + 1] > indptr[i]:
+            groups.setdefault(indices[indptr[i]:indptr[i + 1]].tobytes(), []).append(i)
+    members = list(groups.values())
+    sets = [np.frombuffer(key, dtype=np.int32) for key in groups]
+    return members, sets
+
+def _minhash_signatures(sets: list, permutations: int, seed: int) -> np.ndarray:
+    lengths = np.fromiter((len(ids) for ids in sets), dtype=np.int64, count=len(sets))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ids = np.concatenate(sets).astype(np.uint64)
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=permutations, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=permutations, dtype=np.uint64)
+    signatures = np.empty((len(sets), permutations), dtype=np.uint32)
+    for k in range(permutations):
+        signatures[:, k] = np.minimum.reduceat((a[k] * ids + b[k]) % _PRIME, starts)
+    return signatures
+
+def find_redundant_operations(matrix: OperationFieldMatrix, threshold: float = 0.9, seed: int = 0) -> list:
+    """
+    Finds operations that select nothing beyond what another operation already selects, or nearly so.
+
+    Operations with identical field sets are grouped first, so each distinct set is compared once.
+    - Subsets: the operations containing every field of a set are found by intersecting the sorted posting
+      lists of its fields, rarest first, so a set is only ever compared with operations sharing its rarest field.
+      Each set is reported against its smallest strict superset.
+    - Near-duplicates: candidate pairs come from locality-sensitive hashing of MinHash signatures (bands of
+      `MINHASH_ROWS` values), and their exact Jaccard similarity is checked.
+    Neither step compares all pairs, so this scales to hundreds of thousands of operations.
+
+    Args:
+        matrix (OperationFieldMatrix): The fields of every operation.
+        threshold (float): Minimum Jaccard similarity of near-duplicates.
+        seed (int): Seed of the MinHash permutations.
+
+    Returns:
+        list: One dict per redundant operation with the keys 'File', 'Operation', 'Relation' ('duplicate',
+              'subset' or 'near-duplicate'), 'Other File', 'Other Operation', 'Fields', 'Other Fields' and
+              'Jaccard'. The other operation is the one it duplicates or is contained in; of two near-duplicates,
+              the one with fewer fields is reported. Duplicates are only reported as such, while the first
+              operation of their group also stands for them in the subset and near-duplicate relations.
+    """
+    members, sets = _distinct_rows(matrix)
+    rows = []
+
+    def report(i: int, other: int, relation: str, fields: int, other_fields: int, jaccard: float):
+        rows.append({'File': matrix.files[i], 'Operation': matrix.operations[i], 'Relation': relation,
+                     'Other File': matrix.files[other], 'Other Operation': matrix.operations[other],
+                     'Fields': fields, 'Other Fields': other_fields, 'Jaccard': jaccard})
+
+    for group in members:
+        for i in group[1:]:
+            size = int(matrix.indptr[i + 1] - matrix.indptr[i])
+            report(i, group[0], 'duplicate', size, size, 1.0)
+    if not sets:
+        return rows
+
+    # Posting lists: the distinct sets containing each field, in ascending order. Field IDs are dense and every
+    # field occurs in some row, so a field's posting list is found by its ID
+    lengths = np.fromiter((len(ids) for ids in sets), dtype=np.int64, count=len(sets))
+    all_ids = np.concatenate(sets)
+    order = np.argsort(all_ids, kind='stable')
+    posting_owners = np.repeat(np.arange(len(sets), dtype=np.int64), lengths)[order]
+    posting_bounds = np.searchsorted(all_ids[order], np.arange(len(matrix.fields) + 1))
+    frequency = np.diff(posting_bounds)
+
+    # A set whose rarest field no other set selects cannot be a subset
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    rarest = np.minimum.reduceat(frequency[all_ids], starts)
+
+    subset_pairs = set()
+    for s in np.flatnonzero(rarest > 1).tolist():
+        ids = sets[s]
+        postings = ids[np.argsort(frequency[ids], kind='stable')]
+        candidates = posting_owners[posting_bounds[postings[0]]:posting_bounds[postings[0] + 1]]
+        for field_id in postings[1:]:
+            if len(candidates) <= 1:
+                break
+            # Keeps the candidates that also contain this field
+            posting = posting_owners[posting_bounds[field_id]:posting_bounds[field_id + 1]]
+            positions = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+            candidates = candidates[posting[positions] == candidates]
+        candidates = candidates[candidates != s]
+        if len(candidates):
+            superset = int(candidates[np.argmin(lengths[candidates])])
+            subset_pairs.add((s, superset))
+            report(members[s][0], members[superset][0], 'subset', int(lengths[s]), int(lengths[superset]),
+                   float(lengths[s] / lengths[superset]))
+
+    signatures = _minhash_signatures(sets, MINHASH_PERMUTATIONS, seed).astype(np.uint64)
+    candidate_pairs = set()
+    for band in range(0, MINHASH_PERMUTATIONS, MINHASH_ROWS):
+        # One 64-bit key per band; sets colliding by chance only add candidates, which are verified below
+        keys = np.zeros(len(sets), dtype=np.uint64)
+        for k in range(band, band + MINHASH_ROWS):
+            keys = keys * np.uint64(0x9E3779B97F4A7C15) + signatures[:, k]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        bounds = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1], [True])))
+        shared = np.flatnonzero(np.diff(bounds) > 1)
+        for start, end in zip(bounds[shared].tolist(), bounds[shared + 1].tolist()):
+            bucket = order[start:end].tolist()
+            if len(bucket) > MAX_BUCKET_SIZE:
+                bucket.sort(key=lambda s: lengths[s])
+                window = BUCKET_WINDOW
+            else:
+                window = len(bucket)
+            for x, first in enumerate(bucket):
+                for second in bucket[x + 1:x + window]:
+                    candidate_pairs.add((first, second) if first < second else (second, first))
+
+    # Shared fields of every candidate pair at once: each field of the first set is looked up in the second,
+    # with the (set, field) keys of all sets concatenated in ascending order
+    contained = {frozenset(pair) for pair in subset_pairs}
+    pairs = np.array([pair for pair in sorted(candidate_pairs) if frozenset(pair) not in contained], dtype=np.int64).reshape(-1, 2)
+    firsts, seconds = pairs[:, 0], pairs[:, 1]
+    field_count = np.int64(len(matrix.fields))
+    set_keys = np.repeat(np.arange(len(sets), dtype=np.int64), lengths) * field_count + all_ids
+    first_lengths = lengths[firsts]
+    pair_of = np.repeat(np.arange(len(pairs)), first_lengths)
+    # Position of the j-th field of a pair's first set: its start plus j
+    offsets = np.arange(pair_of.size) - np.repeat(np.cumsum(first_lengths) - first_lengths, first_lengths)
+    first_ids = all_ids[np.repeat(starts[firsts], first_lengths) + offsets]
+    queries = seconds[pair_of] * field_count + first_ids
+    found = set_keys[np.minimum(np.searchsorted(set_keys, queries), len(set_keys) - 1)] == queries
+    shared = np.bincount(pair_of, weights=found, minlength=len(pairs)).astype(np.int64)
+    jaccard = shared / (lengths[firsts] + lengths[seconds] - shared)
+    # Subsets are reported against their smallest superset already
+    near = (jaccard >= threshold) & (shared != lengths[firsts]) & (shared != lengths[seconds])
+    for first, second, similarity in zip(firsts[near].tolist(), seconds[near].tolist(), jaccard[near].tolist()):
+        # Of two sets of the same size, the one first seen later is reported
+        smaller, larger = sorted((first, second), key=lambda s: (lengths[s], -members[s][0]))
+        report(members[smaller][0], members[larger][0], 'near-duplicate', int(lengths[smaller]), int(lengths[larger]),
+               similarity)
+    return rows
+
+
+if __name__ == "__main__":
+  def test_find_redundant_operations_happy_path():
+      """
+      Tests that duplicates, subsets and near-duplicates are found, and that disjoint operations are not reported.
+      """
+      matrix = OperationFieldMatrix()
+      wide = {f"launches.f{i}" for i in range(20)}
+      matrix.add("a.graphql", "Wide", wide)
+      matrix.add("b.graphql", "WideAgain", wide)
+      matrix.add("c.graphql", "Narrow", {"launches.f0", "launches.f1"})
+      matrix.add("d.graphql", "Similar", (wide - {"launches.f19"}) | {"launches.extra"})
+      matrix.add("e.graphql", "Ships", {"ships.name", "ships.id"})
+      matrix.add("f.graphql", "Empty", set())
+      assert matrix.row(2) == {"launches.f0", "launches.f1"} and len(matrix) == 6
+
+      rows = {(row['Operation'], row['Relation']): row for row in find_redundant_operations(matrix, threshold=0.8)}
+      assert set(rows) == {("WideAgain", "duplicate"), ("Narrow", "subset"), ("Similar", "near-duplicate")}, f"Unexpected rows: {rows}"
+      assert rows[("Narrow", "subset")]['Other Operation'] == "Wide" and rows[("Narrow", "subset")]['Jaccard'] == 0.1
+      assert rows[("Similar", "near-duplicate")]['Other Operation'] == "Wide"
+      assert abs(rows[("Similar", "near-duplicate")]['Jaccard'] - 19 / 21) < 1e-9
+
+      print("Test passed: Redundant and overlapping operations were found from the field matrix.")
+
+  def test_field_matrix_from_parsed_queries():
+      """
+      Tests that parsing fills one matrix row per operation, including operations of the same document.
+      """
+      from parse_queries_and_extract_fields import parse_queries_with_metrics
+
+      matrix = OperationFieldMatrix()
+      queries = [("a.graphql", "query Books { book { title isbn } } query Titles { book { title } }"),
+                 ("b.graphql", "query Again { book { isbn title } }"),
+                 ("broken.graphql", "query { book {")]
+      parse_queries_with_metrics(queries, only_leafs=True, field_matrix=matrix)
+      assert matrix.operations == ["Books", "Titles", "Again"] and matrix.files == ["a.graphql", "a.graphql", "b.graphql"]
+      assert matrix.row(0) == matrix.row(2) == {"book.title", "book.isbn"}
+      relations = {(row['Operation'], row['Relation'], row['Other Operation']) for row in find_redundant_operations(matrix)}
+      assert relations == {("Again", "duplicate", "Books"), ("Titles", "subset", "Books")}, f"Unexpected relations: {relations}"
+      print("Test passed: The field matrix was filled while the queries were parsed.")
+
+  def test_find_redundant_operations_scale():
+      """
+      Tests that 100k operations are analysed without comparing all pairs.
+      """
+      import random
+      import time
+
+      rng = random.Random(0)
+      matrix = OperationFieldMatrix()
+      for i in range(100000):
+          root = f"root{rng.randrange(2000)}"
+          matrix.add(f"q{i}.graphql", f"Op{i}", {f"{root}.f{rng.randrange(40)}" for _ in range(rng.randint(3, 30))})
+      start = time.perf_counter()
+      rows = find_redundant_operations(matrix)
+      elapsed = time.perf_counter() - start
+      assert rows and all(row['Relation'] in ('duplicate', 'subset', 'near-duplicate') for row in rows)
+      print(f"Test passed: 100k operations analysed in {elapsed:.1f}s ({len(rows)} redundant).")
+
+  test_find_redundant_operations_happy_path()
+  test_field_matrix_from_parsed_queries()
+  test_find_redundant_operations_scale()
@@ -1,46 +1,175 @@
 # /Users/gp/Library/CloudStorage/Dropbox/downloads/agile_actors/projs/msTests/GraphQLClients/spaceXplayground/coverage.ipynb
+import hashlib
 from collections import defaultdict
 from graphql import parse, DocumentNode, OperationDefinitionNode, FragmentDefinitionNode
-from extract_fields import extract_fields
-def parse_queries_and_extract_fields(queries: list, only_leafs: bool = False) -> tuple[defaultdict, set]:
+from extract_fields import FieldPathVisitor, directive_variables, walk_operation
+from path_filter import PathFilter
+
+def analyze_document(query_str: str, only_leafs: bool = False, path_filter: PathFilter = None, metrics: tuple = (),
+                     variables: dict = None, no_location: bool = False, operation_fields: list = None) -> tuple[set, list]:
     """
-    Parses a list of GraphQL query strings and extracts hierarchical field usage information.
+    Parses one GraphQL query document and walks each of its operations once, collecting the used fields
+    and running the given metric visitors in the same traversal.
 
     Args:
-        queries (list): A list of tuples, each containing a file path and a GraphQL query string.
+        query_str (str): A GraphQL query document.
         only_leafs (bool): If True, only includes fields without sub-fields (leaf nodes).
-                           If False, includes all fields.
+        path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
+        metrics (tuple): `OperationVisitor` classes (see `operation_metrics.DEFAULT_METRICS`), instantiated per operation.
+        variables (dict, optional): The variables of a request executing the document. If given, `@skip`/`@include`
+                                    directives are applied (see `walk_operation`).
+        no_location (bool): If True, the document is parsed without source locations, which are never used here.
+        operation_fields (list, optional): If given, `(operation name, fields)` is appended for each operation,
+                                           with the frozenset of the fields it uses.
 
     Returns:
-        tuple[defaultdict, set]: A tuple containing:
-            - defaultdict: A dictionary where keys are hierarchical field names and values are the count of how many GraphQL files each field is used in.
-            - set: A set of all unique hierarchical field names used across all queries.
+        tuple[set, list]: The hierarchical field names used by the document, and one dict per operation with
+                          its name under 'Operation' and the results of the metric visitors.
+
+    Raises:
+        graphql.error.GraphQLError: If the document cannot be parsed or its fragments are cyclic.
+    """
+    document = parse(query_str, no_location=no_location)
+    # Extract fragments from the current document
+    fragments = {definition.name.value: definition 
+                 for definition in document.definitions 
+                 if isinstance(definition, FragmentDefinitionNode)}
+    used_fields = set()
+    operations = []
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            field_paths = FieldPathVisitor(only_leafs=only_leafs, path_filter=path_filter)
+            metric_visitors = [metric() for metric in metrics]
+            walk_operation(definition, fragments, [field_paths, *metric_visitors], path_filter=path_filter, variables=variables)
+            used_fields.update(field_paths.fields)
+            name = definition.name.value if definition.name else "(anonymous)"
+            if operation_fields is not None:
+                operation_fields.append((name, frozenset(field_paths.fields)))
+            if metrics:
+                operation = {'Operation': name}
+                for visitor in metric_visitors:
+                    operation.update(visitor.result())
+                operations.append(operation)
+    return used_fields, operations
+
+def extract_document_fields(query_str: str, only_leafs: bool = False, path_filter: PathFilter = None) -> set:
+    """
+    Parses one GraphQL query document and extracts the unique hierarchical fields used by its operations.
+
+    Args:
+        query_str (str): A GraphQL query document.
+        only_leafs (bool): If True, only includes fields without sub-fields (leaf nodes).
+        path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
+
+    Returns:
+        set: The hierarchical field names used by the document.
+
+    Raises:
+        graphql.error.GraphQLError: If the document cannot be parsed or its fragments are cyclic.
+    """
+    return analyze_document(query_str, only_leafs=only_leafs, path_filter=path_filter)[0]
+
+def parse_queries_with_metrics(queries: list, only_leafs: bool = False, path_filter: PathFilter = None,
+                               metrics: tuple = (), low_memory: bool = False, field_matrix=None,
+                               casefold_usage: bool = False) -> tuple[defaultdict, set, list]:
+    """
+    Like `parse_queries_and_extract_fields`, and also computes per-operation metrics in the same traversal.
+
+    Queries may carry the variables of the request as a third tuple element (see `load_collected_operations`),
+    in which case `@skip`/`@include` directives are evaluated. Their results are memoised per document and
+    signature of the variables those directives depend on, so requests sharing a document and a directive
+    combination are parsed and walked once.
+
+    Args:
+        queries (list): A list (or any iterable, e.g. `iter_queries`) of tuples, each containing a file path and a GraphQL query string,
+                        and optionally the request variables.
+        only_leafs (bool): If True, only includes fields without sub-fields (leaf nodes).
+        path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
+        metrics (tuple): `OperationVisitor` classes run on every operation.
+        low_memory (bool): If True, documents are parsed without source locations, and the memoised results are
+                           keyed by a digest of each document instead of its text, so no text outlives its analysis.
+        field_matrix (OperationFieldMatrix, optional): If given, the fields of every operation are added to it as a row
+                                                       (see `operation_overlap`). A document evaluated several times
+                                                       with the same directive signature adds its rows once.
+        casefold_usage (bool): If True, fields of a file that differ only in case are counted once, under one of their
+                               casings, so that `fold_field_usage` counts each folded field once per file.
+
+    Returns:
+        tuple[defaultdict, set, list]: The field usage, the used fields, and one dict per operation with its
+                                       'File', 'Operation' and metric values.
     """
     field_usage = defaultdict(int)
     used_fields = set()
+    operation_metrics = []
+
+    signature_variables = {}
+    evaluated = {}
 
-    for file_path, query_str in queries:
-        # Temporary set to hold unique fields per file
-        temp_used_fields = set()
+    for query in queries:
+        file_path, query_str = query[0], query[1]
+        variables = query[2] if len(query) > 2 else None
         try:
-            document = parse(query_str)
-            # Extract fragments from the current document
-            fragments = {definition.name.value: definition 
-                         for definition in document.definitions 
-                         if isinstance(definition, FragmentDefinitionNode)}
-            for definition in document.definitions:
-                if isinstance(definition, OperationDefinitionNode):
-                    fields = extract_fields(definition, fragments, only_leafs=only_leafs)
-                    temp_used_fields.update(fields)
+            operation_fields = [] if field_matrix is not None else None
+            if variables is None:
+                # Temporary set to hold unique fields per file
+                temp_used_fields, operations = analyze_document(query_str, only_leafs=only_leafs, path_filter=path_filter,
+                                                                metrics=metrics, no_location=low_memory,
+                                                                operation_fields=operation_fields)
+            else:
+                document_key = hashlib.blake2b(query_str.encode(), digest_size=16).digest() if low_memory else query_str
+                names = signature_variables.get(document_key)
+                if names is None:
+                    names = signature_variables[document_key] = directive_variables(query_str)
+                # Directives only test `is True`; missing variables fall back to the operation's defaults
+                key = (document_key, tuple(variables[name] is True if name in variables else None for name in names))
+                result = evaluated.get(key)
+                if result is None:
+                    result = evaluated[key] = analyze_document(query_str, only_leafs=only_leafs, path_filter=path_filter,
+                                                               metrics=metrics, variables=variables, no_location=low_memory,
+                                                               operation_fields=operation_fields)
+                else:
+                    operation_fields = None
+                temp_used_fields, operations = result
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
             continue  # Skip this query if there's a parsing error
 
         # Increment field usage counts based on unique fields in this file
-        for field in temp_used_fields:
-            field_usage[field] += 1
-            used_fields.add(field)
+        if casefold_usage:
+            folded_fields = set()
+            for field in temp_used_fields:
+                folded = field.casefold()
+                if folded not in folded_fields:
+                    folded_fields.add(folded)
+                    field_usage[field] += 1
+            used_fields.update(temp_used_fields)
+        else:
+            for field in temp_used_fields:
+                field_usage[field] += 1
+                used_fields.add(field)
+        operation_metrics.extend({'File': file_path, **operation} for operation in operations)
+        if operation_fields:
+            for name, fields in operation_fields:
+                field_matrix.add(file_path, name, fields)
+
+    return field_usage, used_fields, operation_metrics
+
+def parse_queries_and_extract_fields(queries: list, only_leafs: bool = False, path_filter: PathFilter = None) -> tuple[defaultdict, set]:
+    """
+    Parses a list of GraphQL query strings and extracts hierarchical field usage information.
+
+    Args:
+        queries (list): A list (or any iterable, e.g. `iter_queries`) of tuples, each containing a file path and a GraphQL query string.
+        only_leafs (bool): If True, only includes fields without sub-fields (leaf nodes).
+                           If False, includes all fields.
+        path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
 
+    Returns:
+        tuple[defaultdict, set]: A tuple containing:
+            - defaultdict: A dictionary where keys are hierarchical field names and values are the count of how many GraphQL files each field is used in.
+            - set: A set of all unique hierarchical field names used across all queries.
+    """
+    field_usage, used_fields, _ = parse_queries_with_metrics(queries, only_leafs=only_leafs, path_filter=path_filter)
     return field_usage, used_fields
 
 if __name__ == "__main__":
@@ -1,10 +1,12 @@
 from load_schema import load_schema
 from extract_root_types import extract_root_types
 from get_schema_fields import get_schema_fields
+from path_filter import PathFilter
 from graphql import parse, DocumentNode
 import os
 
-def parse_schema(schema_path: str, only_leafs: bool = False) -> set:
+def parse_schema(schema_path: str, only_leafs: bool = False, path_filter: PathFilter = None, workers: int = 1,
+                 subtree_cache=None) -> set:
     """
     Parses a GraphQL schema file and extracts field names recursively.
 
@@ -12,6 +14,9 @@ def parse_schema(schema_path: str, only_leafs: bool = False) -> set:
         schema_path (str): The file path to the GraphQL schema.
         only_leafs (bool): If True, only returns fields that don't have sub-fields.
                            If False, returns all fields including intermediate nodes.
+        path_filter (PathFilter, optional): Include/exclude rules applied during traversal.
+        workers (int, optional): Number of worker processes enumerating root fields in parallel.
+        subtree_cache (SubtreeCache, optional): Cache of type subtrees shared across schemas.
 
     Returns:
         set: A set of field names from the schema, filtered based on the only_leafs parameter.
@@ -21,7 +26,10 @@ def parse_schema(schema_path: str, only_leafs: bool = False) -> set:
     schema_fields = get_schema_fields(
         schema, only_leafs,
         root_query_type=root_query_type,
-        root_mutation_type=root_mutation_type
+        root_mutation_type=root_mutation_type,
+        path_filter=path_filter,
+        workers=workers,
+        subtree_cache=subtree_cache
     )
     return schema_fields
 
@@ -0,0 +1,90 @@
+import re
+from typing import List, Optional
+
+REGEX_PREFIX = "re:"
+
+def _pattern_to_regex(pattern: str) -> str:
+    if pattern.startswith(REGEX_PREFIX):
+        return pattern[len(REGEX_PREFIX):]
+    return re.escape(pattern).replace(r"\*", ".*").replace(r"\?", ".")
+
+def _literal_prefix(pattern: str) -> Optional[str]:
+    if pattern.startswith(REGEX_PREFIX):
+        return None
+    return re.split(r"[*?]", pattern, maxsplit=1)[0]
+
+class PathFilter:
+    """
+    Include/exclude rules for hierarchical field paths, applied while the schema and the queries are traversed.
+
+    Patterns are globs over dotted paths (`*` matches any characters, including dots, `?` matches one character),
+    or regular expressions when prefixed with `re:`. A pattern selects the paths it matches together with their
+    whole subtree, e.g. `*.pageInfo` selects `launches.pageInfo` and `launches.pageInfo.hasNextPage`.
+
+    - An excluded path is neither reported nor expanded.
+    - When include patterns are given, only included paths are reported. Other paths are only expanded while
+      an include pattern can still match below them, so unrelated subtrees are never walked.
+    """
+
+    def __init__(self, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self._include_re = self._compile(self.include)
+        self._exclude_re = self._compile(self.exclude)
+        prefixes = [_literal_prefix(pattern) for pattern in self.include]
+        # Regex includes can match anywhere, so they disable include-based pruning
+        self._include_prefixes = None if None in prefixes else prefixes
+
+    @staticmethod
+    def _compile(patterns: List[str]):
+        if not patterns:
+            return None
+        return re.compile("(?:" + "|".join(f"(?:{_pattern_to_regex(p)})" for p in patterns) + r")(?:\..*)?", re.DOTALL)
+
+    def is_excluded(self, path: str) -> bool:
+        """Returns True if the path or one of its ancestors matches an exclude pattern."""
+        return self._exclude_re is not None and self._exclude_re.fullmatch(path) is not None
+
+    def is_included(self, path: str) -> bool:
+        """Returns True if the path should be reported (ignoring exclusion)."""
+        return self._include_re is None or self._include_re.fullmatch(path) is not None
+
+    def may_include_below(self, path: str) -> bool:
+        """Returns True if an include pattern could match the path or one of its descendants."""
+        if self._include_re is None or self._include_prefixes is None:
+            return True
+        child_prefix = path + "."
+        return any(path.startswith(prefix) or prefix.startswith(child_prefix) for prefix in self._include_prefixes)
+
+    def should_visit(self, path: str) -> bool:
+        """Returns True if the path has to be traversed, i.e. it is not excluded and may lead to included paths."""
+        return not self.is_excluded(path) and (self.is_included(path) or self.may_include_below(path))
+
+    def keeps(self, path: str) -> bool:
+        """Returns True if the path is reported."""
+        return not self.is_excluded(path) and self.is_included(path)
+
+
+if __name__ == "__main__":
+  def test_path_filter_happy_path():
+      """
+      Tests that include/exclude patterns select whole subtrees and that pruning keeps paths leading to includes.
+      """
+      path_filter = PathFilter(include=["launches.*", "ships"], exclude=["*.pageInfo", "re:.*\\.edges\\.cursor"])
+
+      assert path_filter.keeps("launches.rocket"), "Included paths must be kept."
+      assert path_filter.keeps("ships.name"), "Descendants of an included path must be kept."
+      assert not path_filter.keeps("launches"), "Ancestors of included paths must not be reported."
+      assert path_filter.should_visit("launches"), "Ancestors of included paths must still be traversed."
+      assert not path_filter.should_visit("rockets"), "Paths that cannot lead to includes must be pruned."
+      assert not path_filter.should_visit("launches.pageInfo"), "Excluded paths must be pruned."
+      assert not path_filter.keeps("launches.pageInfo.hasNextPage"), "Descendants of excluded paths must be dropped."
+      assert not path_filter.keeps("launches.edges.cursor"), "Regex excludes must be applied."
+      assert path_filter.keeps("launches.edges.node"), "Siblings of excluded paths must be kept."
+
+      no_rules = PathFilter()
+      assert no_rules.keeps("anything.at.all") and no_rules.should_visit("anything"), "An empty filter keeps everything."
+
+      print("Test passed: Path filter selects and prunes subtrees correctly.")
+
+  test_path_filter_happy_path()
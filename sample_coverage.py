@@ -0,0 +1,255 @@
+import math
+import os
+from statistics import NormalDist
+from typing import Callable, Dict, Optional
+from load_queries import iter_query_files, sample_query_files
+from parse_queries_and_extract_fields import extract_document_fields
+from path_filter import PathFilter
+
+# Estimates are reported each time the number of processed files doubles, starting here
+FIRST_CHECKPOINT = 100
+
+class SampledCoverage:
+    """
+    Coverage and field usage estimated from a stratified random sample of query files.
+
+    Files are added one by one with the stratum (directory) they were drawn from, so estimates can be read at
+    any point and are refined as more files are processed; once every file is added they are exact.
+
+    - The usage of a field (the number of files using it) is estimated per stratum and summed, with a normal
+      confidence interval from the stratified variance, corrected for sampling without replacement.
+    - Coverage is estimated from the fields seen in the sample plus an estimate of the covered fields no sampled
+      file uses yet (bias-corrected Chao2, from the fields seen in exactly one and two sampled files). Fields seen
+      in the sample are certainly covered, so the lower bound never drops below the observed coverage. With
+      small samples and many rarely used fields, Chao2 underestimates, so the upper bound is the safer reading.
+    """
+
+    def __init__(self, schema_fields: set, strata_sizes: Dict[str, int], confidence: float = 0.95):
+        """
+        Args:
+            schema_fields (set): Set of all schema fields.
+            strata_sizes (Dict[str, int]): Number of files per stratum in the whole corpus.
+            confidence (float): Confidence level of the reported intervals.
+        """
+        self.schema_fields = schema_fields
+        self.strata_sizes = strata_sizes
+        self.total_files = sum(strata_sizes.values())
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.confidence = confidence
+        self.sampled = dict.fromkeys(strata_sizes, 0)
+        self.stratum_usage: Dict[str, Dict[str, int]] = {stratum: {} for stratum in strata_sizes}
+        self.field_usage: Dict[str, int] = {}
+
+    @property
+    def processed(self) -> int:
+        return sum(self.sampled.values())
+
+    def add(self, stratum: str, used_fields: set):
+        """
+        Adds the fields used by one sampled file.
+
+        Args:
+            stratum (str): The stratum the file was drawn from.
+            used_fields (set): The hierarchical fields the file uses.
+        """
+        self.sampled[stratum] += 1
+        stratum_usage = self.stratum_usage[stratum]
+        for used_field in used_fields:
+            stratum_usage[used_field] = stratum_usage.get(used_field, 0) + 1
+            self.field_usage[used_field] = self.field_usage.get(used_field, 0) + 1
+
+    def estimate_usage(self, field: str) -> tuple:
+        """
+        Estimates the number of files of the corpus using a field.
+
+        Returns:
+            tuple: The estimate and the lower and upper bounds of its confidence interval.
+        """
+        estimate, variance, unsampled = 0.0, 0.0, 0
+        for stratum, size in self.strata_sizes.items():
+            sampled = self.sampled[stratum]
+            if sampled == 0:
+                unsampled += size
+                continue
+            count = self.stratum_usage[stratum].get(field, 0)
+            share = count / sampled
+            estimate += size * count / sampled
+            if sampled < size:
+                # A single sampled file says nothing about the spread, so the largest variance is assumed
+                spread = share * (1 - share) * sampled / (sampled - 1) if sampled > 1 else 0.25
+                variance += size * size * (1 - sampled / size) * spread / sampled
+        if unsampled and self.processed:
+            # Strata without any sampled file are assumed to resemble the sampled ones
+            estimate += unsampled * estimate / (self.total_files - unsampled)
+            variance += unsampled * unsampled * 0.25
+        margin = self.z * math.sqrt(variance)
+        if estimate == 0 and self.processed < self.total_files:
+            # No sampled file uses the field: the exact binomial bound for zero successes
+            return 0.0, 0.0, self.total_files * (1 - (1 - self.confidence) ** (1 / max(self.processed, 1)))
+        return estimate, max(estimate - margin, float(self.field_usage.get(field, 0))), min(estimate + margin, float(self.total_files))
+
+    def estimate_coverage(self) -> dict:
+        """
+        Estimates the coverage of the whole corpus.
+
+        Returns:
+            dict: The keys 'coverage', 'coverage_low', 'coverage_high' (percentages), 'observed_coverage',
+                  'processed_files', 'total_files' and 'confidence'.
+        """
+        total = len(self.schema_fields)
+        observed = sum(1 for used_field in self.field_usage if used_field in self.schema_fields)
+        n = self.processed
+        unseen, low, high = 0.0, 0.0, 0.0
+        if n and n < self.total_files:
+            q1 = sum(1 for used_field, count in self.field_usage.items() if count == 1 and used_field in self.schema_fields)
+            q2 = sum(1 for used_field, count in self.field_usage.items() if count == 2 and used_field in self.schema_fields)
+            a = (n - 1) / n
+            if q2:
+                ratio = q1 / q2
+                unseen = a * q1 * ratio / 2
+                variance = q2 * (a * ratio ** 2 / 2 + a * a * ratio ** 3 + a * a * ratio ** 4 / 4)
+            else:
+                unseen = a * q1 * (q1 - 1) / 2
+                variance = (a * q1 * (q1 - 1) / 2 + a * a * q1 * (2 * q1 - 1) ** 2 / 4
+                            - a * a * q1 ** 4 / (4 * (observed + unseen))) if unseen else 0.0
+            if unseen > 0:
+                # Log-normal interval, which keeps the lower bound above the observed coverage
+                k = math.exp(self.z * math.sqrt(math.log(1 + max(variance, 0.0) / (unseen * unseen))))
+                low, high = unseen / k, unseen * k
+        unseen_cap = total - observed
+        percent = lambda count: (count / total) * 100 if total else 0.0
+        return {
+            'coverage': percent(observed + min(unseen, unseen_cap)),
+            'coverage_low': percent(observed + min(low, unseen_cap)),
+            'coverage_high': percent(observed + min(high, unseen_cap)),
+            'observed_coverage': percent(observed),
+            'processed_files': n,
+            'total_files': self.total_files,
+            'confidence': self.confidence,
+        }
+
+    def report_rows(self) -> list:
+        """
+        Returns one row per schema field with the keys 'Field', 'Sampled Usage', 'Estimated Usage', 'Usage Low' and 'Usage High'.
+        """
+        rows = []
+        for field in sorted(self.schema_fields):
+            estimate, low, high = self.estimate_usage(field)
+            rows.append({'Field': field, 'Sampled Usage': self.field_usage.get(field, 0),
+                         'Estimated Usage': estimate, 'Usage Low': low, 'Usage High': high})
+        return rows
+
+def sample_coverage(schema_fields: set, queries_path: str, sample: float = None, seed: int = 0, only_leafs: bool = False,
+                    path_filter: PathFilter = None, confidence: float = 0.95,
+                    on_checkpoint: Optional[Callable[[SampledCoverage], None]] = None) -> SampledCoverage:
+    """
+    Processes a stratified random sample of the query files of a directory, refining the estimates progressively.
+
+    The files are processed in the order of `sample_query_files`, so the files processed at any point form a
+    stratified sample, and only sampled files are read and parsed.
+
+    Args:
+        schema_fields (set): Set of all schema fields.
+        queries_path (str): Directory searched recursively for `.graphql` query files.
+        sample (float, optional): Number of files to process if at least 1, or the fraction of files if below 1.
+                                  None processes every file, which gives the exact answer.
+        seed (int): Seed of the sample.
+        only_leafs (bool): If True, only leaf fields are considered.
+        path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
+        confidence (float): Confidence level of the reported intervals.
+        on_checkpoint (Callable, optional): Called with the estimator each time the number of processed files
+                                            doubles, and once at the end.
+
+    Returns:
+        SampledCoverage: The estimator after the sample has been processed.
+
+    Raises:
+        FileNotFoundError: If no GraphQL query files are found in the specified directory.
+    """
+    order, strata_sizes = sample_query_files(queries_path, seed=seed)
+    if sample is not None:
+        size = math.ceil(sample * len(order)) if sample < 1 else int(sample)
+        order = order[:max(1, size)]
+    estimator = SampledCoverage(schema_fields, strata_sizes, confidence=confidence)
+    checkpoint = FIRST_CHECKPOINT
+    for file_path, query_str in iter_query_files(order):
+        try:
+            used_fields = extract_document_fields(query_str, only_leafs=only_leafs, path_filter=path_filter)
+        except Exception as e:
+            print(f"Error parsing {file_path}: {e}")
+            used_fields = set()
+        estimator.add(os.path.dirname(file_path), used_fields)
+        if on_checkpoint and estimator.processed == checkpoint and checkpoint < len(order):
+            on_checkpoint(estimator)
+            checkpoint *= 2
+    if on_checkpoint:
+        on_checkpoint(estimator)
+    return estimator
+
+
+def print_sample_estimate(estimator: SampledCoverage):
+    """Prints the current coverage estimate of a sample."""
+    estimate = estimator.estimate_coverage()
+    print(f"Sampled {estimate['processed_files']}/{estimate['total_files']} files: estimated coverage "
+          f"{estimate['coverage']:.2f}% ({estimate['confidence']:.0%} CI {estimate['coverage_low']:.2f}%-"
+          f"{estimate['coverage_high']:.2f}%; {estimate['observed_coverage']:.2f}% seen in the sample)")
+
+def generate_sample_report(estimator: SampledCoverage, csv_path: str = "schema_coverage_sample.csv"):
+    """
+    Writes the estimated usage of every schema field, with its confidence interval, to a CSV file.
+
+    Args:
+        estimator (SampledCoverage): The estimator returned by `sample_coverage`.
+        csv_path (str): Path to the CSV file for the estimates.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(estimator.report_rows(), columns=['Field', 'Sampled Usage', 'Estimated Usage', 'Usage Low', 'Usage High'])
+    df = df.sort_values(by='Estimated Usage', ascending=False)
+    print("Estimated Field Usage:")
+    print(df.to_string(index=False))
+    df.to_csv(csv_path, index=False)
+
+
+if __name__ == "__main__":
+  def test_sample_coverage_happy_path():
+      """
+      Tests that sampled estimates bracket the exact answer and become exact once every file is processed.
+      """
+      import random
+      import tempfile
+
+      schema_fields = {f"book.f{i}" for i in range(60)}
+      rng = random.Random(3)
+      exact_usage = {}
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          for directory, count, fields in [("common", 400, range(0, 20)), ("rare", 100, range(20, 50))]:
+              os.makedirs(os.path.join(tmp_dir, directory))
+              for i in range(count):
+                  used = rng.sample(list(fields), 3)
+                  for field in used:
+                      exact_usage[f"book.f{field}"] = exact_usage.get(f"book.f{field}", 0) + 1
+                  with open(os.path.join(tmp_dir, directory, f"q{i}.graphql"), "w") as file:
+                      file.write("query { book { %s } }" % " ".join(f"f{field}" for field in used))
+          exact_coverage = len(exact_usage) / len(schema_fields) * 100
+
+          checkpoints = []
+          sampled = sample_coverage(schema_fields, tmp_dir, sample=0.2, seed=1,
+                                    on_checkpoint=lambda estimator: checkpoints.append(estimator.processed))
+          assert checkpoints == [100], f"Unexpected checkpoints: {checkpoints}"
+          assert sampled.sampled == {os.path.join(tmp_dir, "common"): 80, os.path.join(tmp_dir, "rare"): 20}
+          estimate = sampled.estimate_coverage()
+          assert estimate['observed_coverage'] <= estimate['coverage_low'] <= estimate['coverage'] <= estimate['coverage_high']
+          assert estimate['coverage_low'] <= exact_coverage <= estimate['coverage_high'], f"{exact_coverage} outside {estimate}"
+          rows = {row['Field']: row for row in sampled.report_rows()}
+          inside = sum(row['Usage Low'] <= exact_usage.get(field, 0) <= row['Usage High'] for field, row in rows.items())
+          assert inside >= 0.9 * len(rows), f"Only {inside} of {len(rows)} usage intervals hold the exact usage."
+
+          full = sample_coverage(schema_fields, tmp_dir, seed=1)
+          estimate = full.estimate_coverage()
+          assert estimate['coverage'] == estimate['coverage_low'] == estimate['coverage_high'] == exact_coverage
+          assert all(full.estimate_usage(field) == (exact_usage.get(field, 0),) * 3 for field in schema_fields)
+
+      print("Test passed: Sampled coverage and usage were estimated with confidence intervals.")
+
+  test_sample_coverage_happy_path()
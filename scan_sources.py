@@ -0,0 +1,148 @@
+import glob
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from graphql import parse, OperationDefinitionNode, FragmentDefinitionNode
+
+SOURCE_EXTENSIONS = (".cs", ".ts", ".tsx", ".js", ".jsx", ".py")
+
+# String literal forms, tried left to right in a single pass so that literals never overlap:
+#   - StrawberryShake (C#) byte arrays: new global::System.Byte[]{0x71, 0x75, ...}
+#   - Triple-quoted strings: Python """...""" / '''...''' and C# 11 raw strings """..."""
+#   - C# verbatim strings: @"..." with "" as the escaped quote
+#   - Template literals (TypeScript/JavaScript): `...`, e.g. gql`...`
+#   - Regular single-line strings: "..." and '...'
+LITERAL_RE = re.compile(
+    rb'Byte\[\]\s*\{(?P<bytes>[0-9a-fA-Fx,\s]*)\}'
+    rb'|"""(?P<triple_double>.*?)"""'
+    rb"|'''(?P<triple_single>.*?)'''"
+    rb'|@"(?P<verbatim>(?:[^"]|"")*)"'
+    rb'|`(?P<template>(?:[^`\\]|\\.)*)`'
+    rb'|"(?P<double>(?:[^"\\\n]|\\.)*)"'
+    rb"|'(?P<single>(?:[^'\\\n]|\\.)*)'",
+    re.DOTALL,
+)
+GRAPHQL_START_RE = re.compile(r'^\s*(?:(?:query|mutation|subscription|fragment)\b|\{)')
+INTERPOLATION_RE = re.compile(r'\$\{[^}]*\}')
+ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|.)', re.DOTALL)
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '0': '\0'}
+
+def _unescape(text: str) -> str:
+    def replace(match):
+        escape = match.group(1)
+        if escape[0] == 'u' and len(escape) == 5:
+            return chr(int(escape[1:], 16))
+        return ESCAPES.get(escape, escape)
+    return ESCAPE_RE.sub(replace, text)
+
+def _literal_text(match) -> str:
+    kind = match.lastgroup
+    raw = match.group(kind)
+    if kind == 'bytes':
+        return bytes(int(token, 16) for token in re.findall(rb'0x([0-9a-fA-F]{2})', raw)).decode('utf-8', errors='replace')
+    text = raw.decode('utf-8', errors='replace')
+    if kind == 'verbatim':
+        return text.replace('""', '"')
+    if kind == 'template':
+        # Interpolated fragments are defined in their own literals in the same file
+        return _unescape(INTERPOLATION_RE.sub('', text))
+    if kind in ('double', 'single'):
+        return _unescape(text)
+    return text
+
+def _is_graphql_document(text: str) -> bool:
+    if not GRAPHQL_START_RE.match(text):
+        return False
+    try:
+        document = parse(text, no_location=True)
+    except Exception:
+        return False
+    return any(isinstance(d, (OperationDefinitionNode, FragmentDefinitionNode)) for d in document.definitions)
+
+def scan_source_file(file_path: str) -> list:
+    """
+    Extracts the GraphQL documents embedded as string literals in a source file.
+
+    The file is memory-mapped and scanned with a single compiled regular expression, so large generated
+    files are never read into memory as a whole. Only literals that parse as GraphQL operations or fragments
+    are returned.
+
+    Args:
+        file_path (str): Path of a C#, TypeScript/JavaScript or Python source file.
+
+    Returns:
+        list: The embedded GraphQL documents, in the order they appear in the file.
+    """
+    if os.path.getsize(file_path) == 0:
+        return []
+    documents = []
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for match in LITERAL_RE.finditer(data):
+            if b'{' not in match.group(0):
+                continue
+            text = _literal_text(match)
+            if _is_graphql_document(text):
+                documents.append(text)
+    return documents
+
+def load_embedded_queries(sources_path: str, extensions: tuple = SOURCE_EXTENSIONS, workers: int = None) -> list:
+    """
+    Scans source files for embedded GraphQL documents, in parallel across files.
+
+    All documents found in one source file are joined into one query document, so fragments defined in
+    separate literals resolve and each field counts once per file, like a `.graphql` file.
+
+    Args:
+        sources_path (str): Directory searched recursively for source files.
+        extensions (tuple): File extensions that are scanned.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        list: A list of tuples, each containing the source file path and its embedded GraphQL documents,
+              in the same format as `load_queries`.
+    """
+    source_files = sorted(
+        path for path in glob.glob(os.path.join(sources_path, '**', '*'), recursive=True)
+        if path.endswith(extensions) and os.path.isfile(path)
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        scanned = executor.map(scan_source_file, source_files, chunksize=8)
+        return [(path, "\n".join(documents)) for path, documents in zip(source_files, scanned) if documents]
+
+
+if __name__ == "__main__":
+  def test_scan_source_file_languages():
+      """
+      Tests that documents are found in C#, TypeScript and Python literal forms, and nothing else.
+      """
+      import tempfile
+
+      query = "query Books { book { title } }"
+      sources = {
+          "client.cs": 'var body = new global::System.Byte[]{' + ", ".join(f"0x{b:02x}" for b in query.encode()) + '};\n'
+                       'var verbatim = @"query ByTitle { book(title: ""Dune"") { title } }";\n'
+                       'var text = "not graphql { at all }";\n',
+          "client.ts": 'const A = gql`fragment A on Author { name }`;\n'
+                       'const Q = gql`\n  query Authors {\n    author { ...A }\n  }\n  ${A}\n`;\n'
+                       "const s = 'query Inline { book { isbn } }';\n",
+          "client.py": 'QUERY = """\nmutation Add { addBook { title } }\n"""\nOTHER = "{ not: valid graphql"\n',
+      }
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          for name, text in sources.items():
+              with open(os.path.join(tmp_dir, name), "w") as file:
+                  file.write(text)
+
+          cs_documents = scan_source_file(os.path.join(tmp_dir, "client.cs"))
+          assert cs_documents == [query, 'query ByTitle { book(title: "Dune") { title } }'], f"Unexpected C# documents: {cs_documents}"
+          ts_documents = scan_source_file(os.path.join(tmp_dir, "client.ts"))
+          assert len(ts_documents) == 3 and "query Authors" in ts_documents[1] and "${" not in ts_documents[1]
+          py_documents = scan_source_file(os.path.join(tmp_dir, "client.py"))
+          assert py_documents == ["\nmutation Add { addBook { title } }\n"], f"Unexpected Python documents: {py_documents}"
+
+          queries = load_embedded_queries(tmp_dir, workers=2)
+          assert [os.path.basename(path) for path, _ in queries] == ["client.cs", "client.py", "client.ts"]
+
+      print("Test passed: Embedded GraphQL documents were extracted from C#, TypeScript and Python sources.")
+
+  test_scan_source_file_languages()
@@ -0,0 +1,273 @@
+import json
+from typing import Dict, Set, Tuple
+from graphql import DocumentNode, parse
+from coverage_cache import build_schema_snapshot, snapshot_fields
+from extract_root_types import extract_root_types
+from get_schema_fields import get_type_fields, enumerate_schema_paths
+from load_schema import load_schema
+
+def diff_type_fields(old_type_fields: Dict[str, Dict[str, str]],
+                     new_type_fields: Dict[str, Dict[str, str]]) -> Set[Tuple[str, str]]:
+    """
+    Compares two schema versions at the type/field level.
+
+    A field counts as changed when it was added, removed, now returns a different named type, or
+    when its type switched between an object type (with sub-fields) and a leaf type.
+
+    Args:
+        old_type_fields (Dict[str, Dict[str, str]]): Lookup built by `get_type_fields` for the old schema.
+        new_type_fields (Dict[str, Dict[str, str]]): Lookup built by `get_type_fields` for the new schema.
+
+    Returns:
+        Set[Tuple[str, str]]: The (owner type, field name) pairs that changed.
+    """
+    changed = set()
+    for type_name in old_type_fields.keys() | new_type_fields.keys():
+        old_fields = old_type_fields.get(type_name, {})
+        new_fields = new_type_fields.get(type_name, {})
+        for field_name in old_fields.keys() | new_fields.keys():
+            old_type = old_fields.get(field_name)
+            new_type = new_fields.get(field_name)
+            if (old_type != new_type
+                    or (old_type in old_type_fields) != (new_type in new_type_fields)):
+                changed.add((type_name, field_name))
+    return changed
+
+def _has_prefix_in(path: str, prefixes: Set[str]) -> bool:
+    if path in prefixes:
+        return True
+    idx = path.find('.')
+    while idx != -1:
+        if path[:idx] in prefixes:
+            return True
+        idx = path.find('.', idx + 1)
+    return False
+
+def apply_schema_diff(cache: dict, new_schema: DocumentNode) -> tuple[dict, set, set]:
+    """
+    Updates a cached schema enumeration to a new schema version, re-enumerating only the affected subtrees.
+
+    Every cached path below a changed (type, field) pair is dropped, and the new definition of each
+    changed field is enumerated once per place its owner type occurs in the surviving path space.
+    If the root types themselves changed, the new schema is enumerated from scratch.
+
+    Args:
+        cache (dict): A cache loaded by `load_coverage_cache` (or a snapshot built by `build_schema_snapshot`).
+        new_schema (DocumentNode): The new version of the schema.
+
+    Returns:
+        tuple[dict, set, set]: A tuple containing:
+            - dict: A snapshot of the new schema, as returned by `build_schema_snapshot`.
+            - set: Hierarchical fields (all, not only leafs) added by the new schema.
+            - set: Hierarchical fields (all, not only leafs) removed by the new schema.
+    """
+    old_paths = {path[0]: path for path in cache['paths']}
+    path_filter = cache.get('path_filter')
+    new_root_types = list(extract_root_types(new_schema))
+    if new_root_types != list(cache['root_types']):
+        snapshot = build_schema_snapshot(new_schema, path_filter=path_filter)
+        new_paths = {path[0] for path in snapshot['paths']}
+        return snapshot, new_paths - old_paths.keys(), old_paths.keys() - new_paths
+
+    new_type_fields = get_type_fields(new_schema)
+    root_query_type, root_mutation_type = new_root_types
+    if root_query_type not in new_type_fields:
+        raise ValueError(f"Root query type '{root_query_type}' not found in schema.")
+    changed = diff_type_fields(cache['type_fields'], new_type_fields)
+
+    # Drop every cached subtree hanging off a changed field
+    removed_roots = {path for path, owner, field_name, _, _ in old_paths.values() if (owner, field_name) in changed}
+    surviving = {path: entry for path, entry in old_paths.items() if not _has_prefix_in(path, removed_roots)}
+
+    changed_by_type = {}
+    for type_name, field_name in changed:
+        if field_name in new_type_fields.get(type_name, {}):
+            changed_by_type.setdefault(type_name, []).append(field_name)
+
+    def expand_changed_fields(type_name: str, parent_path: str, visited: Set[str]) -> list:
+        added = []
+        for field_name in changed_by_type[type_name]:
+            field_type = new_type_fields[type_name][field_name]
+            has_subfields = field_type in new_type_fields
+            hierarchical_field = f"{parent_path}.{field_name}" if parent_path else field_name
+            if path_filter is not None and not path_filter.should_visit(hierarchical_field):
+                continue
+            added.append((hierarchical_field, type_name, field_name, field_type, has_subfields))
+            if has_subfields and field_type not in visited:
+                added.extend(enumerate_schema_paths(new_type_fields, field_type, hierarchical_field,
+                                                    visited | {field_type}, path_filter=path_filter))
+        return added
+
+    added_paths = []
+    for root_type in (root_query_type, root_mutation_type):
+        if root_type in changed_by_type:
+            added_paths.extend(expand_changed_fields(root_type, "", set()))
+
+    # Re-expand changed fields wherever their owner type is reached in the surviving path space
+    for path, _, _, field_type, has_subfields in surviving.values():
+        if not has_subfields or field_type not in changed_by_type:
+            continue
+        ancestors = set()
+        idx = path.find('.')
+        while idx != -1:
+            ancestors.add(surviving[path[:idx]][3])
+            idx = path.find('.', idx + 1)
+        if field_type in ancestors:
+            continue  # Recursion was cut here, so the type was never expanded at this path
+        added_paths.extend(expand_changed_fields(field_type, path, ancestors | {field_type}))
+
+    new_paths = dict(surviving)
+    for entry in added_paths:
+        new_paths.setdefault(entry[0], entry)
+
+    snapshot = {
+        'root_types': new_root_types,
+        'type_fields': new_type_fields,
+        'paths': list(new_paths.values()),
+        'path_filter': path_filter,
+    }
+    return snapshot, new_paths.keys() - old_paths.keys(), old_paths.keys() - new_paths.keys()
+
+def schema_diff_coverage(cache: dict, new_schema: DocumentNode) -> dict:
+    """
+    Computes the coverage delta that a new schema version causes, reusing the cached previous run.
+
+    The query field usage is taken from the cache unchanged, so no query file is re-read or re-parsed.
+
+    Args:
+        cache (dict): A cache loaded by `load_coverage_cache`.
+        new_schema (DocumentNode): The new version of the schema.
+
+    Returns:
+        dict: The coverage delta, with the keys 'old_coverage', 'new_coverage', 'coverage_delta',
+              'old_total_fields', 'new_total_fields', 'changed_fields', 'added_fields', 'removed_fields',
+              'newly_covered_fields', 'newly_uncovered_fields' and 'removed_used_fields'.
+    """
+    only_leafs = cache['only_leafs']
+    used_fields = set(cache['field_usage'])
+    snapshot, added, removed = apply_schema_diff(cache, new_schema)
+
+    old_fields = snapshot_fields(cache, only_leafs=only_leafs)
+    new_fields = snapshot_fields(snapshot, only_leafs=only_leafs)
+    added &= new_fields
+    removed &= old_fields
+
+    old_total = len(old_fields)
+    new_total = len(new_fields)
+    old_covered = len(old_fields & used_fields)
+    new_covered = old_covered - len(removed & used_fields) + len(added & used_fields)
+
+    old_coverage = (old_covered / old_total) * 100 if old_total else 0.0
+    new_coverage = (new_covered / new_total) * 100 if new_total else 0.0
+    return {
+        'old_coverage': old_coverage,
+        'new_coverage': new_coverage,
+        'coverage_delta': new_coverage - old_coverage,
+        'old_total_fields': old_total,
+        'new_total_fields': new_total,
+        'changed_fields': sorted(f"{owner}.{field_name}" for owner, field_name in
+                                 diff_type_fields(cache['type_fields'], snapshot['type_fields'])),
+        'added_fields': sorted(added),
+        'removed_fields': sorted(removed),
+        'newly_covered_fields': sorted(added & used_fields),
+        'newly_uncovered_fields': sorted(added - used_fields),
+        'removed_used_fields': sorted(removed & used_fields),
+    }
+
+def run_schema_diff(schema_path: str, cache: dict, diff_path: str = "schema_coverage_diff.json",
+                    schema: DocumentNode = None) -> dict:
+    """
+    Loads a new schema version, prints the coverage delta against a cached run and writes it as JSON.
+
+    Args:
+        schema_path (str): The file path to the new GraphQL schema.
+        cache (dict): A cache loaded by `load_coverage_cache`.
+        diff_path (str): Path of the JSON file to write the coverage delta to.
+        schema (DocumentNode, optional): The new schema, e.g. a composed supergraph. If given, `schema_path` is not read.
+
+    Returns:
+        dict: The coverage delta, as returned by `schema_diff_coverage`.
+    """
+    delta = schema_diff_coverage(cache, schema if schema is not None else load_schema(schema_path))
+
+    print(f"Schema Coverage: {delta['old_coverage']:.2f}% -> {delta['new_coverage']:.2f}% "
+          f"({delta['coverage_delta']:+.2f}%)\n")
+    print(f"Changed Schema Fields: {len(delta['changed_fields'])}")
+    print(f"Added Fields: {len(delta['added_fields'])} ({len(delta['newly_uncovered_fields'])} uncovered)")
+    print(f"Removed Fields: {len(delta['removed_fields'])}")
+    if delta['removed_used_fields']:
+        print(f"Removed fields still used by queries: {delta['removed_used_fields']}")
+
+    with open(diff_path, 'w') as file:
+        json.dump(delta, file, indent=2)
+    return delta
+
+
+if __name__ == "__main__":
+  def test_schema_diff_coverage_matches_full_run():
+      """
+      Tests that the incrementally updated enumeration equals a full enumeration of the new schema,
+      and that the coverage delta reflects added, removed and retyped fields.
+      """
+      old_schema = parse("""
+      type Query {
+          book: Book
+          author: Author
+      }
+
+      type Book {
+          title: String
+          author: Author
+          isbn: String
+      }
+
+      type Author {
+          name: String
+          books: [Book]
+      }
+      """)
+      new_schema = parse("""
+      type Query {
+          book: Book
+          author: Author
+          publisher: Publisher
+      }
+
+      type Book {
+          title: String
+          author: Author
+          isbn: Int
+          publisher: Publisher
+      }
+
+      type Author {
+          name: String
+      }
+
+      type Publisher {
+          name: String
+      }
+      """)
+      old_snapshot = build_schema_snapshot(old_schema)
+      field_usage = {"book": 2, "book.title": 2, "author": 1, "author.books": 1, "author.books.isbn": 1}
+      cache = dict(old_snapshot, only_leafs=False, field_usage=field_usage)
+
+      snapshot, added, removed = apply_schema_diff(cache, new_schema)
+      expected = build_schema_snapshot(new_schema)
+      assert sorted(snapshot['paths']) == sorted(expected['paths']), (
+          f"Incremental paths differ from a full run:\n"
+          f"Missing: {set(expected['paths']) - set(snapshot['paths'])}\n"
+          f"Extra: {set(snapshot['paths']) - set(expected['paths'])}"
+      )
+
+      delta = schema_diff_coverage(cache, new_schema)
+      assert "author.books.isbn" in delta['removed_used_fields'], "Removed used fields were not reported."
+      assert "book.publisher.name" in delta['newly_uncovered_fields'], "Added fields were not reported."
+      assert "Book.isbn" in delta['changed_fields'], "Retyped fields were not reported."
+      new_fields = {path[0] for path in expected['paths']}
+      expected_coverage = len(new_fields & set(field_usage)) / len(new_fields) * 100
+      assert abs(delta['new_coverage'] - expected_coverage) < 0.01, "New coverage does not match a full run."
+
+      print("Test passed: Schema diff matches a full re-enumeration of the new schema.")
+
+  test_schema_diff_coverage_matches_full_run()
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+from get_schema_fields import enumerate_schema_paths
+
+SUBTREE_CACHE_VERSION = 1
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Share of `max_bytes` an eviction shrinks the directory to, so that the next stores do not trigger another one
+EVICTION_TARGET = 0.9
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def subtree_hashes(type_fields: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """
+    Hashes the transitive definition of every object type: its fields and those of every object type reachable from it.
+
+    Two schemas give the same hash for a type exactly when enumerating below that type gives the same paths,
+    however different the rest of the schemas are. Mutually recursive types are grouped into strongly connected
+    components, hashed from their own definitions and the hashes of the components they reference, so every
+    definition is hashed once.
+
+    Args:
+        type_fields (Dict[str, Dict[str, str]]): Lookup built by `get_type_fields`.
+
+    Returns:
+        Dict[str, str]: Maps each object type name to a hex digest identifying its subtree.
+    """
+    # Iterative Tarjan; components are completed referenced-first, so their hashes are known when needed
+    index, lowlink, on_stack, stack = {}, {}, set(), []
+    hashes = {}
+    for start in type_fields:
+        if start in index:
+            continue
+        work = [(start, iter(type_fields[start].values()))]
+        index[start] = lowlink[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            type_name, remaining = work[-1]
+            for field_type in remaining:
+                if field_type not in type_fields:
+                    continue
+                if field_type not in index:
+                    index[field_type] = lowlink[field_type] = len(index)
+                    stack.append(field_type)
+                    on_stack.add(field_type)
+                    work.append((field_type, iter(type_fields[field_type].values())))
+                    break
+                if field_type in on_stack:
+                    lowlink[type_name] = min(lowlink[type_name], index[field_type])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[type_name])
+                if lowlink[type_name] == index[type_name]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        members.append(member)
+                        if member == type_name:
+                            break
+                    members.sort()
+                    referenced = sorted({hashes[field_type] for member in members
+                                         for field_type in type_fields[member].values() if field_type in hashes})
+                    # GraphQL names cannot contain the separators; field order is kept, since it orders the enumerated paths
+                    component_hash = _digest(" ".join(referenced) + "".join(
+                        f"|{member}:" + ",".join(f"{name}={field_type}" for name, field_type in type_fields[member].items())
+                        for member in members))
+                    for member in members:
+                        hashes[member] = _digest(f"{SUBTREE_CACHE_VERSION}|{component_hash}|{member}")
+    return hashes
+
+class SubtreeCache:
+    """
+    A content-addressed cache of the paths below object types, shared by every schema defining the same types.
+
+    Entries are keyed by `subtree_hashes`, so a type shared by several schemas (e.g. internal and public client
+    schemas) is enumerated once and re-rooted under every root field returning it. Entries are kept in memory
+    for the lifetime of the cache and, when `cache_dir` is set, stored as one JSON file per entry. The
+    directory is shared across runs and schemas; once it exceeds `max_bytes`, the least recently used
+    entries are removed. The directory is only listed on the first store and on evictions; in between, its
+    size is tracked in memory.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = MAX_CACHE_BYTES):
+        """
+        Args:
+            cache_dir (str, optional): Directory the entries are stored in. None keeps them in memory only.
+            max_bytes (int): Maximum total size of the entries in `cache_dir`.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries: Dict[str, List[Tuple[str, str, str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._stored_bytes: Optional[int] = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # Sent to the schema loading process without the in-memory entries
+        return {**self.__dict__, 'entries': {}}
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[List[Tuple[str, str, str]]]:
+        if not self.cache_dir:
+            return None
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r') as file:
+                entry = json.load(file)
+            # Reading an entry marks it as recently used
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+        fields = entry['fields']
+        return [(path, *fields[field_id]) for path, field_id in zip(entry['paths'], entry['field_ids'])]
+
+    def _store(self, key: str, type_name: str, relative_paths: List[Tuple[str, str, str]]):
+        if not self.cache_dir:
+            return
+        field_ids = {}
+        entry = {
+            'version': SUBTREE_CACHE_VERSION,
+            'type': type_name,
+            'paths': [path for path, _, _ in relative_paths],
+            'field_ids': [field_ids.setdefault((owner, field_name), len(field_ids)) for _, owner, field_name in relative_paths],
+        }
+        entry['fields'] = list(field_ids)
+        # ASCII only (json.dumps escapes everything else), so the length is the size on disk
+        data = json.dumps(entry)
+        entry_path = self._entry_path(key)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(data)
+        os.replace(tmp_path, entry_path)
+        if self._stored_bytes is None:
+            self._stored_bytes = sum(size for _, size, _ in self._scan())
+        else:
+            self._stored_bytes += len(data)
+        if self._stored_bytes > self.max_bytes:
+            self._evict()
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        with os.scandir(self.cache_dir) as scanned:
+            for entry in scanned:
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        # Rescanned rather than trusting the running size, since other processes may share the directory
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICTION_TARGET
+        for _, size, entry_path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+            total -= size
+        self._stored_bytes = total
+
+    def relative_paths(self, type_fields: Dict[str, Dict[str, str]], type_name: str, key: str) -> List[Tuple[str, str, str, str, bool]]:
+        """
+        Returns the paths below a type, relative to it.
+
+        Args:
+            type_fields (Dict[str, Dict[str, str]]): Lookup built by `get_type_fields`.
+            type_name (str): The type entered by the walk.
+            key (str): The type's hash from `subtree_hashes`.
+
+        Returns:
+            List[Tuple[str, str, str, str, bool]]: The paths `enumerate_schema_paths` returns for the type entered
+                                                   at the root, with paths relative to the type.
+        """
+        relative_paths = self.entries.get(key)
+        if relative_paths is not None:
+            self.hits += 1
+            return relative_paths
+        stored = self._load(key)
+        if stored is not None:
+            self.hits += 1
+            # The hash guarantees the owners' fields match the stored subtree, so they give each path's type
+            relative_paths = []
+            for path, owner, field_name in stored:
+                field_type = type_fields[owner][field_name]
+                relative_paths.append((path, owner, field_name, field_type, field_type in type_fields))
+        else:
+            self.misses += 1
+            relative_paths = enumerate_schema_paths(type_fields, type_name, visited={type_name})
+            self._store(key, type_name, [(path, owner, field_name) for path, owner, field_name, _, _ in relative_paths])
+        self.entries[key] = relative_paths
+        return relative_paths
+
+    def enumerate(self, type_fields: Dict[str, Dict[str, str]], root_types: List[str]) -> List[Tuple[str, str, str, str, bool]]:
+        """
+        Enumerates the paths below root types like `enumerate_root_paths` without a path filter, re-rooting cached subtrees.
+
+        Args:
+            type_fields (Dict[str, Dict[str, str]]): Lookup built by `get_type_fields`.
+            root_types (List[str]): The root types, in the order their paths are returned.
+
+        Returns:
+            List[Tuple[str, str, str, str, bool]]: One tuple per path, as returned by `enumerate_schema_paths`.
+        """
+        hashes = subtree_hashes(type_fields)
+        paths = []
+        for root_type in root_types:
+            for field_name, field_type in type_fields.get(root_type, {}).items():
+                has_subfields = field_type in type_fields
+                paths.append((field_name, root_type, field_name, field_type, has_subfields))
+                if has_subfields:
+                    prefix = f"{field_name}."
+                    paths.extend([(prefix + path, owner, name, subfield_type, subfield_has_subfields)
+                                  for path, owner, name, subfield_type, subfield_has_subfields
+                                  in self.relative_paths(type_fields, field_type, hashes[field_type])])
+        return paths
+
+if __name__ == "__main__":
+  def test_subtree_cache_happy_path():
+      """
+      Tests that subtrees shared by two schemas are enumerated once, persisted, and re-rooted to the exact paths.
+      """
+      import tempfile
+      from graphql import parse
+      from get_schema_fields import get_type_fields
+
+      shared = """
+      type Launch { id: ID mission: String rocket: Rocket }
+      type Rocket { name: String launches: [Launch] }
+      """
+      internal = get_type_fields(parse("type Query { launch: Launch launches: [Launch] rockets: [Rocket] audit: Audit }"
+                                       "type Audit { by: String }" + shared))
+      public = get_type_fields(parse("type Query { latest: Launch ships: [Ship] } type Mutation { relaunch: Launch }"
+                                     "type Ship { name: String }" + shared))
+
+      def expected(type_fields, root_types):
+          return [path for root_type in root_types for path in enumerate_schema_paths(type_fields, root_type)]
+
+      with tempfile.TemporaryDirectory() as cache_dir:
+          cache = SubtreeCache(cache_dir)
+          assert cache.enumerate(internal, ["Query"]) == expected(internal, ["Query"])
+          assert (cache.hits, cache.misses) == (1, 3), f"Unexpected hits/misses: {(cache.hits, cache.misses)}"
+          assert cache.enumerate(public, ["Query", "Mutation"]) == expected(public, ["Query", "Mutation"])
+          assert cache.misses == 4, "Only the subtree of Ship must be new in the second schema."
+
+          # A later run reads the shared subtrees from disk
+          later = SubtreeCache(cache_dir)
+          assert later.enumerate(public, ["Query", "Mutation"]) == expected(public, ["Query", "Mutation"])
+          assert later.misses == 0, "Persisted subtrees must be reused across runs."
+
+          # A changed type changes the hash of every subtree reaching it
+          changed = dict(public, Rocket={"name": "String", "height": "Float"})
+          changed_hashes, public_hashes = subtree_hashes(changed), subtree_hashes(public)
+          assert changed_hashes["Launch"] != public_hashes["Launch"] and changed_hashes["Ship"] == public_hashes["Ship"]
+          assert public_hashes["Launch"] != public_hashes["Rocket"], "Types of one recursive component must differ."
+
+          # Filling the directory lists it on the first store and on evictions only, not on every store
+          scans = []
+          class CountingCache(SubtreeCache):
+              def _scan(self):
+                  scans.append(1)
+                  return super()._scan()
+          size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+          many = {f"Type{i}": {"id": "ID", "name": "String"} for i in range(200)}
+          counting = CountingCache(cache_dir, max_bytes=size + 20000)
+          for i in range(200):
+              counting.relative_paths(many, f"Type{i}", f"type{i}")
+          on_disk = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+          assert on_disk <= counting.max_bytes, "The directory must stay within its size bound."
+          assert counting.misses == 200 and 1 < len(scans) <= 20, f"Unexpected number of directory scans: {len(scans)}"
+
+          bounded = SubtreeCache(cache_dir, max_bytes=0)
+          bounded.enumerate(changed, ["Query"])
+          assert not [name for name in os.listdir(cache_dir) if name.endswith(".json")], "Entries beyond the size bound must be evicted."
+
+      print("Test passed: Subtrees shared by several schemas were enumerated once and re-rooted.")
+
+  test_subtree_cache_happy_path()
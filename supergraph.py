@@ -0,0 +1,208 @@
+import os
+from typing import Dict, List, Tuple
+from graphql import DocumentNode, parse
+from graphql.language.ast import (
+    ArgumentNode,
+    DirectiveDefinitionNode,
+    DirectiveNode,
+    NameNode,
+    ObjectTypeDefinitionNode,
+    ObjectTypeExtensionNode,
+    SchemaDefinitionNode,
+    SchemaExtensionNode,
+    StringValueNode,
+    TypeDefinitionNode,
+)
+from load_schema import load_schema
+
+# Ownership is recorded with the directives of Apollo Federation supergraphs, so composed supergraphs and
+# supergraphs produced by other federation tooling are read back the same way.
+JOIN_DIRECTIVES = parse("""
+directive @join__type(graph: String!) repeatable on OBJECT
+directive @join__field(graph: String, external: Boolean) repeatable on FIELD_DEFINITION
+""").definitions
+
+def _join_directive(name: str, graph: str) -> DirectiveNode:
+    return DirectiveNode(name=NameNode(value=name),
+                         arguments=(ArgumentNode(name=NameNode(value="graph"), value=StringValueNode(value=graph)),))
+
+def _argument(directive: DirectiveNode, name: str):
+    for argument in directive.arguments or ():
+        if argument.name.value == name:
+            return getattr(argument.value, "value", None)
+    return None
+
+def compose_supergraph(subgraph_paths: List[str]) -> DocumentNode:
+    """
+    Composes subgraph schemas into one supergraph schema, recording which subgraph owns each field.
+
+    Object types (and `extend type` extensions) with the same name are merged into one type whose fields are
+    the union of the subgraphs' fields; the first definition of a field wins. Each type gets a
+    `@join__type(graph: ...)` directive per subgraph defining it and each field a `@join__field(graph: ...)`
+    directive per subgraph resolving it, so fields marked `@external` are not attributed to that subgraph.
+    Other definitions (scalars, enums, inputs, directives, ...) are taken from the first subgraph defining them.
+
+    Args:
+        subgraph_paths (List[str]): Paths of the subgraph SDL files. A subgraph is named after its file name
+                                    without extensions, e.g. `accounts.graphql` -> `accounts`.
+
+    Returns:
+        DocumentNode: The supergraph schema, usable wherever a parsed schema is expected.
+
+    Raises:
+        ValueError: If two subgraphs have the same name.
+    """
+    graphs = {}
+    for subgraph_path in subgraph_paths:
+        graph = os.path.basename(subgraph_path).split(".")[0]
+        if graph in graphs:
+            raise ValueError(f"Subgraphs {graphs[graph]} and {subgraph_path} are both named '{graph}'.")
+        graphs[graph] = subgraph_path
+
+    object_types = {}  # type name -> [first definition, {field name: field}, {field name: [graphs]}, [graphs]]
+    definitions = {}
+    operation_types = {}
+    for graph, subgraph_path in graphs.items():
+        for definition in load_schema(subgraph_path).definitions:
+            if isinstance(definition, (ObjectTypeDefinitionNode, ObjectTypeExtensionNode)):
+                entry = object_types.setdefault(definition.name.value, [definition, {}, {}, []])
+                if isinstance(entry[0], ObjectTypeExtensionNode) and isinstance(definition, ObjectTypeDefinitionNode):
+                    entry[0] = definition
+                if graph not in entry[3]:
+                    entry[3].append(graph)
+                for field in definition.fields or ():
+                    entry[1].setdefault(field.name.value, field)
+                    external = any(directive.name.value == "external" for directive in field.directives or ())
+                    owners = entry[2].setdefault(field.name.value, [])
+                    if not external and graph not in owners:
+                        owners.append(graph)
+            elif isinstance(definition, (SchemaDefinitionNode, SchemaExtensionNode)):
+                for operation_type in definition.operation_types or ():
+                    operation_types.setdefault(operation_type.operation, operation_type)
+            elif isinstance(definition, (TypeDefinitionNode, DirectiveDefinitionNode)):
+                definitions.setdefault((isinstance(definition, DirectiveDefinitionNode), definition.name.value), definition)
+
+    supergraph_definitions = list(JOIN_DIRECTIVES)
+    if operation_types:
+        supergraph_definitions.append(SchemaDefinitionNode(directives=(), operation_types=tuple(operation_types.values())))
+    for (is_directive, name), definition in definitions.items():
+        if not (is_directive and name.startswith("join__")):
+            supergraph_definitions.append(definition)
+    for type_name, (definition, fields, owners, type_graphs) in object_types.items():
+        merged_fields = tuple(
+            field.__class__(
+                name=field.name, description=field.description, arguments=field.arguments, type=field.type,
+                directives=tuple(field.directives or ()) + tuple(_join_directive("join__field", graph) for graph in owners[name]),
+            )
+            for name, field in fields.items()
+        )
+        supergraph_definitions.append(ObjectTypeDefinitionNode(
+            name=definition.name, description=getattr(definition, "description", None),
+            interfaces=definition.interfaces or (), fields=merged_fields,
+            directives=tuple(definition.directives or ()) + tuple(_join_directive("join__type", graph) for graph in type_graphs),
+        ))
+    return DocumentNode(definitions=tuple(supergraph_definitions))
+
+def field_owners(supergraph: DocumentNode) -> Dict[Tuple[str, str], Tuple[str, ...]]:
+    """
+    Reads which subgraphs resolve each object type field of a supergraph.
+
+    A field is owned by the graphs of its `@join__field` directives (except those marked `external: true`),
+    or, without such directives, by every graph of its type's `@join__type` directives.
+
+    Args:
+        supergraph (DocumentNode): A supergraph built by `compose_supergraph` or by federation tooling.
+
+    Returns:
+        Dict[Tuple[str, str], Tuple[str, ...]]: Maps (type name, field name) to the owning graphs.
+                                                Empty for a schema without join directives.
+    """
+    owners = {}
+    for definition in supergraph.definitions:
+        if not isinstance(definition, ObjectTypeDefinitionNode):
+            continue
+        type_graphs = tuple(_argument(directive, "graph") for directive in definition.directives or ()
+                            if directive.name.value == "join__type")
+        for field in definition.fields or ():
+            join_fields = [directive for directive in field.directives or () if directive.name.value == "join__field"]
+            if join_fields:
+                graphs = tuple(_argument(directive, "graph") for directive in join_fields
+                               if _argument(directive, "graph") and not _argument(directive, "external"))
+            else:
+                graphs = type_graphs
+            if graphs:
+                owners[(definition.name.value, field.name.value)] = graphs
+    return owners
+
+def subgraph_coverage(snapshot: dict, schema_fields: set, covered_fields: set, owners: dict) -> list:
+    """
+    Attributes the coverage computed once against the supergraph back to the subgraphs owning each field.
+
+    A field resolved by several subgraphs (such as an entity key) counts towards each of them.
+
+    Args:
+        snapshot (dict): The snapshot of the supergraph built by `build_schema_snapshot`.
+        schema_fields (set): The schema fields coverage was computed against.
+        covered_fields (set): The covered schema fields.
+        owners (dict): Field ownership read by `field_owners`.
+
+    Returns:
+        list: One dict per subgraph with the keys 'Subgraph', 'Total Fields', 'Covered Fields' and 'Coverage'.
+    """
+    totals = {}
+    for hierarchical_field, owner_type, field_name, _, _ in snapshot['paths']:
+        if hierarchical_field not in schema_fields:
+            continue
+        for graph in owners.get((owner_type, field_name), ()):
+            total = totals.setdefault(graph, [0, 0])
+            total[0] += 1
+            total[1] += hierarchical_field in covered_fields
+    return [{'Subgraph': graph, 'Total Fields': total, 'Covered Fields': covered,
+             'Coverage': (covered / total) * 100 if total else 0.0}
+            for graph, (total, covered) in sorted(totals.items())]
+
+
+if __name__ == "__main__":
+  def test_supergraph_happy_path():
+      """
+      Tests that subgraphs compose into one index and that coverage is attributed to the owning subgraphs.
+      """
+      import tempfile
+      from graphql import print_ast
+      from coverage_cache import build_schema_snapshot, snapshot_fields
+
+      subgraphs = {
+          "accounts.graphql": """
+          type Query { me: User }
+          type User @key(fields: "id") { id: ID! name: String }
+          """,
+          "reviews.graphql": """
+          type Query { topReviews: [Review] }
+          type Review { body: String author: User }
+          extend type User @key(fields: "id") { id: ID! @external reviews: [Review] }
+          """,
+      }
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          paths = []
+          for name, sdl in subgraphs.items():
+              paths.append(os.path.join(tmp_dir, name))
+              with open(paths[-1], "w") as file:
+                  file.write(sdl)
+          supergraph = compose_supergraph(paths)
+
+      owners = field_owners(parse(print_ast(supergraph)))
+      assert owners[("User", "id")] == ("accounts",), "External fields must not be owned by the referencing subgraph."
+      assert owners[("User", "reviews")] == ("reviews",) and owners[("Query", "me")] == ("accounts",)
+
+      snapshot = build_schema_snapshot(supergraph)
+      schema_fields = snapshot_fields(snapshot, only_leafs=True)
+      assert "me.reviews.body" in schema_fields and "topReviews.author.name" in schema_fields, "Types must be merged."
+
+      covered_fields = {"me.name", "me.reviews.body"}
+      rows = {row['Subgraph']: row for row in subgraph_coverage(snapshot, schema_fields, covered_fields, owners)}
+      assert rows["accounts"]["Covered Fields"] == 1 and rows["reviews"]["Covered Fields"] == 1, f"Unexpected rows: {rows}"
+      assert sum(row["Total Fields"] for row in rows.values()) == len(schema_fields), "Every field has a single owner here."
+
+      print("Test passed: Subgraphs were composed once and coverage was attributed to the owning subgraphs.")
+
+  test_supergraph_happy_path()
@@ -0,0 +1,375 @@
+import hashlib
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable
+import numpy as np
+from parse_queries_and_extract_fields import extract_document_fields
+from path_filter import PathFilter
+
+MAX_UNKNOWN_FIELDS = 10000
+# Documents handed to a worker at a time; at most two chunks per worker are in flight
+CHUNK_SIZE = 500
+# Parsed documents remembered per process, so documents logged again in later flushes are not parsed again
+MAX_MEMOISED_DOCUMENTS = 10000
+
+def _hash64(value: str, salt: bytes = b"") -> int:
+    # A stable hash (unlike `hash()`), so that sketches built in different processes can be merged
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8, salt=salt).digest(), "little")
+
+class UsageSketch:
+    """
+    Approximate, mergeable field usage statistics for very large traffic volumes.
+
+    - Usage counts are kept in a count-min sketch: an estimate never undercounts, and with probability
+      at least `1 - delta` it overcounts by at most `epsilon` times the total number of counted field uses.
+    - The number of distinct operations using each schema field is estimated with a HyperLogLog per field,
+      with a relative standard error of about `hll_error`. Registers are only allocated for covered fields,
+      so a large schema of which little is used stays small.
+    - Whether a schema field is covered is tracked exactly, in a packed bitset over schema field IDs.
+
+    Sketches built with the same schema fields and parameters can be merged, e.g. across worker processes.
+    """
+
+    def __init__(self, schema_fields: set, epsilon: float = 0.001, delta: float = 0.01, hll_error: float = 0.05):
+        """
+        Args:
+            schema_fields (set): Set of all schema fields. Their sorted order defines the field IDs.
+            epsilon (float): Count-min sketch error bound, relative to the total number of counted field uses.
+            delta (float): Probability that a count-min estimate exceeds its error bound.
+            hll_error (float): Target relative standard error of the distinct operation estimates.
+        """
+        self.fields = sorted(schema_fields)
+        self.field_ids = {field: field_id for field_id, field in enumerate(self.fields)}
+        self.epsilon = epsilon
+        self.delta = delta
+        self.hll_error = hll_error
+
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.precision = min(16, max(4, math.ceil(math.log2((1.04 / hll_error) ** 2))))
+        self.registers_per_field = 1 << self.precision
+
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        # The HyperLogLog registers of field `i` are row `register_rows[i]` of `registers` (-1 until it is covered)
+        self.register_rows = np.full(len(self.fields), -1, dtype=np.int32)
+        self.registers = np.zeros((0, self.registers_per_field), dtype=np.uint8)
+        self.register_count = 0
+        self.covered = np.zeros((len(self.fields) + 7) // 8, dtype=np.uint8)
+        self.total_count = 0
+        self.unknown_fields = set()
+
+        self._rows = np.arange(self.depth)
+        self._columns = np.array([self._columns_of(field) for field in self.fields], dtype=np.int64).reshape(-1, self.depth)
+
+    def _columns_of(self, field: str) -> list:
+        # Double hashing derives one column per row from two independent hashes
+        h1 = _hash64(field, b"cms-1")
+        h2 = _hash64(field, b"cms-2") | 1
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def _covered_ids(self) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(self.covered, count=len(self.fields)))
+
+    def _cover(self, ids: np.ndarray) -> np.ndarray:
+        # Sets the covered bits of `ids` and returns their register rows, allocating rows for newly covered fields
+        np.bitwise_or.at(self.covered, ids >> 3, (0x80 >> (ids & 7)).astype(np.uint8))
+        new_ids = ids[self.register_rows[ids] < 0]
+        if len(new_ids):
+            needed = self.register_count + len(new_ids)
+            if needed > len(self.registers):
+                grown = np.zeros((max(needed, 2 * len(self.registers), 64), self.registers_per_field), dtype=np.uint8)
+                grown[:self.register_count] = self.registers[:self.register_count]
+                self.registers = grown
+            self.register_rows[new_ids] = np.arange(self.register_count, needed, dtype=np.int32)
+            self.register_count = needed
+        return self.register_rows[ids]
+
+    def _compatible(self, other: "UsageSketch") -> bool:
+        return (self.fields == other.fields and self.width == other.width and self.depth == other.depth
+                and self.precision == other.precision)
+
+    def add_operation(self, operation_key: str, used_fields: set, count: int = 1):
+        """
+        Counts one operation (a query document or a logged request) and the fields it uses.
+
+        Args:
+            operation_key (str): Identifies the operation for distinct counting, e.g. its document text or hash.
+            used_fields (set): The unique hierarchical fields used by the operation.
+            count (int): Number of executions of the operation, e.g. the count of a collector line.
+        """
+        ids = []
+        for field in used_fields:
+            field_id = self.field_ids.get(field)
+            if field_id is None:
+                columns = self._columns_of(field)
+                self.table[self._rows, columns] += count
+                if len(self.unknown_fields) < MAX_UNKNOWN_FIELDS:
+                    self.unknown_fields.add(field)
+            else:
+                ids.append(field_id)
+        self.total_count += len(used_fields) * count
+        if not ids:
+            return
+
+        ids = np.array(ids, dtype=np.int64)
+        np.add.at(self.table, (self._rows, self._columns[ids]), count)
+        rows = self._cover(ids)
+
+        operation_hash = _hash64(operation_key, b"hll")
+        register = operation_hash & (self.registers_per_field - 1)
+        remaining = operation_hash >> self.precision
+        rank = min(64 - self.precision - remaining.bit_length() + 1, 255)
+        self.registers[rows, register] = np.maximum(self.registers[rows, register], rank)
+
+    def merge(self, other: "UsageSketch") -> "UsageSketch":
+        """
+        Adds the counts of another sketch to this one.
+
+        Args:
+            other (UsageSketch): A sketch built with the same schema fields and parameters.
+
+        Returns:
+            UsageSketch: This sketch.
+
+        Raises:
+            ValueError: If the sketches are not compatible.
+        """
+        if not self._compatible(other):
+            raise ValueError("Only sketches with the same schema fields and parameters can be merged.")
+        self.table += other.table
+        ids = other._covered_ids()
+        rows = self._cover(ids)
+        self.registers[rows] = np.maximum(self.registers[rows], other.registers[other.register_rows[ids]])
+        self.total_count += other.total_count
+        self.unknown_fields.update(list(other.unknown_fields)[:MAX_UNKNOWN_FIELDS - len(self.unknown_fields)])
+        return self
+
+    def covered_fields(self) -> set:
+        """Returns the schema fields used by at least one operation (exact)."""
+        return {self.fields[field_id] for field_id in self._covered_ids()}
+
+    def estimate_usage(self, field: str) -> int:
+        """Returns the estimated number of operations using a field (never an underestimate)."""
+        field_id = self.field_ids.get(field)
+        columns = self._columns[field_id] if field_id is not None else self._columns_of(field)
+        return int(self.table[self._rows, columns].min())
+
+    def field_usage(self) -> dict:
+        """Returns the estimated usage of every covered schema field."""
+        ids = self._covered_ids()
+        estimates = self.table[self._rows, self._columns[ids]].min(axis=1)
+        return {self.fields[field_id]: int(estimate) for field_id, estimate in zip(ids, estimates)}
+
+    def distinct_operations(self) -> dict:
+        """Returns the estimated number of distinct operations using each covered schema field."""
+        ids = self._covered_ids()
+        registers = self.registers[self.register_rows[ids]].astype(np.float64)
+        m = self.registers_per_field
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.power(2.0, -registers).sum(axis=1)
+        zeros = (registers == 0).sum(axis=1)
+        # Linear counting is more accurate for small cardinalities
+        small = (raw <= 2.5 * m) & (zeros > 0)
+        estimates = np.where(small, m * np.log(m / np.maximum(zeros, 1)), raw)
+        return {self.fields[field_id]: int(round(estimate)) for field_id, estimate in zip(ids, estimates)}
+
+    def error_bounds(self) -> dict:
+        """
+        Returns the error bounds of the current estimates.
+
+        Returns:
+            dict: 'usage_overcount' (absolute count-min bound), 'usage_confidence' (probability the bound holds)
+                  and 'distinct_relative_error' (HyperLogLog relative standard error).
+        """
+        return {
+            'usage_overcount': math.e / self.width * self.total_count,
+            'usage_confidence': 1 - math.exp(-self.depth),
+            'distinct_relative_error': 1.04 / math.sqrt(self.registers_per_field),
+        }
+
+    def save(self, sketch_path: str):
+        """
+        Writes the sketch to a compressed `.npz` file so that it can be merged later.
+
+        Field names are stored as newline-separated UTF-8 bytes (GraphQL names never contain a newline), so the
+        file holds numeric arrays only and is read without unpickling anything. Registers are stored for the
+        covered fields only, in field ID order.
+        """
+        np.savez_compressed(
+            sketch_path, fields=encode_names(self.fields), table=self.table,
+            registers=self.registers[self.register_rows[self._covered_ids()]], covered=self.covered, params=np.array([self.epsilon, self.delta, self.hll_error]),
+            total_count=np.array([self.total_count]), unknown_fields=encode_names(sorted(self.unknown_fields)),
+        )
+
+    @classmethod
+    def load(cls, sketch_path: str) -> "UsageSketch":
+        """
+        Reads a sketch written by `save`.
+
+        Raises:
+            ValueError: If the file holds pickled objects, e.g. a sketch written by an earlier version.
+        """
+        with np.load(sketch_path) as data:
+            epsilon, delta, hll_error = data["params"]
+            sketch = cls(set(decode_names(data["fields"])), epsilon=epsilon, delta=delta, hll_error=hll_error)
+            sketch.table = data["table"]
+            sketch.covered = data["covered"]
+            ids = sketch._covered_ids()
+            sketch.registers = data["registers"]
+            sketch.register_count = len(ids)
+            sketch.register_rows[ids] = np.arange(len(ids), dtype=np.int32)
+            sketch.total_count = int(data["total_count"][0])
+            sketch.unknown_fields = set(decode_names(data["unknown_fields"]))
+        return sketch
+
+def encode_names(names: list) -> np.ndarray:
+    """Encodes field names (or other newline-free strings) as UTF-8 bytes, so `.npz` files need no pickled objects."""
+    return np.frombuffer("\n".join(names).encode(), dtype=np.uint8)
+
+def decode_names(encoded: np.ndarray) -> list:
+    """Decodes the names encoded by `encode_names`, in their order."""
+    return encoded.tobytes().decode().split("\n") if len(encoded) else []
+
+_worker_state = None
+
+def _init_sketch_worker(only_leafs: bool, path_filter: PathFilter):
+    global _worker_state
+    _worker_state = (only_leafs, path_filter, {})
+
+def _extract_chunk(chunk: list) -> list:
+    # The fields used by each document of a chunk, or None if it cannot be parsed
+    only_leafs, path_filter, memo = _worker_state
+    results = []
+    for query in chunk:
+        file_path, query_str = query[0], query[1]
+        if query_str not in memo:
+            try:
+                memo[query_str] = extract_document_fields(query_str, only_leafs=only_leafs, path_filter=path_filter)
+            except Exception as e:
+                print(f"Error parsing {file_path}: {e}")
+                memo[query_str] = None
+            if len(memo) > MAX_MEMOISED_DOCUMENTS:
+                del memo[next(iter(memo))]
+        results.append(memo[query_str])
+    return results
+
+def sketch_queries(queries: Iterable[tuple], schema_fields: set, only_leafs: bool = False, path_filter: PathFilter = None,
+                   epsilon: float = 0.001, delta: float = 0.01, hll_error: float = 0.05,
+                   workers: int = None) -> UsageSketch:
+    """
+    Builds a usage sketch from a stream of query documents, parsing them across processes.
+
+    The stream is consumed lazily in chunks of `CHUNK_SIZE` documents with at most two chunks per worker in
+    flight, so memory does not grow with the number of documents. Workers only return the fields each document
+    uses; they are counted into one sketch here.
+
+    Args:
+        queries (Iterable[tuple]): Tuples of a file path and a GraphQL query string, optionally followed by the
+                                   number of executions of the document (e.g. from `iter_collected_operations`;
+                                   1 if absent).
+        schema_fields (set): Set of all schema fields.
+        only_leafs (bool): If True, only includes fields without sub-fields (leaf nodes).
+        path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
+        epsilon (float): Count-min sketch error bound, relative to the total number of counted field uses.
+        delta (float): Probability that a count-min estimate exceeds its error bound.
+        hll_error (float): Target relative standard error of the distinct operation estimates.
+        workers (int, optional): Number of worker processes. 1 builds the sketch in-process.
+
+    Returns:
+        UsageSketch: The sketch.
+    """
+    sketch = UsageSketch(schema_fields, epsilon=epsilon, delta=delta, hll_error=hll_error)
+    queries = iter(queries)
+    chunks = iter(lambda: list(islice(queries, CHUNK_SIZE)), [])
+
+    def add_chunk(chunk: list, results: list):
+        for query, used_fields in zip(chunk, results):
+            if used_fields is not None:
+                sketch.add_operation(query[1], used_fields, query[2] if len(query) > 2 else 1)
+
+    if workers == 1:
+        _init_sketch_worker(only_leafs, path_filter)
+        for chunk in chunks:
+            add_chunk(chunk, _extract_chunk(chunk))
+        return sketch
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sketch_worker,
+                             initargs=(only_leafs, path_filter)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(_extract_chunk, chunk)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                add_chunk(chunk, future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            add_chunk(chunk, future.result())
+    return sketch
+
+
+if __name__ == "__main__":
+  def test_usage_sketch_happy_path():
+      """
+      Tests sketch estimates against exact counts, and that merged sketches equal a single sketch.
+      """
+      import os
+      import random
+      import tempfile
+
+      random.seed(0)
+      schema_fields = {f"type{t}.field{f}" for t in range(20) for f in range(50)}
+      fields = sorted(schema_fields)
+      operations = [(f"op{i}", set(random.sample(fields, 30)) | ({"unknown.field"} if i % 100 == 0 else set()))
+                    for i in range(2000)]
+      exact = {}
+      for _, used_fields in operations:
+          for field in used_fields:
+              exact[field] = exact.get(field, 0) + 1
+
+      whole = UsageSketch(schema_fields, epsilon=0.001, delta=0.01, hll_error=0.05)
+      first = UsageSketch(schema_fields, epsilon=0.001, delta=0.01, hll_error=0.05)
+      second = UsageSketch(schema_fields, epsilon=0.001, delta=0.01, hll_error=0.05)
+      for i, (operation_key, used_fields) in enumerate(operations):
+          whole.add_operation(operation_key, used_fields)
+          (first if i % 2 else second).add_operation(operation_key, used_fields)
+      merged = first.merge(second)
+
+      assert merged.covered_fields() == whole.covered_fields() == set(exact) - {"unknown.field"}, "Coverage must be exact."
+      assert merged.field_usage() == whole.field_usage(), "Merging must not change the estimates."
+      assert merged.unknown_fields == {"unknown.field"}
+      bound = whole.error_bounds()["usage_overcount"]
+      for field, estimate in whole.field_usage().items():
+          assert exact[field] <= estimate <= exact[field] + bound, f"Estimate for {field} outside its bounds."
+      assert whole.estimate_usage("unknown.field") >= exact["unknown.field"]
+
+      for field, estimate in whole.distinct_operations().items():
+          assert abs(estimate - exact[field]) <= 0.3 * exact[field], f"Distinct estimate for {field} too far off."
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          sketch_path = os.path.join(tmp_dir, "sketch.npz")
+          whole.save(sketch_path)
+          loaded = UsageSketch.load(sketch_path)
+          assert loaded.field_usage() == whole.field_usage() and loaded.covered_fields() == whole.covered_fields()
+          assert loaded.distinct_operations() == whole.distinct_operations()
+
+      # Registers are only allocated for covered fields, and the covered bitset is packed
+      sparse = UsageSketch({f"field{f}" for f in range(100000)})
+      sparse.add_operation("op", {"field1", "field99999"})
+      assert sparse.register_count == 2 and sparse.registers.nbytes <= 64 * sparse.registers_per_field
+      assert sparse.covered.nbytes == 12500 and sparse.covered_fields() == {"field1", "field99999"}
+
+
+      queries = [("a.graphql", "query { book { title } }"), ("b.graphql", "query { book { title isbn } }"),
+                 ("collected:c", "query { book { title } }", 40), ("bad.graphql", "query {")]
+      for workers in (1, 2):
+          sketch = sketch_queries(iter(queries * 300), {"book", "book.title", "book.isbn"}, workers=workers)
+          assert sketch.field_usage() == {"book": 12600, "book.title": 12600, "book.isbn": 300}, (
+              f"Execution counts must weight the usage: {sketch.field_usage()}")
+
+      print("Test passed: Usage sketch estimates stay within their bounds and merge exactly.")
+
+  test_usage_sketch_happy_path()
@@ -0,0 +1,381 @@
+import json
+import math
+import os
+import time
+import numpy as np
+from parse_queries_and_extract_fields import extract_document_fields
+from path_filter import PathFilter
+from usage_sketch import decode_names, encode_names
+
+BUCKET_SECONDS = 86400
+BUCKET_COUNT = 90
+HALF_LIFE_SECONDS = 30 * 86400
+
+class WindowedUsage:
+    """
+    Per-field usage of runtime operations over time, updated incrementally as new log batches arrive.
+
+    Three views are kept, each updated in constant time per used field:
+
+    - A ring buffer of `bucket_count` fixed time buckets of `bucket_seconds` each, plus the running total over
+      the whole ring, for usage counts over a trailing window.
+    - The last time each field was used, so whether a field is covered within any window is a single comparison.
+    - Exponentially decayed counters with the given half-life, for a usage trend that favours recent traffic.
+
+    The buckets are a dense `bucket_count` x fields array of 64-bit counts, e.g. 72 MB for 90 days of 100,000
+    fields. Fields unknown to the schema only get a last-seen time, so they are reported per window as well.
+
+    Example:
+        usage = WindowedUsage(schema_fields)
+        usage.update_from_operations("operations.jsonl")
+        unused = usage.uncovered_fields(window_seconds=90 * 86400)
+    """
+
+    def __init__(self, schema_fields: set, bucket_seconds: int = BUCKET_SECONDS, bucket_count: int = BUCKET_COUNT,
+                 half_life_seconds: float = HALF_LIFE_SECONDS):
+        """
+        Args:
+            schema_fields (set): Set of all schema fields. Their sorted order defines the field IDs.
+            bucket_seconds (int): Length of one time bucket.
+            bucket_count (int): Number of buckets kept. Usage older than `bucket_seconds * bucket_count` is dropped.
+            half_life_seconds (float): Time after which the weight of a use in the decayed counters halves.
+        """
+        self.fields = sorted(schema_fields)
+        self.field_ids = {field: field_id for field_id, field in enumerate(self.fields)}
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.half_life_seconds = half_life_seconds
+
+        self.buckets = np.zeros((bucket_count, len(self.fields)), dtype=np.int64)
+        self.window_total = np.zeros(len(self.fields), dtype=np.int64)
+        self.head = None
+        self.last_seen = np.full(len(self.fields), -np.inf)
+        self.decayed = np.zeros(len(self.fields))
+        self.decayed_time = None
+        # Unknown fields get negative IDs, -1 - index, so documents can refer to them next to schema field IDs
+        self.unknown_names = []
+        self.unknown_ids = {}
+        self.unknown_last_seen = []
+
+        # State of the incremental reader of a collector file
+        self.offset = 0
+        self._document_ids = {}
+
+    def _field_id(self, field: str) -> int:
+        field_id = self.field_ids.get(field)
+        if field_id is None:
+            field_id = self.unknown_ids.get(field)
+            if field_id is None:
+                field_id = self.unknown_ids[field] = -1 - len(self.unknown_names)
+                self.unknown_names.append(field)
+                self.unknown_last_seen.append(-math.inf)
+        return field_id
+
+    def _advance(self, bucket: int):
+        # Clears the buckets that leave the ring, so that the running total only covers the ring
+        if self.head is None:
+            self.head = bucket
+            return
+        steps = bucket - self.head
+        if steps <= 0:
+            return
+        for step in range(1, min(steps, self.bucket_count) + 1):
+            slot = (self.head + step) % self.bucket_count
+            self.window_total -= self.buckets[slot]
+            self.buckets[slot] = 0
+        self.head = bucket
+
+    def _decay_to(self, timestamp: float):
+        if self.decayed_time is None:
+            self.decayed_time = timestamp
+        elif timestamp > self.decayed_time:
+            self.decayed *= 2.0 ** (-(timestamp - self.decayed_time) / self.half_life_seconds)
+            self.decayed_time = timestamp
+
+    def add(self, timestamp: float, used_fields: set, count: int = 1):
+        """
+        Records `count` uses of the given fields at a point in time. Timestamps may arrive out of order.
+
+        Args:
+            timestamp (float): Unix time of the uses.
+            used_fields (set): The hierarchical fields used.
+            count (int): Number of uses, e.g. how often an operation was executed in a batch.
+        """
+        if used_fields:
+            self._add_ids(timestamp, np.array(sorted(self._field_id(field) for field in used_fields), dtype=np.int64), count)
+
+    def _add_ids(self, timestamp: float, ids: np.ndarray, count: int):
+        # Sorted, so the unknown fields' negative IDs come first
+        unknown = int(np.searchsorted(ids, 0))
+        for field_id in ids[:unknown].tolist():
+            index = -1 - field_id
+            self.unknown_last_seen[index] = max(self.unknown_last_seen[index], timestamp)
+        ids = ids[unknown:]
+        if not len(ids):
+            return
+        bucket = math.floor(timestamp / self.bucket_seconds)
+        self._advance(bucket)
+        if bucket > self.head - self.bucket_count:
+            self.buckets[bucket % self.bucket_count, ids] += count
+            self.window_total[ids] += count
+
+        np.maximum.at(self.last_seen, ids, timestamp)
+
+        self._decay_to(timestamp)
+        self.decayed[ids] += count * 2.0 ** (-(self.decayed_time - timestamp) / self.half_life_seconds)
+
+    def update_from_operations(self, operations_path: str, only_leafs: bool = False, path_filter: PathFilter = None) -> int:
+        """
+        Reads the lines an `OperationCollector` appended since the previous call and adds them.
+
+        Each document is parsed once; later lines for the same hash only add their count. A file shorter than the
+        previous read position was rotated or truncated, and is read again from its start.
+
+        Args:
+            operations_path (str): Path of the JSONL file written by the collector.
+            only_leafs (bool): If True, only leaf fields are considered.
+            path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
+
+        Returns:
+            int: The number of lines read.
+        """
+        lines_read = 0
+        if os.path.getsize(operations_path) < self.offset:
+            self.offset = 0
+        with open(operations_path, "rb") as file:
+            file.seek(self.offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # A line the collector is still writing; it is read on the next update
+                    break
+                self.offset += len(line)
+                lines_read += 1
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                ids = self._document_ids.get(entry["hash"])
+                if ids is None:
+                    if "document" not in entry:
+                        continue
+                    try:
+                        used_fields = extract_document_fields(entry["document"], only_leafs=only_leafs, path_filter=path_filter)
+                    except Exception as e:
+                        print(f"Error parsing collected:{entry['hash']}: {e}")
+                        used_fields = set()
+                    ids = np.array(sorted(self._field_id(field) for field in used_fields), dtype=np.int64)
+                    self._document_ids[entry["hash"]] = ids
+                if len(ids):
+                    self._add_ids(entry.get("time", time.time()), ids, entry.get("count", 1))
+        return lines_read
+
+    def field_usage(self, window_seconds: float = None, now: float = None) -> dict:
+        """
+        Returns the usage of every field used within a trailing window.
+
+        Args:
+            window_seconds (float, optional): Length of the window, rounded up to whole buckets. Defaults to the whole ring.
+            now (float, optional): End of the window as Unix time. Defaults to the current time.
+
+        Returns:
+            dict: Usage count per field, for fields used within the window.
+        """
+        if self.head is None:
+            return {}
+        self._advance(math.floor((time.time() if now is None else now) / self.bucket_seconds))
+        window_buckets = self.bucket_count if window_seconds is None else min(math.ceil(window_seconds / self.bucket_seconds), self.bucket_count)
+        if window_buckets == self.bucket_count:
+            usage = self.window_total
+        else:
+            slots = [(self.head - step) % self.bucket_count for step in range(window_buckets)]
+            usage = self.buckets[slots].sum(axis=0)
+        return {self.fields[field_id]: int(usage[field_id]) for field_id in np.flatnonzero(usage)}
+
+    def covered_fields(self, window_seconds: float, now: float = None) -> set:
+        """Returns the fields used within the last `window_seconds` before `now` (defaults to the current time)."""
+        since = (time.time() if now is None else now) - window_seconds
+        return {self.fields[field_id] for field_id in np.flatnonzero(self.last_seen >= since)}
+
+    def uncovered_fields(self, window_seconds: float, now: float = None) -> set:
+        """Returns the fields not used within the last `window_seconds` before `now` (defaults to the current time)."""
+        since = (time.time() if now is None else now) - window_seconds
+        return {self.fields[field_id] for field_id in np.flatnonzero(self.last_seen < since)}
+
+    def unknown_fields(self, window_seconds: float = None, now: float = None) -> set:
+        """Returns the fields unknown to the schema used within the last `window_seconds` before `now`, or ever if None."""
+        since = -math.inf if window_seconds is None else (time.time() if now is None else now) - window_seconds
+        return {name for name, last_seen in zip(self.unknown_names, self.unknown_last_seen) if last_seen >= since}
+
+    def decayed_usage(self, now: float = None) -> dict:
+        """Returns the exponentially decayed usage of every field used so far, evaluated at `now`."""
+        if self.decayed_time is None:
+            return {}
+        now = time.time() if now is None else now
+        decayed = self.decayed * 2.0 ** (-(now - self.decayed_time) / self.half_life_seconds)
+        return {self.fields[field_id]: float(decayed[field_id]) for field_id in np.flatnonzero(decayed)}
+
+    def save(self, state_path: str):
+        """
+        Writes the aggregation state, including the reader offset, to a compressed `.npz` file.
+
+        Names and document hashes are stored as encoded bytes (see `usage_sketch.encode_names`), so the file
+        holds numeric arrays only and is read without unpickling anything.
+        """
+        hashes = sorted(self._document_ids)
+        np.savez_compressed(
+            state_path, fields=encode_names(self.fields), buckets=self.buckets,
+            window_total=self.window_total, last_seen=self.last_seen, decayed=self.decayed,
+            params=np.array([self.bucket_seconds, self.bucket_count, self.half_life_seconds]),
+            clock=np.array([np.nan if self.head is None else self.head,
+                            np.nan if self.decayed_time is None else self.decayed_time, self.offset]),
+            unknown_fields=encode_names(self.unknown_names), unknown_last_seen=np.array(self.unknown_last_seen, dtype=np.float64),
+            document_hashes=encode_names(hashes),
+            document_ids=np.concatenate([self._document_ids[h] for h in hashes]) if hashes else np.zeros(0, dtype=np.int64),
+            document_offsets=np.cumsum([0] + [len(self._document_ids[h]) for h in hashes]),
+        )
+
+    @classmethod
+    def load(cls, state_path: str) -> "WindowedUsage":
+        """
+        Reads the state written by `save`.
+
+        Raises:
+            ValueError: If the file holds pickled objects, e.g. a state written by an earlier version.
+        """
+        with np.load(state_path) as data:
+            bucket_seconds, bucket_count, half_life_seconds = data["params"]
+            usage = cls(set(decode_names(data["fields"])), bucket_seconds=int(bucket_seconds), bucket_count=int(bucket_count),
+                        half_life_seconds=float(half_life_seconds))
+            usage.buckets = data["buckets"]
+            usage.window_total = data["window_total"]
+            usage.last_seen = data["last_seen"]
+            usage.decayed = data["decayed"]
+            head, decayed_time, offset = data["clock"]
+            usage.head = None if np.isnan(head) else int(head)
+            usage.decayed_time = None if np.isnan(decayed_time) else float(decayed_time)
+            usage.offset = int(offset)
+            usage.unknown_names = decode_names(data["unknown_fields"])
+            usage.unknown_ids = {name: -1 - index for index, name in enumerate(usage.unknown_names)}
+            usage.unknown_last_seen = data["unknown_last_seen"].tolist()
+            ids, offsets = data["document_ids"], data["document_offsets"]
+            usage._document_ids = {document_hash: ids[offsets[i]:offsets[i + 1]]
+                                   for i, document_hash in enumerate(decode_names(data["document_hashes"]))}
+        return usage
+
+def windowed_field_usage(operations_path: str, schema_fields: set, window_days: int, state_path: str = None,
+                         only_leafs: bool = False, path_filter: PathFilter = None) -> tuple:
+    """
+    Updates the windowed usage from the new lines of a collector file and returns the usage over the last days.
+
+    Args:
+        operations_path (str): Path of the JSONL file written by the collector.
+        schema_fields (set): Set of all schema fields.
+        window_days (int): Length of the trailing window in days.
+        state_path (str, optional): Path of the saved `WindowedUsage`. It is read if present and written back.
+        only_leafs (bool): If True, only leaf fields are considered.
+        path_filter (PathFilter, optional): Include/exclude rules applied while walking each operation.
+
+    Returns:
+        tuple: The usage within the window per field, and the set of fields used within the window
+               (including fields unknown to the schema, as `parse_queries_and_extract_fields` reports them).
+
+    Raises:
+        ValueError: If the saved state was built for different schema fields, keeps fewer days than `window_days`,
+                    or was written by an earlier version.
+    """
+    if state_path and os.path.isfile(state_path):
+        usage = WindowedUsage.load(state_path)
+        if set(usage.fields) != schema_fields:
+            raise ValueError(f"The schema fields changed since {state_path} was written; remove it to rebuild it.")
+        if usage.bucket_count * usage.bucket_seconds < window_days * BUCKET_SECONDS:
+            # Usage older than the saved ring was already dropped, so the longer window cannot be answered from it
+            raise ValueError(f"{state_path} keeps {usage.bucket_count * usage.bucket_seconds // BUCKET_SECONDS} days of usage, "
+                             f"fewer than the requested {window_days}; remove it to rebuild it.")
+    else:
+        usage = WindowedUsage(schema_fields, bucket_count=max(window_days, BUCKET_COUNT))
+    usage.update_from_operations(operations_path, only_leafs=only_leafs, path_filter=path_filter)
+    if state_path:
+        usage.save(state_path)
+    window_seconds = window_days * BUCKET_SECONDS
+    return usage.field_usage(window_seconds), usage.covered_fields(window_seconds) | usage.unknown_fields(window_seconds)
+
+
+if __name__ == "__main__":
+  def test_windowed_usage_happy_path():
+      """
+      Tests windowed usage, coverage and decay against counts recomputed from scratch, across incremental updates.
+      """
+      import os
+      import random
+      import tempfile
+
+      day = 86400
+      random.seed(0)
+      fields = [f"book.field{i}" for i in range(30)]
+      usage = WindowedUsage(set(fields), bucket_seconds=day, bucket_count=10, half_life_seconds=2 * day)
+      events = []
+      for _ in range(500):
+          timestamp = random.uniform(0, 20 * day)
+          used_fields = set(random.sample(fields, 3))
+          events.append((timestamp, used_fields))
+      for timestamp, used_fields in sorted(events)[:400] + sorted(events)[400:][::-1]:
+          usage.add(timestamp, used_fields)
+
+      now = 20 * day
+      for window_days in (1, 3, 10):
+          start = (math.floor(now / day) - window_days + 1) * day
+          expected = {}
+          for timestamp, used_fields in events:
+              if timestamp >= start:
+                  for field in used_fields:
+                      expected[field] = expected.get(field, 0) + 1
+          assert usage.field_usage(window_days * day, now=now) == expected, f"Wrong usage over {window_days} days."
+          exact_covered = {field for timestamp, used_fields in events if timestamp >= now - window_days * day for field in used_fields}
+          assert usage.covered_fields(window_days * day, now=now) == exact_covered
+          assert usage.uncovered_fields(window_days * day, now=now) == set(fields) - exact_covered
+
+      decayed = usage.decayed_usage(now=now)
+      for field in fields:
+          expected = sum(2.0 ** (-(now - t) / (2 * day)) for t, used_fields in events if field in used_fields)
+          assert abs(decayed.get(field, 0.0) - expected) < 1e-6, f"Wrong decayed usage for {field}."
+
+      with tempfile.TemporaryDirectory() as tmp_dir:
+          operations_path = os.path.join(tmp_dir, "operations.jsonl")
+          usage = WindowedUsage({"book.title", "book.isbn"}, bucket_seconds=day, bucket_count=90)
+          with open(operations_path, "w") as file:
+              file.write(json.dumps({"hash": "a", "count": 3, "time": 1 * day, "document": "{ book { title } }"}) + "\n")
+          assert usage.update_from_operations(operations_path, only_leafs=True) == 1
+          with open(operations_path, "a") as file:
+              file.write(json.dumps({"hash": "a", "count": 2, "time": 50 * day}) + "\n")
+              file.write(json.dumps({"hash": "b", "count": 1, "time": 50 * day, "document": "{ book { isbn } }"}) + "\n")
+              file.write('{"hash": "partial"')
+          state_path = os.path.join(tmp_dir, "state.npz")
+          usage.save(state_path)
+          usage = WindowedUsage.load(state_path)
+          assert usage.update_from_operations(operations_path, only_leafs=True) == 2, "Only new, complete lines must be read."
+          assert usage.field_usage(now=95 * day) == {"book.title": 2, "book.isbn": 1}, f"Unexpected usage: {usage.field_usage(now=95 * day)}"
+          assert usage.uncovered_fields(30 * day, now=95 * day) == {"book.title", "book.isbn"}
+
+          # A rotated file starts over; its lines may refer to documents written before the rotation
+          with open(operations_path, "w") as file:
+              file.write(json.dumps({"hash": "b", "count": 4, "time": 60 * day}) + "\n")
+          assert usage.update_from_operations(operations_path, only_leafs=True) == 1, "A rotated file must be read from its start."
+          assert usage.field_usage(now=95 * day) == {"book.title": 2, "book.isbn": 5}
+
+          # Unknown fields are windowed like schema fields, and the state is read back without unpickling
+          usage.add(10 * day, {"book.removed"})
+          usage.add(94 * day, {"book.renamed", "book.title"})
+          usage.save(state_path)
+          usage = WindowedUsage.load(state_path)
+          assert usage.unknown_fields() == {"book.removed", "book.renamed"}
+          assert usage.unknown_fields(30 * day, now=95 * day) == {"book.renamed"}, "Unknown fields must be windowed."
+          windowed_field_usage(operations_path, {"book.title", "book.isbn"}, window_days=90, state_path=state_path)
+          try:
+              windowed_field_usage(operations_path, {"book.title", "book.isbn"}, window_days=120, state_path=state_path)
+          except ValueError:
+              pass
+          else:
+              raise AssertionError("A window longer than the saved ring must be rejected.")
+
+      print("Test passed: Windowed usage matches a full recomputation and updates incrementally.")
+
+  test_windowed_usage_happy_path()